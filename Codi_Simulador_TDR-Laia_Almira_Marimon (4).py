@@ -2,182 +2,3080 @@
 #Simulador de la Ruleta Europea amb estratègies d’aposta
 
 #Llibreries necessàries
-import tkinter as tk                                  #Llibreria principal per a la interfície gràfica
-from tkinter import ttk, messagebox, filedialog
 import random                                         #Per generar tirades aleatòries
-import statistics                                     # Per calcular mitjanes
+import math                                           #Per a l'esbós de quantils (escala logarítmica)
+import statistics                                     #Quantils de la normal per als intervals de confiança
+import os                                             #Per saber quants nuclis té l'ordinador
+from concurrent.futures import ProcessPoolExecutor    #Per repartir les simulacions entre processos
+import concurrent.futures
+import multiprocessing                                #Senyal d'aturada dels processos treballadors
 from datetime import datetime                         #Per afegir data i hora als informes
-#Permet generar PDF amb taules i text
-#El bloc try-except assegura que si la llibreria no està instal·lada, el programa segueixi funcionant
+import argparse                                       #Per llegir les opcions de la línia d'ordres
+import sys
+import json                                           #Metadades dels resultats desats a disc
+import shutil
+import tempfile
+import weakref
+import hashlib                                        #Claus de la memòria cau de l'escombrat de paràmetres
+import itertools
+import collections
+import heapq                                          #Mostres de files: les k de clau més petita
+import pickle
+import sqlite3                                        #Índex de la memòria cau de resultats
+import threading                                      #Per executar les simulacions sense bloquejar la finestra
+import queue
+import time
+import contextlib
+import platform                                       #Descripció de l'entorn a les proves de rendiment
+#La interfície gràfica (tkinter) i reportlab es carreguen només quan es necessiten (vegeu
+#_carregar_gui i _carregar_reportlab), així el simulador es pot importar i executar sense pantalla
+REPORTLAB_AVAILABLE = None    #None = encara no s'ha intentat carregar
+#Permet simular moltes partides alhora amb arrays (motor vectoritzat)
+#Igual que amb reportlab, si NumPy no està instal·lat es fa servir el simulador tirada a tirada
 try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet
-    REPORTLAB_AVAILABLE = True
+    import numpy as np
+    NUMPY_AVAILABLE = True
 except Exception:
-    REPORTLAB_AVAILABLE = False
+    NUMPY_AVAILABLE = False
+
+
+
+def _carregar_gui():
+#Importa tkinter la primera vegada que s'obre la interfície gràfica
+    global tk, ttk, messagebox, filedialog
+    import tkinter as tk                              #Llibreria principal per a la interfície gràfica
+    from tkinter import ttk, messagebox, filedialog
+
+
+def _carregar_reportlab():
+#Importa reportlab la primera vegada que es genera un PDF. Retorna si la llibreria està disponible
+#El bloc try-except assegura que si la llibreria no està instal·lada, el programa segueixi funcionant
+    global REPORTLAB_AVAILABLE, A4, colors, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    global getSampleStyleSheet, Drawing, VerticalBarChart
+    if REPORTLAB_AVAILABLE is None:
+        try:
+            from reportlab.lib.pagesizes import A4
+            from reportlab.lib import colors
+            from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+            from reportlab.lib.styles import getSampleStyleSheet
+            from reportlab.graphics.shapes import Drawing
+            from reportlab.graphics.charts.barcharts import VerticalBarChart
+            REPORTLAB_AVAILABLE = True
+        except Exception:
+            REPORTLAB_AVAILABLE = False
+    return REPORTLAB_AVAILABLE
+
+#Generador aleatori
+
+#Tirades que es generen de cop i es guarden a la memòria intermèdia del generador
+MIDA_BUFFER_TIRADES = 4096
+
+
+def llavor_nova():
+#Llavor mestra aleatòria (de l'entropia del sistema) per a les execucions sense llavor; es desa amb els resultats
+    return random.SystemRandom().getrandbits(63)
+
+
+class GeneradorAleatori:
+    """
+    Generador aleatori propi del simulador, en lloc del mòdul random global.
+    Amb NumPy és un generador PCG64 creat a partir d'una SeedSequence: fills(n) dona n fluxos
+    independents (per exemple, un per procés o per bloc) i saltat(k), el mateix flux avançat
+    k·2^127 nombres (sense SeedSequence pròpia, així que no en pot derivar fills). Sense NumPy es fa
+    servir random.Random amb llavors derivades (i no es pot saltar).
+    Les tirades (0-36) es generen per blocs de MIDA_BUFFER_TIRADES i tirada() les va consumint;
+    randint fa el mateix amb una memòria intermèdia per a cada interval (a, b).
+    També té randint, integers i random perquè es pugui passar on abans s'usava random o un
+    generador de NumPy.
+    """
+    def __init__(self, llavor=None):
+        self.llavor = llavor_nova() if llavor is None else llavor
+        if NUMPY_AVAILABLE:
+            self.seq = self.llavor if isinstance(self.llavor, np.random.SeedSequence) \
+                else np.random.SeedSequence(self.llavor)
+            self.gen = np.random.Generator(np.random.PCG64(self.seq))
+        else:
+            self.gen = random.Random(self.llavor)
+        self.buffer = []
+        self.posicio = 0
+        self.buffers_randint = {}
+
+    def fills(self, n):
+#n generadors independents derivats d'aquest (sempre els mateixos per a la mateixa llavor)
+        if NUMPY_AVAILABLE:
+            if self.seq is None:
+                raise RuntimeError("Un generador saltat no pot derivar fills: els fluxos es solaparien amb els "
+                                   "del generador original. Deriveu-los del generador original")
+            return [GeneradorAleatori(ss) for ss in self.seq.spawn(n)]
+        return [GeneradorAleatori(random.Random(f"{self.llavor}-fill-{i}").getrandbits(64)) for i in range(n)]
+
+    def saltat(self, k=1):
+#Generador nou que continua el flux d'aquest com si se n'haguessin tret k·2^127 nombres (PCG64.jumped), sense
+#solapar-s'hi. Parteix de l'estat del generador de bits: les tirades que ja hi ha a la memòria intermèdia no compten.
+#No es queda la SeedSequence d'aquest generador, perquè els fills que en derivés serien els mateixos (vegeu fills)
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("Per saltar endavant el flux aleatori cal tenir NumPy instal·lat (pip install numpy)")
+        saltat = GeneradorAleatori(self.llavor)
+        saltat.seq = None
+        saltat.gen = np.random.Generator(self.gen.bit_generator.jumped(k))
+        return saltat
+
+    def tirada(self):
+#Número de la següent tirada (0-36), llegit de la memòria intermèdia
+        if self.posicio == len(self.buffer):
+            if NUMPY_AVAILABLE:
+                self.buffer = self.gen.integers(0, 37, size=MIDA_BUFFER_TIRADES).tolist()
+            else:
+                self.buffer = self.gen.choices(range(37), k=MIDA_BUFFER_TIRADES)
+            self.posicio = 0
+        self.posicio += 1
+        return self.buffer[self.posicio - 1]
+
+    def randint(self, a, b):
+#Enter aleatori entre a i b (tots dos inclosos), com random.randint. Amb NumPy es generen per blocs de
+#MIDA_BUFFER_TIRADES (una memòria intermèdia per interval, guardada al revés per treure'ls amb pop)
+        if not NUMPY_AVAILABLE:
+            return self.gen.randint(a, b)
+        buffer = self.buffers_randint.get((a, b))
+        if not buffer:
+            buffer = self.gen.integers(a, b + 1, size=MIDA_BUFFER_TIRADES).tolist()
+            buffer.reverse()
+            self.buffers_randint[(a, b)] = buffer
+        return buffer.pop()
+
+    def integers(self, baix, alt, size=None):
+#Enters entre baix (inclòs) i alt (exclòs), com Generator.integers de NumPy
+        return self.gen.integers(baix, alt, size=size)
+
+    def random(self, size=None):
+#Nombre (o array de nombres) uniforme entre 0 i 1
+        if NUMPY_AVAILABLE:
+            return self.gen.random(size)
+        return self.gen.random() if size is None else [self.gen.random() for _ in range(size)]
 
 #Classe Ruleta
 
 class Ruleta:
 
 #Classe que representa la ruleta europea, té 37 números (0–36) i s’identifica si la bola cau a vermell o no
-    def __init__(self):
-        # Conjunt dels números de color vermell (segons la ruleta europea)
-        self.vermell = {1, 3, 5, 7, 9, 12, 14, 16, 18,
-                        19, 21, 23, 25, 27, 30, 32, 34, 36}
+    # Conjunt dels números de color vermell (segons la ruleta europea)
+    VERMELL = frozenset({1, 3, 5, 7, 9, 12, 14, 16, 18,
+                         19, 21, 23, 25, 27, 30, 32, 34, 36})
+
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else GeneradorAleatori()   # Generador aleatori (per defecte, amb llavor nova)
+        self.vermell = self.VERMELL
+
+    def numero(self):
+#Simula una tirada a la ruleta i retorna el número on cau la bola (0-36)
+        return self.rng.tirada()   # Número aleatori entre 0 i 36 (de les tirades ja generades)
 
     def tirada(self):
 #Simula una tirada a la ruleta. Retorna True si surt vermell (guanya l’aposta al vermell) o False si surt negre o el 0
-        num = random.randint(0, 36)   # Genera un número aleatori entre 0 i 36
-        return num in self.vermell    # Comprova si és un número vermell
+        return self.numero() in self.vermell    # Comprova si és un número vermell
+
+#Apostes de la ruleta
+
+def _tipus_apostes():
+    """
+    Totes les apostes de la ruleta europea (nom -> números que cobreix): plens, cavalls,
+    transversals, quadres, sisenes, dotzenes, columnes i les apostes senzilles.
+    El nom dels plens és 'ple' i el número (ple17); el dels cavalls, els dos números (cavall0-3);
+    el de les transversals, quadres i sisenes, el número més petit (transversal4, quadre1, sisena31).
+    """
+    tipus = {}
+    for n in range(37):
+        tipus[f"ple{n}"] = {n}
+    for a, b in [(0, 1), (0, 2), (0, 3)]:
+        tipus[f"cavall{a}-{b}"] = {a, b}
+    for a in range(1, 37):
+        if a % 3:
+            tipus[f"cavall{a}-{a + 1}"] = {a, a + 1}
+        if a <= 33:
+            tipus[f"cavall{a}-{a + 3}"] = {a, a + 3}
+    for a in range(1, 37, 3):
+        tipus[f"transversal{a}"] = {a, a + 1, a + 2}
+        if a <= 31:
+            tipus[f"sisena{a}"] = set(range(a, a + 6))
+    for a in range(1, 33):
+        if a % 3:
+            tipus[f"quadre{a}"] = {a, a + 1, a + 3, a + 4}
+    for k in range(3):
+        tipus[f"dotzena{k + 1}"] = set(range(12 * k + 1, 12 * k + 13))
+        tipus[f"columna{k + 1}"] = set(range(k + 1, 37, 3))
+    vermell = Ruleta.VERMELL
+    tipus["vermell"] = set(vermell)
+    tipus["negre"] = set(range(1, 37)) - vermell
+    tipus["parell"] = set(range(2, 37, 2))
+    tipus["senar"] = set(range(1, 37, 2))
+    tipus["manca"] = set(range(1, 19))
+    tipus["passa"] = set(range(19, 37))
+    return tipus
+
+
+#Tipus d'aposta (nom -> números) i matriu de pagaments de 37 files (número) per tipus d'aposta (columna):
+#el resultat net d'una unitat apostada, 36 / (números coberts) - 1 si surt un número cobert i -1 si no
+TIPUS_APOSTES = _tipus_apostes()
+NOMS_APOSTES = list(TIPUS_APOSTES)
+MATRIU_PAGAMENTS = [[36 // len(nums) - 1 if n in nums else -1 for nums in TIPUS_APOSTES.values()]
+                    for n in range(37)]
+
+
+class Disposicio:
+    """
+    Conjunt d'apostes que es fan a cada tirada, amb les unitats de cada una: l'aposta que decideix
+    l'estratègia es posa 'unitats' vegades a cada tipus. Es descriu amb un text com "vermell" o
+    "2*vermell+ple0" (vermell cobert amb el zero).
+    El resultat de tota la disposició per a cada número es calcula una sola vegada multiplicant la
+    matriu de pagaments pel vector d'unitats ('guany', resultat net per unitat d'aposta de
+    l'estratègia), de manera que cada tirada es resol consultant-hi una sola posició.
+    Una tirada es considera guanyada (per a l'estratègia i per retirar-se) si el resultat net és positiu.
+    """
+    def __init__(self, text="vermell"):
+        self.apostes = {}
+        for part in text.replace(" ", "").lower().split("+"):
+            unitats, _, nom = part.rpartition("*")
+            if nom not in TIPUS_APOSTES:
+                raise ValueError(f"Aposta desconeguda: '{nom}' (per exemple: vermell, dotzena2, ple17, cavall0-3)")
+            if unitats and (not unitats.isdigit() or int(unitats) <= 0):
+                raise ValueError(f"Les unitats de l'aposta '{part}' han de ser un enter positiu")
+            self.apostes[nom] = self.apostes.get(nom, 0) + int(unitats or 1)
+        self.text = "+".join(nom if u == 1 else f"{u}*{nom}" for nom, u in self.apostes.items())
+        self.unitats = sum(self.apostes.values())     # Unitats apostades a cada tirada
+        columnes = [NOMS_APOSTES.index(nom) for nom in self.apostes]
+        self.guany = [sum(fila[c] * u for c, u in zip(columnes, self.apostes.values())) for fila in MATRIU_PAGAMENTS]
+
+    def resultats(self):
+#Resultats possibles d'una tirada (resultat net per unitat, probabilitat), del més alt al més baix
+        valors = {}
+        for g in self.guany:
+            valors[g] = valors.get(g, 0) + 1
+        return [(g, valors[g] / 37) for g in sorted(valors, reverse=True)]
+
+
+def _disposicio(disposicio):
+#Accepta una Disposicio o el seu text
+    return disposicio if isinstance(disposicio, Disposicio) else Disposicio(disposicio)
 
 #Estratègies
+
+#Aposta màxima permesa a la taula (límit per defecte de les estratègies que augmenten l'aposta)
+APOSTA_MAXIMA = 10000
+
+
+class OperacionsEscalars:
+#Les mateixes operacions de NumPy que fan servir les estratègies (where, minimum, maximum), per a valors individuals
+    where = staticmethod(lambda condicio, a, b: a if condicio else b)
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+
+
+class DefinicioEstrategia:
+    """
+    Definició d'una estratègia d'aposta. L'estat és un conjunt fix de camps enters i el
+    comportament, tres funcions pures:
+     - inicial(p): valors inicials dels camps (diccionari camp -> enter).
+     - aposta(m, estat, p): aposta de la tirada a partir de l'estat.
+     - transicio(m, estat, guanya, p, sorteig): estat següent un cop se sap si s'ha guanyat.
+    'p' són els paràmetres (base, maxim i el que afegeixi preparar(base, maxim)) i 'm' el mòdul
+    d'operacions: OperacionsEscalars per a una sola partida (Simulador) o NumPy per a moltes
+    alhora (LotPartides), on cada camp de l'estat és un array. Si l'estratègia necessita atzar,
+    'sorteig' = (baix, alt) i cada transició rep un enter aleatori d'aquest interval, generat
+    pel motor, de manera que les funcions no depenen de cap generador.
+    """
+    def __init__(self, nom, inicial, aposta, transicio, descripcio="", preparar=None, sorteig=None):
+        self.nom = nom
+        self.inicial = inicial
+        self.aposta = aposta
+        self.transicio = transicio
+        self.descripcio = descripcio
+        self.preparar = preparar
+        self.sorteig = sorteig
+
+    def parametres(self, base=1, maxim=APOSTA_MAXIMA):
+#Paràmetres de l'estratègia per a una aposta base i una aposta màxima
+        p = {"base": int(base), "maxim": int(maxim)}
+        if self.preparar is not None:
+            p.update(self.preparar(p["base"], p["maxim"]))
+        return p
+
+
+#Estratègies registrades (nom -> definició) i els seus noms, en ordre (desplegable i opció --strategy)
+REGISTRE_ESTRATEGIES = {}
+ESTRATEGIES = []
+
+
+def registrar_estrategia(nom, inicial, aposta, transicio, descripcio="", preparar=None, sorteig=None):
+#Afegeix (o substitueix) una estratègia al registre i en retorna la definició
+    REGISTRE_ESTRATEGIES[nom] = DefinicioEstrategia(nom, inicial, aposta, transicio, descripcio, preparar, sorteig)
+    if nom not in ESTRATEGIES:
+        ESTRATEGIES.append(nom)
+    return REGISTRE_ESTRATEGIES[nom]
+
+
 class Estrategia:
-#Classe base per a totes les estratègies d’aposta
-    def __init__(self, base=1):
+#Classe base per a totes les estratègies d’aposta: guarda l'estat d'una partida i hi aplica la definició
+    definicio = None                        # Cada estratègia concreta fixa la seva
+
+    def __init__(self, base=1, maxim=APOSTA_MAXIMA, definicio=None):
+        if definicio is not None:
+            self.definicio = definicio
         self.base = int(base)               # Aposta mínima inicial
-        self.aposta_actual = int(base)      # Quantitat que s’aposta en cada tirada
+        self.maxim = int(maxim)             # Aposta màxima de la taula
+        self.p = self.definicio.parametres(base, maxim)
+        self.camps = tuple(self.definicio.inicial(self.p))
+        self.rng = None                     # Generador aleatori (el simulador hi posa el seu)
+        self.reiniciar()
 
     def reiniciar(self):
-#Reinicia l’aposta a la quantitat base.
-        self.aposta_actual = int(self.base)
+#Torna l'estat als valors inicials
+        self.estat = self.definicio.inicial(self.p)
 
     def aposta(self):
 #Retorna l’import de l’aposta actual.
-        return int(self.aposta_actual)
+        return int(self.definicio.aposta(OperacionsEscalars, self.estat, self.p))
 
     def resultat(self, guanya):
-#Actualitza el valor de l’aposta després de conèixer el resultat
-        self.aposta_actual = int(self.base)
+#Actualitza l'estat (i per tant la següent aposta) després de conèixer el resultat. Les estratègies amb sorteig fan
+#servir el generador que se'ls ha assignat (el del Simulador), perquè la partida es pugui repetir amb la seva llavor
+        if self.definicio.sorteig and self.rng is None:
+            raise ValueError(f"L'estratègia '{self.definicio.nom}' fa un sorteig: cal assignar-li un generador (rng)")
+        sorteig = self.rng.randint(*self.definicio.sorteig) if self.definicio.sorteig else None
+        self.estat = self.definicio.transicio(OperacionsEscalars, self.estat, guanya, self.p, sorteig)
 
 #Estratègies concretes
 
+def _inici_base(p):
+#Estat inicial de les estratègies que només recorden l'aposta actual
+    return {"aposta": p["base"]}
+
+
+def _aposta_actual(m, estat, p):
+    return estat["aposta"]
+
+
+def _transicio_martingala(m, estat, guanya, p, sorteig):
+    # Es limita l’aposta al màxim de la taula (per defecte, 10.000)
+    return {"aposta": m.where(guanya, p["base"], m.minimum(estat["aposta"] * 2, p["maxim"]))}
+
+
 class Martingala(Estrategia):
 #Estratègia Martingala: Si es perd, es dobla l’aposta, si es guanya, es torna a l’aposta base
+    definicio = registrar_estrategia(
+        "Martingala", _inici_base, _aposta_actual, _transicio_martingala,
+        "L’estratègia Martingala consisteix en doblar l'aposta en cas de pèrdua i tornar a apostar la mateixa unitat en cas de guany.")
 
-    def resultat(self, guanya):
-        if guanya:
-            self.aposta_actual = self.base
-        else:
-            # Es limita l’aposta màxima a 10.000
-            self.aposta_actual = min(self.aposta_actual * 2, 10000)
+
+def _apostes_fibonacci(base, maxim):
+#Apostes de la seqüència de Fibonacci per a cada índex, fins que arriben al màxim (a partir d'aquí, sempre el màxim)
+    seq = [1, 1]
+    while seq[-1] * base < maxim:
+        seq.append(seq[-1] + seq[-2])
+    return {"apostes": [min(v * base, maxim) for v in seq]}
+
+
+def _aposta_fibonacci(m, estat, p):
+    return p["apostes"][m.minimum(estat["index"], len(p["apostes"]) - 1)]
+
+
+def _transicio_fibonacci(m, estat, guanya, p, sorteig):
+    # Si es guanya es retrocedeix dues posicions a la seqüència; si es perd, s'avança una
+    return {"index": m.where(guanya, m.maximum(0, estat["index"] - 2), estat["index"] + 1)}
 
 
 class Fibonacci(Estrategia):
 #Estratègia Fibonacci: Es segueix la seqüència de Fibonacci per calcular la següent aposta
-    def __init__(self, base=1):
-        super().__init__(base)
-        self.seq = [1, 1]
-        self.index = 0
+    definicio = registrar_estrategia(
+        "Fibonacci", lambda p: {"index": 0}, _aposta_fibonacci, _transicio_fibonacci,
+        "L'estratègia Fibonacci segueix la seqüència matemàtica per ajustar l'aposta en funció dels resultats.",
+        preparar=_apostes_fibonacci)
 
-    def reiniciar(self):
-#Reinicia la seqüència al començament
-        self.seq = [1, 1]
-        self.index = 0
-        self.aposta_actual = self.base
 
-    def aposta(self):
-#Determina l’aposta actual segons la seqüència
-        if self.index >= len(self.seq):
-            self.seq.append(self.seq[-1] + self.seq[-2])
-        return int(min(self.seq[self.index] * self.base, 10000))
-
-    def resultat(self, guanya):
-#Actualitza la posició dins la seqüència segons el resultat
-        if guanya:
-            self.index = max(0, self.index - 2)
-        else:
-            self.index += 1
-            if self.index >= len(self.seq):
-                self.seq.append(self.seq[-1] + self.seq[-2])
-        self.aposta_actual = int(min(self.seq[self.index] * self.base, 10000))
+def _transicio_dalembert(m, estat, guanya, p, sorteig):
+    ap = estat["aposta"]
+    return {"aposta": m.where(guanya, m.maximum(p["base"], ap - 1), m.minimum(ap + 1, p["maxim"]))}
 
 
 class DAlembert(Estrategia):
 #Estratègia d’Alembert: després d’una pèrdua, augmenta l’aposta en 1, després d’un guany, la redueix en 1 (fins al mínim base).
-
-    def resultat(self, guanya):
-        if guanya:
-            self.aposta_actual = max(self.base, self.aposta_actual - 1)
-        else:
-            self.aposta_actual = min(self.aposta_actual + 1, 10000)
+    definicio = registrar_estrategia(
+        "Estratègia d'Alembert", _inici_base, _aposta_actual, _transicio_dalembert,
+        "Augmenta una unitat després d'una pèrdua i redueix una després d'un guany.")
 
 
 class ApostaFixa(Estrategia):
-#Estratègia d’aposta constant: sempre aposta la mateixa quantitat, 1
-    def resultat(self, guanya):
-        self.aposta_actual = self.base
+#Estratègia d’aposta constant: sempre aposta la mateixa quantitat (la base), no necessita cap estat
+    definicio = registrar_estrategia(
+        "Sempre el mateix valor", lambda p: {}, lambda m, estat, p: p["base"],
+        lambda m, estat, guanya, p, sorteig: {},
+        "Aposta fixa: la mateixa quantitat a cada tirada.")
 
 
 class ApostaAleatoria(Estrategia):
 #Estratègia d’aposta aleatòria: aposta entre 1 i 10 de manera aleatòria
-    def resultat(self, guanya):
-        self.aposta_actual = random.randint(1, 10)
+    definicio = registrar_estrategia(
+        "Valor aleatori", _inici_base, _aposta_actual, lambda m, estat, guanya, p, sorteig: {"aposta": sorteig},
+        "Apostes en una quantitat aleatòria entre 1 i 10 que varien en cada tirada.", sorteig=(1, 10))
+
+
+def crear_estrategia(nom, base=1, maxim=APOSTA_MAXIMA):
+#Crea una instància de l’estratègia registrada amb aquest nom, amb l'aposta base i l'aposta màxima de la taula
+    if nom not in REGISTRE_ESTRATEGIES:
+        raise ValueError(f"Estratègia desconeguda: {nom}")
+    return Estrategia(base, maxim, REGISTRE_ESTRATEGIES[nom])
+
+
+def descripcio_estrategia(nom):
+#Text descriptiu de cada estratègia per mostrar a la interfície
+    definicio = REGISTRE_ESTRATEGIES.get(nom)
+    return definicio.descripcio if definicio else ""
+
+#Estratègies externes (mòduls de plugins)
+
+#Mòduls de plugins ja carregats (els processos treballadors els tornen a carregar en començar)
+PLUGINS = []
+
+
+def carregar_plugins(moduls):
+    """
+    Carrega mòduls d'estratègies externes, donats com a camí a un fitxer .py o nom de mòdul.
+    Cada mòdul ha de definir una funció registrar(registrar_estrategia) que cridi la funció que
+    rep una vegada per estratègia, amb els mateixos arguments que registrar_estrategia, per exemple:
+        def registrar(registrar_estrategia):
+            registrar_estrategia("Paroli", lambda p: {"aposta": p["base"]}, lambda m, e, p: e["aposta"],
+                                 lambda m, e, guanya, p, s: {"aposta": m.where(guanya, e["aposta"] * 2, p["base"])})
+    """
+    import importlib
+    import importlib.util
+    for modul in moduls:
+        if modul in PLUGINS:
+            continue
+        if modul.endswith(".py"):
+            nom = "ruleta_plugin_" + hashlib.sha256(os.path.abspath(modul).encode("utf-8")).hexdigest()[:12]
+            espec = importlib.util.spec_from_file_location(nom, modul)
+            codi = importlib.util.module_from_spec(espec)
+            espec.loader.exec_module(codi)
+        else:
+            codi = importlib.import_module(modul)
+        codi.registrar(registrar_estrategia)
+        PLUGINS.append(modul)
+
+
+def _grup_processos(processos, aturar=None):
+#Grup de processos treballadors que, en començar, carreguen els mateixos plugins que aquest procés i es guarden el
+#senyal d'aturada 'aturar' (un multiprocessing.Event), que consulten els blocs en curs (vegeu _simular_bloc_treballador)
+    return ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_treballador,
+                               initargs=(list(PLUGINS), aturar))
+
+
+#Senyal d'aturada dels blocs que s'executen en aquest procés treballador (vegeu _iniciar_treballador)
+_aturar_treballador = None
+
+
+def _iniciar_treballador(plugins, aturar=None):
+#Inicialitza un procés treballador del grup de processos
+    global _aturar_treballador
+    _aturar_treballador = aturar
+    carregar_plugins(plugins)
+
+
+def _nombre_processos(processos):
+#Nombre de processos treballadors (per defecte, tots els nuclis). Amb spawn o forkserver cada treballador torna a
+#importar aquest mòdul pel nom; si no es pot (carregat des del camí del fitxer), es fa servir un sol procés
+    import importlib.machinery
+    processos = processos or os.cpu_count() or 1
+    if (processos > 1 and multiprocessing.get_start_method() != "fork" and __name__ != "__main__"
+            and "." not in __name__ and importlib.machinery.PathFinder.find_spec(__name__) is None):
+        return 1
+    return processos
+
+#Estats que pot tenir com a molt la taula de transicions d'una partida (si en té més, es buida abans de la següent)
+MIDA_MAXIMA_TAULA = 100000
+
+
+class TaulaEstrategia:
+    """
+    Taula de transicions d'una estratègia per al motor escalar (Simulador.jugar). Cada estat (tupla
+    dels valors dels camps, vegeu _estat) té un índex; per a cada índex es guarden l'aposta i
+    l'índex de l'estat següent per a cada resultat (guanya o no) i valor del sorteig, o -1 si
+    encara no s'ha calculat. La taula s'omple a mesura que les partides arriben a estats nous, amb
+    les funcions de la definició de l'estratègia, de manera que després una tirada només consulta
+    llistes. Com que les funcions són pures, el resultat és el mateix que aplicar-les a cada tirada.
+    """
+    def __init__(self, estr):
+        self.estr = estr
+        self.baix, alt = estr.definicio.sorteig or (0, 0)
+        self.sortejos = alt - self.baix + 1        # Valors possibles del sorteig (1 si no n'hi ha)
+        self.buidar()
+
+    def buidar(self):
+#Oblida tots els estats (menys l'inicial, que sempre té l'índex 0)
+        self.estats, self.indexs, self.apostes, self.destins = [], {}, [], []
+        self.estr.reiniciar()
+        self.index(_estat(self.estr))
+
+    def index(self, estat):
+#Índex de l'estat, que s'afegeix a la taula (amb la seva aposta) si és nou
+        i = self.indexs.get(estat)
+        if i is None:
+            i = self.indexs[estat] = len(self.estats)
+            self.estats.append(estat)
+            _posar_estat(self.estr, estat)
+            self.apostes.append(self.estr.aposta())
+            self.destins.append([-1] * (2 * self.sortejos))
+        return i
+
+    def seguent(self, i, guanya, sorteig=None):
+#Calcula i guarda l'índex de l'estat següent a l'estat i segons el resultat (i el sorteig)
+        estr = self.estr
+        _posar_estat(estr, self.estats[i])
+        estr.estat = estr.definicio.transicio(OperacionsEscalars, estr.estat, guanya, estr.p, sorteig)
+        j = self.index(_estat(estr))
+        self.destins[i][guanya * self.sortejos + (0 if sorteig is None else sorteig - self.baix)] = j
+        return j
 
 #Simulador de partides
 class Simulador:
 #Classe que gestiona la simulació completa d’una estratègia durant un nombre determinat de rondes.
-    def __init__(self, estrategia_obj, rondes):
+#Amb 'capital' el jugador comença amb aquests diners i s'arruïna quan no pot cobrir la següent aposta;
+#amb 'objectiu' es planta quan el balanç arriba a aquest guany. 'disposicio' són les apostes de cada tirada.
+#La caiguda màxima del balanç només es calcula amb capital o objectiu (sense, queda a 0)
+    def __init__(self, estrategia_obj, rondes, rng=None, capital=None, objectiu=None, disposicio="vermell"):
         self.estr = estrategia_obj       # Estratègia utilitzada
         self.rondes = int(rondes)        # Nombre de tirades a executar
+        self.disposicio = _disposicio(disposicio)   # Apostes de cada tirada (per defecte, al vermell)
+        self.rng = rng if rng is not None else GeneradorAleatori()   # Generador aleatori (None = llavor nova)
+        self.capital = capital           # Capital inicial (None = crèdit il·limitat)
+        self.objectiu = objectiu         # Guany amb què el jugador es planta (None = cap)
+        self.caiguda_maxima = 0          # Caiguda màxima del balanç de l'última partida (amb capital o objectiu)
+        self.arruinat = False            # Si l'última partida ha acabat en ruïna
+        self.estr.rng = self.rng
+        self.taula = TaulaEstrategia(self.estr)   # Apostes i transicions de l'estratègia (es reaprofita)
 
     def jugar(self, retirar=True):
 #Simula una partida amb l’estratègia donada.
-        self.estr.reiniciar()
-        saldo = 0
-        ruleta = Ruleta()
-        tirades_realitzades = 0
-        total_apostat = 0
-
-        # Bucle de tirades
+#L'estratègia avança per la seva taula de transicions (TaulaEstrategia) i els valors de cada tirada es guarden en
+#variables locals: el bucle no crida els mètodes de l'estratègia ni de la ruleta. Sense capital ni objectiu es
+#fa servir un bucle que només porta el balanç, sense la caiguda màxima ni les comprovacions de capital
+        if len(self.taula.estats) > MIDA_MAXIMA_TAULA:
+            self.taula.buidar()
+        taula = self.taula
+        apostes, destins = taula.apostes, taula.destins
+        tirada = self.rng.tirada         # Número de la tirada (0-36), de les tirades ja generades
+        guany, unitats = self.disposicio.guany, self.disposicio.unitats
+        capital, objectiu = self.capital, self.objectiu
+        sorteig = self.estr.definicio.sorteig
+        randint, sortejos, baix = self.rng.randint, taula.sortejos, taula.baix
+        estat = 0                        # Índex de l'estat de l'estratègia a la taula (0 = inicial)
+        saldo = total_apostat = tirades_realitzades = 0
+        pic = caiguda = 0                # Balanç més alt fins ara i caiguda màxima respecte d'aquest
+        self.caiguda_maxima = 0
+        self.arruinat = capital is not None and apostes[0] * unitats > capital
+        if self.arruinat:
+            return 0, 0, 0
+
+        if capital is None and objectiu is None:
+            # Bucle de tirades amb crèdit il·limitat
+            for i in range(1, self.rondes + 1):
+                tirades_realitzades = i
+                aposta = apostes[estat]
+                total_apostat += aposta
+                canvi = aposta * guany[tirada()]
+                saldo += canvi
+                guanya = canvi > 0
+                if sorteig:
+                    s = randint(*sorteig)
+                    seguent = destins[estat][guanya * sortejos + s - baix]
+                    estat = seguent if seguent >= 0 else taula.seguent(estat, guanya, s)
+                else:
+                    seguent = destins[estat][guanya]
+                    estat = seguent if seguent >= 0 else taula.seguent(estat, guanya)
+                if guanya and retirar:
+                    break
+            _posar_estat(self.estr, taula.estats[estat])
+            return tirades_realitzades, saldo, total_apostat * unitats
+
+        # Bucle de tirades amb capital o objectiu
         for i in range(1, self.rondes + 1):
             tirades_realitzades = i
-            aposta = self.estr.aposta()
+            aposta = apostes[estat]
             total_apostat += aposta
-            guanya = ruleta.tirada()
 
-            # Actualització del balanç
-            if guanya:
-                saldo += aposta
+            # Actualització del balanç amb el resultat de totes les apostes per al número que surt
+            canvi = aposta * guany[tirada()]
+            saldo += canvi
+            guanya = canvi > 0
+
+            if saldo > pic:
+                pic = saldo
+            elif pic - saldo > caiguda:
+                caiguda = pic - saldo
+
+            # Estat següent de l'estratègia (es calcula el primer cop que s'hi arriba)
+            if sorteig:
+                s = randint(*sorteig)
+                seguent = destins[estat][guanya * sortejos + s - baix]
+                estat = seguent if seguent >= 0 else taula.seguent(estat, guanya, s)
             else:
-                saldo -= aposta
-
-            self.estr.resultat(guanya)
+                seguent = destins[estat][guanya]
+                estat = seguent if seguent >= 0 else taula.seguent(estat, guanya)
 
             # Si s’ha activat "retirar" i es guanya, s’acaba la simulació
             if guanya and retirar:
                 break
+            # Amb objectiu, el jugador es planta en arribar-hi
+            if objectiu is not None and saldo >= objectiu:
+                break
+            # Amb capital finit, si no es pot cobrir la següent aposta el jugador s'ha arruïnat
+            if capital is not None and i < self.rondes and apostes[estat] * unitats > capital + saldo:
+                self.arruinat = True
+                break
 
-        return tirades_realitzades, saldo, total_apostat
+        self.caiguda_maxima = caiguda
+        _posar_estat(self.estr, taula.estats[estat])
+        return tirades_realitzades, saldo, total_apostat * unitats
+
+#Motor vectoritzat (NumPy)
+
+class LotPartides:
+    """
+    Estat de n partides d'una estratègia que avancen juntes, tirada a tirada, amb arrays.
+    Cada crida a pas() resol una tirada per a les partides que encara juguen (amb "retirar",
+    les que encara no han guanyat) a partir dels números que rep, de manera que diverses
+    estratègies poden jugar amb les mateixes tirades. El resultat de totes les apostes de la
+    disposició es llegeix del vector 'guany' (una posició per número). L'estat de l'estratègia és un array per
+    camp de la seva definició, i l'aposta i la transició són les mateixes funcions pures que fa
+    servir Simulador, aplicades amb NumPy a totes les partides alhora.
+    Amb 'capital' i 'objectiu' (vegeu Simulador) també deixen de jugar les partides arruïnades
+    i les que arriben a l'objectiu. En aquest cas, de cada partida es guarda també la caiguda màxima
+    del balanç respecte el seu màxim (només dos enters per partida; sense capital ni objectiu
+    queda a 0, com a Simulador) i si ha acabat en ruïna.
+    """
+    def __init__(self, nom, rondes, n, retirar, rng, base=1, maxim=APOSTA_MAXIMA, capital=None, objectiu=None,
+                 disposicio="vermell"):
+        estr = crear_estrategia(nom, base, maxim)
+        disposicio = _disposicio(disposicio)
+        self.guany = np.array(disposicio.guany, dtype=np.int64)
+        self.unitats = disposicio.unitats
+        self.definicio = estr.definicio
+        #Les taules dels paràmetres (llistes) es converteixen en arrays per poder-les indexar amb arrays
+        self.p = {k: np.array(v, dtype=np.int64) if isinstance(v, list) else v for k, v in estr.p.items()}
+        self.rondes = int(rondes)
+        self.retirar = retirar
+        self.capital = capital
+        self.objectiu = objectiu
+        self.rng = rng                   # Només per als sortejos de les estratègies aleatòries
+        self.tirades = np.zeros(n, dtype=np.int64)
+        self.saldo = np.zeros(n, dtype=np.int64)
+        self.total_apostat = np.zeros(n, dtype=np.int64)
+        self.estat = {c: np.full(n, v, dtype=np.int64) for c, v in estr.estat.items()}
+        self.pic = np.zeros(n, dtype=np.int64)
+        self.caiguda = np.zeros(n, dtype=np.int64)
+        self.arruinada = np.zeros(n, dtype=bool)
+        #Partides que encara juguen (s'eliminen en retirar-se, arruïnar-se o arribar a l'objectiu)
+        self.amb_capital = capital is not None or objectiu is not None
+        self.filtrar = retirar or self.amb_capital
+        self.actives = np.arange(n)
+        if capital is not None:
+            #Si ni tan sols es pot cobrir la primera aposta, la partida s'arruïna sense jugar
+            ruina = self._apostes(self.estat, n) * self.unitats > capital
+            self.arruinada[ruina] = True
+            self.actives = self.actives[~ruina]
+
+    @property
+    def acabat(self):
+        return self.filtrar and self.actives.size == 0
+
+    def _apostes(self, estat, n):
+#Aposta de n partides amb l'estat donat (un array per camp); les estratègies sense estat en donen una de sola
+        return np.broadcast_to(self.definicio.aposta(np, estat, self.p), (n,))
+
+    def pas(self, i, numeros):
+#Juga la tirada i amb els números que han sortit (un per partida activa)
+        sel = self.actives if self.filtrar else slice(None)
+        estat = {c: v[sel] for c, v in self.estat.items()}
+        ap = self._apostes(estat, len(numeros))
+        canvi = ap * self.guany[numeros]
+        guanya = canvi > 0
+
+        self.tirades[sel] = i
+        self.total_apostat[sel] += ap * self.unitats
+        saldo = self.saldo[sel] + canvi
+        self.saldo[sel] = saldo
+        if self.amb_capital:
+            self.pic[sel] = pic = np.maximum(self.pic[sel], saldo)
+            self.caiguda[sel] = np.maximum(self.caiguda[sel], pic - saldo)
+
+        #Transició de l'estratègia segons el resultat
+        sorteig = None
+        if self.definicio.sorteig:
+            baix, alt = self.definicio.sorteig
+            sorteig = self.rng.integers(baix, alt + 1, size=len(guanya))
+        estat = self.definicio.transicio(np, estat, guanya, self.p, sorteig)
+        for c, v in estat.items():
+            self.estat[c][sel] = v
+
+        if self.filtrar:
+            atura = guanya if self.retirar else np.zeros(len(guanya), dtype=bool)
+            if self.objectiu is not None:
+                atura = atura | (saldo >= self.objectiu)
+            if self.capital is not None and i < self.rondes:
+                #Ruïna: amb el que queda no es pot cobrir la següent aposta
+                ruina = ~atura & (self._apostes(estat, len(guanya)) * self.unitats > self.capital + saldo)
+                self.arruinada[self.actives[ruina]] = True
+                atura = atura | ruina
+            self.actives = self.actives[~atura]
+
+
+def simular_lot(nom, rondes, n, retirar=True, rng=None, base=1, maxim=APOSTA_MAXIMA, capital=None, objectiu=None,
+                disposicio="vermell", aturar=None):
+    """
+    Simula n partides de l'estratègia 'nom' (amb aposta base i màxima donades) alhora,
+    equivalent a cridar n vegades Simulador.jugar (amb el mateix 'capital', 'objectiu' i 'disposicio').
+    Cada tirada es resol per a totes les partides actives amb una sola crida al generador i
+    l'estat de cada estratègia s'actualitza amb operacions sobre arrays (LotPartides).
+    Retorna cinc arrays de longitud n: tirades, saldo, total_apostat, caiguda màxima (0 sense
+    capital ni objectiu) i ruïna. Si 'aturar' (Event) s'activa, s'interromp i retorna None.
+    """
+    rng = rng if rng is not None else GeneradorAleatori()
+    lot = LotPartides(nom, rondes, n, retirar, rng, base, maxim, capital, objectiu, disposicio)
+    for i in range(1, int(rondes) + 1):
+        if lot.acabat:
+            break
+        if aturar is not None and i % 100 == 0 and aturar.is_set():
+            return None
+        lot.pas(i, rng.integers(0, 37, size=lot.actives.size))
+    return lot.tirades, lot.saldo, lot.total_apostat, lot.caiguda, lot.arruinada
+
+#Càlcul exacte amb retirada al primer guany (sense simulació)
+
+def distribucio_retirar(nom, R, base=1, maxim=APOSTA_MAXIMA, disposicio="vermell"):
+    """
+    Distribució exacta de (tirades, saldo, total_apostat) quan el jugador es retira al primer guany.
+    El resultat només depèn del nombre k de pèrdues abans del primer guany (geomètric amb
+    p = probabilitat de guanyar, 18/37 al vermell, truncat a R), i per a les estratègies
+    deterministes la seqüència d'apostes en perdre és sempre la mateixa, de manera que n'hi ha
+    prou amb recórrer-la una vegada (O(R)).
+    Retorna una llista de (probabilitat, tirades, saldo, total_apostat), o None per a l'estratègia
+    aleatòria i per a les disposicions amb més d'un resultat guanyador o perdedor possible.
+    """
+    estr = crear_estrategia(nom, base, maxim)
+    disposicio = _disposicio(disposicio)
+    resultats = disposicio.resultats()
+    if estr.definicio.sorteig or len(resultats) != 2 or resultats[0][0] <= 0 or resultats[1][0] > 0:
+        return None
+    (guany, p_guanyar), (perdua, p_perdre) = resultats
+    unitats = disposicio.unitats
+    estr.reiniciar()
+
+    distribucio = []
+    apostat = 0            # Total apostat en les k pèrdues anteriors (en apostes de l'estratègia)
+    p_perdre_k = 1.0       # Probabilitat de perdre les k primeres tirades
+    for k in range(R):
+        aposta = estr.aposta()
+        #Guany a la tirada k+1 després de k pèrdues
+        distribucio.append((p_perdre_k * p_guanyar, k + 1, guany * aposta + perdua * apostat,
+                            unitats * (apostat + aposta)))
+        apostat += aposta
+        p_perdre_k *= p_perdre
+        estr.resultat(False)
+    #Es perden totes les R tirades
+    distribucio.append((p_perdre_k, R, perdua * apostat, unitats * apostat))
+    return distribucio
+
+
+def esperanca_exacta_retirar(nom, R, base=1, maxim=APOSTA_MAXIMA, disposicio="vermell"):
+#Esperança exacta (saldo esperat / aposta esperada) i moments del saldo amb retirada, o None si no es pot calcular
+    distribucio = distribucio_retirar(nom, R, base, maxim, disposicio)
+    if distribucio is None:
+        return None
+    saldo = sum(p * b for p, _, b, _ in distribucio)
+    apostat = sum(p * a for p, _, _, a in distribucio)
+    tirades = sum(p * t for p, t, _, _ in distribucio)
+    variancia = sum(p * (b - saldo) ** 2 for p, _, b, _ in distribucio)
+    return {
+        "esperanca": saldo / apostat if apostat else 0,
+        "saldo": saldo, "variancia": variancia,
+        "total_apostat": apostat, "tirades": tirades,
+    }
 
-#Altres funcions
+#Càlcul exacte jugant totes les tirades (programació dinàmica)
+
+def _estat(estr):
+#Estat d'una estratègia com a tupla dels valors dels seus camps (clau de diccionari)
+    return tuple(estr.estat[c] for c in estr.camps)
+
+
+def _posar_estat(estr, estat):
+#Situa l'estratègia en un estat concret per poder consultar-ne l'aposta i les transicions
+    estr.estat = dict(zip(estr.camps, estat))
+
+
+def _taula_transicions(nom, R, base=1, maxim=APOSTA_MAXIMA, disposicio="vermell"):
+    """
+    Recorre tots els estats de l'estratègia abastables en R tirades (per capes) i en retorna la
+    llista de transicions (origen, destí, probabilitat, canvi de saldo), l'aposta de cada estat i
+    el nombre d'estats. L'estat inicial és el 0. Les transicions es calculen amb la mateixa
+    definició d'estratègia que fa servir el simulador; si l'estratègia fa un sorteig, cada valor
+    possible és una transició amb la mateixa probabilitat. Cada resultat diferent de la
+    disposició d'apostes (vegeu Disposicio.resultats) és una transició. També retorna, per a cada tirada, quantes
+    transicions surten dels estats abastables fins aleshores (són sempre les primeres de la llista).
+    """
+    estr = crear_estrategia(nom, base, maxim)
+    estr.reiniciar()
+    resultats = _disposicio(disposicio).resultats()
+    #Valors possibles del sorteig de l'estratègia (tots amb la mateixa probabilitat), o cap
+    sortejos = [(1.0, None)]
+    if estr.definicio.sorteig:
+        baix, alt = estr.definicio.sorteig
+        sortejos = [(1 / (alt - baix + 1), v) for v in range(baix, alt + 1)]
+    indexs = {_estat(estr): 0}
+    apostes = []
+    transicions = []
+    limits = []
+    capa = [_estat(estr)]
+    for _ in range(R):
+        seguent = []
+        for estat in capa:
+            _posar_estat(estr, estat)
+            aposta = estr.aposta()
+            apostes.append(aposta)
+            for guanya, p, canvi in [(g > 0, p_g, g * aposta) for g, p_g in resultats]:
+                destins = []
+                for p_desti, sorteig in sortejos:
+                    _posar_estat(estr, estat)
+                    estr.estat = estr.definicio.transicio(OperacionsEscalars, estr.estat, guanya, estr.p, sorteig)
+                    destins.append((p_desti, _estat(estr)))
+                for p_desti, desti in destins:
+                    if desti not in indexs:
+                        indexs[desti] = len(indexs)
+                        seguent.append(desti)
+                    transicions.append((indexs[estat], indexs[desti], p * p_desti, canvi))
+        limits.append(len(transicions))
+        capa = seguent
+    #Els estats de l'última capa no es juguen, però cal conèixer-ne l'aposta
+    for estat in capa:
+        _posar_estat(estr, estat)
+        apostes.append(estr.aposta())
+    return transicions, apostes, len(indexs), limits
+
+
+def avaluar_no_retirar(nom, R, base=1, maxim=APOSTA_MAXIMA, disposicio="vermell"):
+    """
+    Esperança, saldo mitjà i variància exactes quan es juguen totes les R tirades, sense simular.
+    Es propaguen, tirada a tirada, la probabilitat de cada estat de l'estratègia i els moments
+    del saldo condicionats a l'estat (E[saldo·1_estat] i E[saldo²·1_estat]), de manera que el cost
+    és O(R · estats) i no depèn del rang de saldos possibles. Com que es recorren totes les
+    tirades, també es retorna l'esperança per a cada r = 1..R ('esperanca_per_R').
+    Sense NumPy es fa el mateix càlcul amb llistes (vegeu _moments_no_retirar_escalar), més lent.
+    """
+    disposicio = _disposicio(disposicio)
+    transicions, apostes, n_estats, limits = _taula_transicions(nom, R, base, maxim, disposicio)
+    if not NUMPY_AVAILABLE:
+        return _moments_no_retirar_escalar(transicions, [a * disposicio.unitats for a in apostes], n_estats, limits)
+    origen, desti, prob, canvi = (np.array(c) for c in zip(*transicions))
+    apostes = np.array(apostes, dtype=float) * disposicio.unitats
+
+    m0 = np.zeros(n_estats)     # Probabilitat de cada estat
+    m1 = np.zeros(n_estats)     # E[saldo · 1_estat]
+    m2 = np.zeros(n_estats)     # E[saldo² · 1_estat]
+    m0[0] = 1.0
+    apostat = 0.0
+    esperanca_per_R = []
+    for r in range(R):
+        apostat += float(m0 @ apostes)
+        #Només les transicions dels estats abastables en r tirades
+        o, d, p, c = origen[:limits[r]], desti[:limits[r]], prob[:limits[r]], canvi[:limits[r]]
+        a0, a1, a2 = m0[o], m1[o], m2[o]
+        m0 = np.bincount(d, p * a0, n_estats)
+        m1 = np.bincount(d, p * (a1 + c * a0), n_estats)
+        m2 = np.bincount(d, p * (a2 + 2 * c * a1 + c ** 2 * a0), n_estats)
+        esperanca_per_R.append(m1.sum() / apostat)
+
+    saldo = float(m1.sum())
+    return {
+        "esperanca": saldo / apostat, "saldo": saldo,
+        "variancia": float(m2.sum()) - saldo ** 2,
+        "total_apostat": apostat, "esperanca_per_R": esperanca_per_R,
+    }
 
-def crear_estrategia(nom):
-#Crea una instància de l’estratègia seleccionada
-    if nom == "Martingala": return Martingala()
-    if nom == "Fibonacci": return Fibonacci()
-    if nom == "Estratègia d'Alembert": return DAlembert()
-    if nom == "Sempre el mateix valor": return ApostaFixa()
-    return ApostaAleatoria()
 
+def _moments_no_retirar_escalar(transicions, apostes, n_estats, limits):
+#Mateixa propagació de moments que avaluar_no_retirar, transició a transició amb llistes de Python (sense NumPy)
+    m0, m1, m2 = [0.0] * n_estats, [0.0] * n_estats, [0.0] * n_estats
+    m0[0] = 1.0
+    apostat = 0.0
+    esperanca_per_R = []
+    for limit in limits:
+        apostat += sum(p * a for p, a in zip(m0, apostes))
+        n0, n1, n2 = [0.0] * n_estats, [0.0] * n_estats, [0.0] * n_estats
+        for o, d, p, c in transicions[:limit]:
+            n0[d] += p * m0[o]
+            n1[d] += p * (m1[o] + c * m0[o])
+            n2[d] += p * (m2[o] + 2 * c * m1[o] + c ** 2 * m0[o])
+        m0, m1, m2 = n0, n1, n2
+        esperanca_per_R.append(sum(m1) / apostat)
+
+    saldo = sum(m1)
+    return {
+        "esperanca": saldo / apostat, "saldo": saldo,
+        "variancia": sum(m2) - saldo ** 2,
+        "total_apostat": apostat, "esperanca_per_R": esperanca_per_R,
+    }
 
-def descripcio_estrategia(nom):
-#Text descriptiu de cada estratègia per mostrar a la interfície
-    textos = {
-        "Martingala": "L’estratègia Martingala consisteix en doblar l'aposta en cas de pèrdua i tornar a apostar la mateixa unitat en cas de guany.",
-        "Fibonacci": "L'estratègia Fibonacci segueix la seqüència matemàtica per ajustar l'aposta en funció dels resultats.",
-        "Estratègia d'Alembert": "Augmenta una unitat després d'una pèrdua i redueix una després d'un guany.",
-        "Sempre el mateix valor": "Aposta fixa: la mateixa quantitat a cada tirada.",
-        "Valor aleatori": "Apostes en una quantitat aleatòria entre 1 i 10 que varien en cada tirada."
+
+def afegir_exacta_no(dades):
+#Afegeix als resultats (de executar_simulacions o carregar_resultats) l'esperança exacta sense retirar-se.
+#No es calcula per defecte perquè, amb estratègies com Fibonacci, el cost creix amb R² (segons amb R = 10000)
+    if dades["capital"] is None and dades["objectiu"] is None:
+        dades["exacta_no"] = avaluar_no_retirar(dades["estr"], dades["R"], dades["base"], dades["maxim"],
+                                                dades["disposicio"])
+    return dades
+
+
+#Error màxim del saldo final esperat (i de la probabilitat d'acabar perdent) de distribucio_no_retirar des de la
+#línia d'ordres
+TOLERANCIA_DISTRIBUCIO = 1e-6
+
+
+def _agrupar_saldos(parts):
+#Uneix parts (saldos ordenats, probabilitats) i suma les probabilitats de cada saldo; retorna els saldos ordenats i
+#sense repetir. L'ordenació estable (timsort) fusiona les parts, que ja són ordenades, en temps lineal
+    if len(parts) == 1:
+        return parts[0]
+    saldos = np.concatenate([s for s, _ in parts])
+    ordre = np.argsort(saldos, kind="stable")
+    saldos, probabilitats = saldos[ordre], np.concatenate([p for _, p in parts])[ordre]
+    inicis = np.flatnonzero(np.concatenate(([True], saldos[1:] != saldos[:-1])))
+    return saldos[inicis], np.add.reduceat(probabilitats, inicis)
+
+
+def _descartar_combinacions(actual, pressupost, tirades_restants, canvi_maxim):
+#Treu d'actual (estat -> (saldos, probabilitats)) les combinacions de pes p·(1 + |saldo| + tirades_restants·canvi_maxim)
+#més petit, mentre la suma dels pesos descartats no superi el pressupost. Els pesos s'agrupen per potències de 2,
+#en temps lineal. Retorna la suma dels pesos descartats
+    pesos = {d: q * (1 + np.abs(s) + tirades_restants * canvi_maxim) for d, (s, q) in actual.items()}
+    exponents = {d: np.frexp(w)[1] for d, w in pesos.items()}
+    minim = min(int(e.min()) for e in exponents.values())
+    per_exponent = np.cumsum(np.bincount(np.concatenate(list(exponents.values())) - minim,
+                                         np.concatenate(list(pesos.values()))))
+    n = int(np.searchsorted(per_exponent, pressupost, side="right"))
+    if n == 0:
+        return 0.0
+    for d, e in exponents.items():
+        conservar = e >= minim + n
+        if conservar.all():
+            continue
+        saldos, probabilitats = actual.pop(d)
+        if conservar.any():
+            actual[d] = (saldos[conservar], probabilitats[conservar])
+    return float(per_exponent[n - 1])
+
+
+def distribucio_no_retirar(nom, R, tolerancia=0.0, base=1, maxim=APOSTA_MAXIMA, disposicio="vermell"):
+    """
+    Distribució del saldo final jugant totes les R tirades, propagant tirada a tirada la
+    probabilitat conjunta (estat de l'estratègia, saldo). Per a cada estat es guarden dos arrays de
+    NumPy: els saldos possibles (ordenats i sense repetir) i la seva probabilitat. Cada transició
+    desplaça els saldos de l'estat d'origen, i les probabilitats que arriben a un mateix estat s'agrupen
+    per saldo. El cost creix amb el nombre de combinacions (estat, saldo) abastables, no amb el rang de
+    saldos; amb tolerancia=0 el resultat és exacte.
+    Amb tolerancia > 0 es descarten les combinacions menys importants amb una cota de l'error: una
+    combinació amb probabilitat p i saldo b a falta de k tirades aporta al saldo final esperat com a
+    molt p·(|b| + k·C), on C és el canvi de saldo més gran d'una tirada. A cada tirada es descarten
+    combinacions amb pes total p·(1 + |b| + k·C) de com a molt la part proporcional de 'tolerancia', de
+    manera que l'error del saldo final esperat, la massa descartada i l'error de la probabilitat
+    d'acabar perdent són com a molt 'tolerancia'.
+    Retorna els saldos finals (ordenats), la probabilitat de cada un, la probabilitat d'acabar perdent
+    (saldo final negatiu amb crèdit il·limitat, com Acumulador.perdudes; no és la probabilitat de ruïna)
+    i la cota de l'error (0 si no s'ha descartat res). Retorna None si NumPy no està disponible.
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    transicions, _, _, limits = _taula_transicions(nom, R, base, maxim, disposicio)
+    canvi_maxim = max(abs(c) for _, _, _, c in transicions)
+    actual = {0: (np.zeros(1, dtype=np.int64), np.ones(1))}
+    cota = 0.0
+    for r in range(R):
+        #Parts (saldos desplaçats, probabilitats) que arriben a cada estat des dels estats de la tirada r
+        arribades = {}
+        for o, d, p, c in transicions[:limits[r]]:
+            if o in actual:
+                saldos, probabilitats = actual[o]
+                arribades.setdefault(d, []).append((saldos + c, probabilitats * p))
+        actual = {d: _agrupar_saldos(parts) for d, parts in arribades.items()}
+        if tolerancia:
+            cota += _descartar_combinacions(actual, tolerancia * (r + 1) / R - cota, R - r - 1, canvi_maxim)
+    saldos, probabilitats = _agrupar_saldos(list(actual.values()))
+    return saldos, probabilitats, float(probabilitats[saldos < 0].sum()), cota
+
+#Estadístiques en streaming
+
+class Acumulador:
+    """
+    Acumula les estadístiques d'un conjunt de simulacions a mesura que arriben els resultats,
+    sense guardar cada partida: recompte, mitjana i variància del balanç (algorisme de Welford),
+    mínim i màxim, sumes de tirades i d'apostes, partides perdudes i un esbós de quantils.
+    També guarda la variància del total apostat i la covariància amb el balanç, que calen per a
+    l'interval de confiança de l'esperança (quocient balanç / apostat, mètode delta), i, per al
+    joc amb capital finit, les partides arruïnades, la distribució de la tirada de la ruïna
+    (tirada -> recompte) i la mitjana i el màxim de la caiguda màxima de cada partida.
+    Dos acumuladors es poden combinar (per exemple, els de blocs executats en processos diferents).
+    """
+    def __init__(self, precisio=0.01):
+        self.n = 0
+        self.mitjana = 0.0
+        self.m2 = 0.0                # Suma dels quadrats de les desviacions respecte la mitjana
+        self.minim = None
+        self.maxim = None
+        self.suma_tirades = 0
+        self.suma_saldo = 0
+        self.suma_apostat = 0
+        self.perdudes = 0            # Partides que acaben amb balanç negatiu
+        self.mitjana_apostat = 0.0
+        self.m2_apostat = 0.0        # Suma dels quadrats de les desviacions del total apostat
+        self.c2 = 0.0                # Suma dels productes de desviacions (balanç · apostat)
+        self.arruinades = 0          # Partides que no han pogut cobrir la següent aposta
+        self.temps_ruina = {}        # Tirada en què s'arruïna la partida -> recompte
+        self.suma_caiguda = 0
+        self.caiguda_maxima = 0
+        #Esbós de quantils: cubetes logarítmiques (error relatiu màxim 'precisio'), índex -> recompte
+        self.gamma = (1 + precisio) / (1 - precisio)
+        self.cubetes = {}
+
+    def _cubeta(self, x):
+#Índex de la cubeta d'un valor: 0 per al zero, positiu o negatiu segons el signe
+        if x == 0:
+            return 0
+        k = math.ceil(math.log(abs(x), self.gamma)) + 1
+        return k if x > 0 else -k
+
+    def afegir(self, tirades, saldo, total_apostat, caiguda=0, arruinada=False):
+#Afegeix el resultat d'una sola partida
+        self.n += 1
+        delta = saldo - self.mitjana
+        self.mitjana += delta / self.n
+        self.m2 += delta * (saldo - self.mitjana)
+        delta_ap = total_apostat - self.mitjana_apostat
+        self.mitjana_apostat += delta_ap / self.n
+        self.m2_apostat += delta_ap * (total_apostat - self.mitjana_apostat)
+        self.c2 += delta * (total_apostat - self.mitjana_apostat)
+        self.minim = saldo if self.minim is None else min(self.minim, saldo)
+        self.maxim = saldo if self.maxim is None else max(self.maxim, saldo)
+        self.suma_tirades += tirades
+        self.suma_saldo += saldo
+        self.suma_apostat += total_apostat
+        self.perdudes += saldo < 0
+        k = self._cubeta(saldo)
+        self.cubetes[k] = self.cubetes.get(k, 0) + 1
+        self.suma_caiguda += caiguda
+        self.caiguda_maxima = max(self.caiguda_maxima, caiguda)
+        if arruinada:
+            self.arruinades += 1
+            self.temps_ruina[tirades] = self.temps_ruina.get(tirades, 0) + 1
+
+    def afegir_lot(self, tirades, saldo, total_apostat, caiguda=None, arruinada=None):
+#Afegeix els resultats d'un lot de partides (arrays de NumPy)
+        if saldo.size == 0:
+            return
+        lot = Acumulador()
+        lot.gamma = self.gamma
+        lot.n = int(saldo.size)
+        lot.mitjana = float(saldo.mean())
+        lot.m2 = float(((saldo - lot.mitjana) ** 2).sum())
+        lot.mitjana_apostat = float(total_apostat.mean())
+        lot.m2_apostat = float(((total_apostat - lot.mitjana_apostat) ** 2).sum())
+        lot.c2 = float(((saldo - lot.mitjana) * (total_apostat - lot.mitjana_apostat)).sum())
+        lot.minim, lot.maxim = int(saldo.min()), int(saldo.max())
+        lot.suma_tirades = int(tirades.sum())
+        lot.suma_saldo = int(saldo.sum())
+        lot.suma_apostat = int(total_apostat.sum())
+        lot.perdudes = int((saldo < 0).sum())
+        absolut = np.abs(saldo[saldo != 0]).astype(float)
+        k = (np.ceil(np.log(absolut) / math.log(self.gamma)) + 1).astype(np.int64)
+        k = np.where(saldo[saldo != 0] > 0, k, -k)
+        claus, recomptes = np.unique(np.concatenate([k, np.zeros(int((saldo == 0).sum()), np.int64)]),
+                                     return_counts=True)
+        lot.cubetes = dict(zip(claus.tolist(), recomptes.tolist()))
+        if caiguda is not None:
+            lot.suma_caiguda = int(caiguda.sum())
+            lot.caiguda_maxima = int(caiguda.max())
+        if arruinada is not None and arruinada.any():
+            claus, recomptes = np.unique(tirades[arruinada.astype(bool)], return_counts=True)
+            lot.arruinades = int(recomptes.sum())
+            lot.temps_ruina = dict(zip(claus.tolist(), recomptes.tolist()))
+        self.combinar(lot)
+
+    def combinar(self, altre):
+#Afegeix les estadístiques d'un altre acumulador (fórmula de Chan per a la variància)
+        if altre.n == 0:
+            return
+        n = self.n + altre.n
+        delta = altre.mitjana - self.mitjana
+        delta_ap = altre.mitjana_apostat - self.mitjana_apostat
+        self.m2 += altre.m2 + delta * delta * self.n * altre.n / n
+        self.m2_apostat += altre.m2_apostat + delta_ap * delta_ap * self.n * altre.n / n
+        self.c2 += altre.c2 + delta * delta_ap * self.n * altre.n / n
+        self.mitjana += delta * altre.n / n
+        self.mitjana_apostat += delta_ap * altre.n / n
+        self.n = n
+        self.minim = altre.minim if self.minim is None else min(self.minim, altre.minim)
+        self.maxim = altre.maxim if self.maxim is None else max(self.maxim, altre.maxim)
+        self.suma_tirades += altre.suma_tirades
+        self.suma_saldo += altre.suma_saldo
+        self.suma_apostat += altre.suma_apostat
+        self.perdudes += altre.perdudes
+        for k, c in altre.cubetes.items():
+            self.cubetes[k] = self.cubetes.get(k, 0) + c
+        self.suma_caiguda += altre.suma_caiguda
+        self.caiguda_maxima = max(self.caiguda_maxima, altre.caiguda_maxima)
+        self.arruinades += altre.arruinades
+        for t, c in altre.temps_ruina.items():
+            self.temps_ruina[t] = self.temps_ruina.get(t, 0) + c
+
+    def estat(self):
+#Camps de l'acumulador com a dades simples (nombres i llistes), que es poden desar en JSON o amb pickle
+#sense dependre de la classe (un pickle de l'objecte només es pot llegir des del mateix mòdul __main__)
+        estat = {}
+        for camp, valor in vars(self).items():
+            if isinstance(valor, dict):
+                valor = [[int(k), int(c)] for k, c in valor.items()]
+            elif hasattr(valor, "item"):
+                valor = valor.item()         #Escalar de NumPy
+            estat[camp] = valor
+        return estat
+
+    @classmethod
+    def des_de_estat(cls, estat):
+#Torna a construir un acumulador a partir de estat()
+        acum = cls()
+        for camp, valor in estat.items():
+            setattr(acum, camp, {k: c for k, c in valor} if isinstance(valor, list) else valor)
+        return acum
+
+    @property
+    def variancia(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def esperanca(self):
+#Esperança "justa": balanç total dividit pel total apostat
+        return self.suma_saldo / self.suma_apostat if self.suma_apostat else 0
+
+    def interval_esperanca(self, confianca=0.95):
+#Semiamplada de l'interval de confiança de l'esperança (quocient de mitjanes) pel mètode delta
+        if self.n < 2 or not self.mitjana_apostat:
+            return math.inf
+        r = self.esperanca
+        var_saldo = self.m2 / (self.n - 1)
+        var_apostat = self.m2_apostat / (self.n - 1)
+        cov = self.c2 / (self.n - 1)
+        var_r = (var_saldo - 2 * r * cov + r * r * var_apostat) / (self.n * self.mitjana_apostat ** 2)
+        z = statistics.NormalDist().inv_cdf((1 + confianca) / 2)
+        return z * math.sqrt(max(var_r, 0.0))
+
+    @property
+    def prob_ruina(self):
+        return self.arruinades / self.n if self.n else 0.0
+
+    @property
+    def caiguda_mitjana(self):
+        return self.suma_caiguda / self.n if self.n else 0.0
+
+    @property
+    def temps_ruina_mitja(self):
+        if not self.arruinades:
+            return None
+        return sum(t * c for t, c in self.temps_ruina.items()) / self.arruinades
+
+    def quantil_temps_ruina(self, q):
+#Quantil q de la tirada de la ruïna entre les partides arruïnades (exacte: la distribució és per tirades)
+        if not self.arruinades:
+            return None
+        acumulat = 0
+        for t in sorted(self.temps_ruina):
+            acumulat += self.temps_ruina[t]
+            if acumulat > q * (self.arruinades - 1):
+                return t
+
+    def quantil(self, q):
+#Valor aproximat del quantil q (entre 0 i 1) del balanç final
+        if self.n == 0:
+            return 0
+        posicio = q * (self.n - 1)
+        acumulat = 0
+        for k in sorted(self.cubetes):
+            acumulat += self.cubetes[k]
+            if acumulat > posicio:
+                break
+        if k == 0:
+            return 0
+        valor = 2 * self.gamma ** (abs(k) - 1) / (self.gamma + 1)
+        valor = min(max(valor, 1), max(abs(self.minim), abs(self.maxim)))
+        return valor if k > 0 else -valor
+
+
+def _retallar_mostra(mostres, max_files):
+#Es queda amb les max_files files (clau, fila) de clau més petita: la mostra de totes les files vistes fins ara
+    return heapq.nsmallest(max_files, mostres)
+
+
+def _combinar_mostres(mostres, max_files):
+#Uneix mostres de files (clau, fila) i es queda amb les max_files de clau més petita, ordenades per simulació
+    return sorted(fila for _, fila in _retallar_mostra(mostres, max_files))
+
+#Magatzem de resultats per columnes
+
+#A partir d'aquest nombre de files, els resultats es guarden en fitxers mapats a memòria
+MAX_FILES_MEMORIA = 5_000_000
+
+
+class MagatzemResultats:
+    """
+    Resultats de cada simulació guardats en columnes de NumPy (simulacio i balanç en int64,
+    tirades en int32, total apostat i caiguda màxima en int64 i ruïna en int8) en lloc de
+    llistes de tuples.
+    Les files s'afegeixen per lots. Si es dona un directori, o si la capacitat supera
+    MAX_FILES_MEMORIA, cada columna és un fitxer .npy mapat a memòria, de manera que N molt grans
+    no ocupen memòria RAM i els resultats es poden tornar a obrir sense còpies (MagatzemResultats.obrir).
+    Iterar-lo retorna tuples (simulacio, tirades, balanç, total_apostat, caiguda_maxima, arruinada).
+    """
+    COLUMNES = {"simulacio": "int64", "tirades": "int32", "balanc": "int64", "total_apostat": "int64",
+                "caiguda_maxima": "int64", "arruinada": "int8"}
+
+    def __init__(self, capacitat=1024, directori=None):
+        self.n = 0
+        self.directori = directori
+        if directori is None and capacitat > MAX_FILES_MEMORIA:
+            #Directori temporal que s'esborra quan el magatzem ja no s'utilitza
+            self.directori = tempfile.mkdtemp(prefix="ruleta_")
+            weakref.finalize(self, shutil.rmtree, self.directori, True)
+        self.columnes = {c: self._nova_columna(c, max(int(capacitat), 1)) for c in self.COLUMNES}
+
+    def _nova_columna(self, nom, capacitat, sufix=""):
+#Crea una columna buida, a memòria o en un fitxer .npy mapat
+        if self.directori is None:
+            return np.zeros(capacitat, dtype=self.COLUMNES[nom])
+        os.makedirs(self.directori, exist_ok=True)
+        cami = os.path.join(self.directori, f"{nom}.npy{sufix}")
+        return np.lib.format.open_memmap(cami, mode="w+", dtype=self.COLUMNES[nom], shape=(capacitat,))
+
+    def _ampliar(self, minim):
+#Dobla la capacitat de totes les columnes fins que hi càpiguen 'minim' files
+        capacitat = len(self.columnes["simulacio"])
+        while capacitat < minim:
+            capacitat *= 2
+        for nom in self.COLUMNES:
+            nova = self._nova_columna(nom, capacitat, ".tmp" if self.directori else "")
+            nova[:self.n] = self.columnes[nom][:self.n]
+            if self.directori is not None:
+                #El fitxer nou substitueix l'antic (abans cal alliberar els dos mapatges)
+                cami = os.path.join(self.directori, f"{nom}.npy")
+                nova.flush()
+                del nova
+                self.columnes[nom] = None
+                os.replace(cami + ".tmp", cami)
+                nova = np.load(cami, mmap_mode="r+")
+            self.columnes[nom] = nova
+
+    def afegir(self, simulacio, tirades, balanc, total_apostat, caiguda_maxima=0, arruinada=0):
+#Afegeix un lot de files (arrays o llistes de la mateixa longitud)
+        m = len(simulacio)
+        if self.n + m > len(self.columnes["simulacio"]):
+            self._ampliar(self.n + m)
+        for nom, valors in zip(self.COLUMNES, (simulacio, tirades, balanc, total_apostat, caiguda_maxima, arruinada)):
+            self.columnes[nom][self.n:self.n + m] = valors
+        self.n += m
+
+    def afegir_magatzem(self, altre):
+#Afegeix totes les files d'un altre magatzem (per exemple, el d'un bloc)
+        self.afegir(*(altre.columna(c) for c in self.COLUMNES))
+
+    @classmethod
+    def des_de_files(cls, files):
+#Crea un magatzem a partir d'una llista de tuples (una per fila, amb les columnes de COLUMNES)
+        magatzem = cls(len(files))
+        if files:
+            magatzem.afegir(*zip(*files))
+        return magatzem
+
+    def columna(self, nom):
+#Vista (sense còpia) de les files ocupades d'una columna
+        return self.columnes[nom][:self.n]
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for inici in range(0, self.n, 65536):
+            yield from zip(*(self.columnes[c][inici:min(inici + 65536, self.n)].tolist()
+                             for c in self.COLUMNES))
+
+    def desar(self):
+#Escriu a disc les metadades (nombre de files) perquè el magatzem es pugui tornar a obrir
+        if self.directori is None:
+            raise ValueError("El magatzem és a memòria: no té cap directori on desar-se")
+        for columna in self.columnes.values():
+            columna.flush()
+        with open(os.path.join(self.directori, "magatzem.json"), "w", encoding="utf-8") as f:
+            json.dump({"n": self.n}, f)
+
+    def tancar(self):
+#Desa el magatzem i n'allibera els mapatges, per poder moure o esborrar el directori (a Windows, els fitxers
+#mapats no es poden moure); després el magatzem ja no es pot fer servir
+        self.desar()
+        self.columnes = {}
+
+    @classmethod
+    def obrir(cls, directori, escriptura=False):
+#Obre (sense còpies) un magatzem desat amb desar(); per defecte només de lectura i, amb escriptura=True,
+#per continuar-hi afegint files (per exemple, en reprendre una execució des d'un punt de control)
+        with open(os.path.join(directori, "magatzem.json"), encoding="utf-8") as f:
+            n = json.load(f)["n"]
+        magatzem = cls.__new__(cls)
+        magatzem.n = n
+        magatzem.directori = directori
+        magatzem.columnes = {c: np.load(os.path.join(directori, f"{c}.npy"), mmap_mode="r+" if escriptura else "r")
+                             for c in cls.COLUMNES}
+        return magatzem
+
+    def exportar(self, fitxer):
+#Exporta totes les columnes a un fitxer .npy, .csv o .parquet
+        escriure_columnes([{c: self.columna(c) for c in self.COLUMNES}], fitxer)
+
+
+#Files que s'escriuen de cop en exportar (cada tros és un grup de files de Parquet)
+FILES_TROS_EXPORTACIO = 100000
+
+
+def escriure_columnes(parts, fitxer):
+    """
+    Escriu en un fitxer les files de 'parts', una llista de diccionaris de columnes (arrays de NumPy
+    de la mateixa longitud, o un valor constant per a tota la part) que s'escriuen una darrere l'altra.
+    El format depèn de l'extensió: .npy (array estructurat), .csv o .parquet (requereix pyarrow).
+    Es copien trossos de FILES_TROS_EXPORTACIO files, de manera que les columnes mapades a memòria
+    no es carreguen senceres a la RAM.
+    """
+    ext = os.path.splitext(fitxer)[1].lower()
+    if ext not in (".npy", ".csv", ".parquet"):
+        raise ValueError(f"Format de sortida no suportat: {ext or fitxer}")
+    n_part = lambda part: max(len(v) for v in part.values() if np.ndim(v))
+    tipus = [(c, np.asarray(v).dtype) for c, v in parts[0].items()]
+
+    def trossos():
+        #Diccionaris de columnes de com a molt FILES_TROS_EXPORTACIO files, amb les constants ja repetides
+        for part in parts:
+            n = n_part(part)
+            for inici in range(0, n, FILES_TROS_EXPORTACIO):
+                m = min(FILES_TROS_EXPORTACIO, n - inici)
+                tros = {}
+                for c, t in tipus:
+                    v = part[c]
+                    tros[c] = np.asarray(v[inici:inici + m]) if np.ndim(v) else np.full(m, v, dtype=t)
+                yield tros
+
+    if ext == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        esquema = pa.schema([(c, pa.from_numpy_dtype(t)) for c, t in tipus])
+        with pq.ParquetWriter(fitxer, esquema) as escriptor:
+            for tros in trossos():
+                escriptor.write_table(pa.table(tros, schema=esquema))
+    elif ext == ".npy":
+        sortida = np.lib.format.open_memmap(fitxer, mode="w+", dtype=tipus, shape=(sum(map(n_part, parts)),))
+        posicio = 0
+        for tros in trossos():
+            m = len(next(iter(tros.values())))
+            for c, v in tros.items():
+                sortida[c][posicio:posicio + m] = v
+            posicio += m
+        sortida.flush()
+        del sortida
+    else:
+        with open(fitxer, "w", encoding="utf-8") as f:
+            f.write(",".join(c for c, _ in tipus) + "\n")
+            for tros in trossos():
+                text = [v.astype(str) for v in tros.values()]
+                linies = text[0]
+                for t in text[1:]:
+                    linies = np.char.add(np.char.add(linies, ","), t)
+                if len(linies):
+                    f.write("\n".join(linies.tolist()) + "\n")
+
+#Mesura de temps per fases (perfilat opcional)
+
+class Cronometres:
+    """
+    Temps acumulat de cada fase d'una execució (simulació, agregació, omplir la taula, informe PDF...).
+    És opcional: les funcions que el fan servir reben cronometres=None i llavors no mesuren res.
+    Es pot compartir entre el fil de treball i el de la interfície.
+    """
+    def __init__(self):
+        self.fases = {}                  # Nom de la fase -> [segons acumulats, vegades]
+        self._bloqueig = threading.Lock()
+
+    @contextlib.contextmanager
+    def mesura(self, fase):
+#Suma a la fase el temps que triga el bloc 'with'
+        inici = time.perf_counter()
+        try:
+            yield
+        finally:
+            durada = time.perf_counter() - inici
+            with self._bloqueig:
+                total = self.fases.setdefault(fase, [0.0, 0])
+                total[0] += durada
+                total[1] += 1
+
+    def diccionari(self):
+#Temps de cada fase en un diccionari serialitzable (JSON)
+        with self._bloqueig:
+            return {fase: {"segons": segons, "vegades": vegades} for fase, (segons, vegades) in self.fases.items()}
+
+    def resum(self):
+#Text d'una línia amb el temps de cada fase, en l'ordre en què s'han mesurat per primer cop
+        return "  ·  ".join(f"{fase}: {t['segons']:.3f} s" + (f" ({t['vegades']}×)" if t["vegades"] > 1 else "")
+                            for fase, t in self.diccionari().items())
+
+
+def _mesura(cronometres, fase):
+#Mesura la fase si hi ha cronòmetres; si no, no fa res
+    return cronometres.mesura(fase) if cronometres is not None else contextlib.nullcontext()
+
+#Execució de les simulacions (en paral·lel)
+
+#Simulacions per bloc (com a màxim) i tirades per bloc. La mida només depèn de R, perquè els resultats d'una
+#llavor no depenguin del nombre de processos, i es limita a unes TIRADES_BLOC tirades perquè el progrés s'actualitzi
+#sovint encara que R sigui gran. Per aturar no cal esperar que acabi cap bloc (vegeu _simular_bloc)
+MIDA_BLOC = 20000
+TIRADES_BLOC = 2 * 10 ** 7
+
+
+def _mida_bloc(R):
+#Simulacions per bloc per a partides de R tirades (entre 1000 i MIDA_BLOC)
+    return max(1000, min(MIDA_BLOC, TIRADES_BLOC // max(R, 1)))
+
+
+def _llavors_bloc(llavor, b):
+#Genera les llavors (retirar-se, no retirar-se) del bloc b a partir de la llavor mestra, sense generar les dels
+#blocs anteriors (amb --precision i sense -N pot haver-hi milions de blocs possibles). La llavor del bloc b no
+#depèn del nombre de blocs, així en augmentar N els primers blocs no canvien
+    if NUMPY_AVAILABLE:
+        return tuple(np.random.SeedSequence(s.entropy, spawn_key=s.spawn_key + (b,), pool_size=s.pool_size)
+                     for s in np.random.SeedSequence(llavor).spawn(2))
+    return (random.Random(f"{llavor}-ret-{b}").getrandbits(64),
+            random.Random(f"{llavor}-no-{b}").getrandbits(64))
+
+
+def _simular_bloc(nom, R, retirar, inici, n, llavor, max_files=None, base=1, maxim=APOSTA_MAXIMA,
+                  capital=None, objectiu=None, disposicio="vermell", aturar=None):
+    """
+    Executa un bloc de n simulacions (numerades a partir d'inici) dins d'un procés treballador.
+    Retorna l'acumulador del bloc i les files que cal guardar: totes (max_files=None), cap
+    (max_files=0) o una mostra aleatòria de com a màxim max_files files, cadascuna amb la seva
+    clau aleatòria perquè es pugui combinar amb les mostres dels altres blocs.
+    Si 'aturar' (Event) s'activa mentre s'executa, el bloc s'interromp i retorna None.
+    """
+    acum = Acumulador()
+    rng = GeneradorAleatori(llavor)
+    if NUMPY_AVAILABLE:
+        columnes = simular_lot(nom, R, n, retirar=retirar, rng=rng, base=base, maxim=maxim,
+                               capital=capital, objectiu=objectiu, disposicio=disposicio, aturar=aturar)
+        if columnes is None:
+            return None
+        t, b, a, c, r = columnes
+        acum.afegir_lot(t, b, a, c, r)
+        if max_files == 0:
+            return acum, []
+        columnes = (np.arange(inici, inici + n), t, b, a, c, r.astype(np.int8))
+        if max_files is None:
+            magatzem = MagatzemResultats(n)
+            magatzem.afegir(*columnes)
+            return acum, magatzem
+        claus = rng.random(n)
+        tria = np.argsort(claus, kind="stable")[:max_files]
+        return acum, list(zip(claus[tria].tolist(), zip(*(v[tria].tolist() for v in columnes))))
+
+    files = []
+    #Un sol simulador per a tot el bloc, perquè la taula de transicions de l'estratègia es reaprofiti
+    simulador = Simulador(crear_estrategia(nom, base, maxim), R, rng, capital, objectiu, disposicio)
+    for sim_idx in range(inici, inici + n):
+        if aturar is not None and aturar.is_set():
+            return None
+        t, bal, ap = simulador.jugar(retirar=retirar)
+        acum.afegir(t, bal, ap, simulador.caiguda_maxima, simulador.arruinat)
+        fila = (sim_idx, t, bal, ap, simulador.caiguda_maxima, int(simulador.arruinat))
+        if max_files is None:
+            files.append(fila)
+        elif max_files:
+            files.append((rng.random(), fila))
+    if max_files:
+        files = sorted(files)[:max_files]
+    return acum, files
+
+
+def _simular_bloc_treballador(*tasca):
+#_simular_bloc dins d'un procés del grup, amb el senyal d'aturada del grup
+    return _simular_bloc(*tasca, aturar=_aturar_treballador)
+
+
+def _resultats_blocs(tasques, processos, aturar=None):
+    """
+    Executa les tasques (un iterable, que es llegeix a mesura que cal) per parelles (retirar-se,
+    no retirar-se) i les retorna en ordre a mesura que acaben. Només es mantenen unes quantes
+    tasques per davant de la que es retorna, de manera que si qui les consumeix s'atura
+    (cancel·lació o precisió assolida) es malgasta poca feina.
+    Si 'aturar' (Event) s'activa, els blocs en curs s'interrompen i la parella que s'esperava
+    es retorna amb None (vegeu _simular_bloc).
+    """
+    tasques = iter(tasques)
+    if processos == 1:
+        #Amb un sol procés no val la pena crear el grup de processos
+        for tasca in tasques:
+            yield _simular_bloc(*tasca, aturar=aturar), _simular_bloc(*next(tasques), aturar=aturar)
+        return
+    #Els processos treballadors no poden rebre 'aturar' (pot ser un threading.Event): tenen un senyal propi, que
+    #s'activa quan s'activa 'aturar' o quan qui consumeix els resultats s'atura
+    senyal = multiprocessing.Event()
+    executor = _grup_processos(processos, senyal)
+    en_curs = 4 * processos
+    try:
+        futurs = collections.deque()
+        while True:
+            for tasca in itertools.islice(tasques, en_curs - len(futurs)):
+                futurs.append(executor.submit(_simular_bloc_treballador, *tasca))
+            if not futurs:
+                return
+            parella = futurs.popleft(), futurs.popleft()
+            while aturar is not None and not senyal.is_set():
+                if not concurrent.futures.wait(parella, timeout=0.1).not_done:
+                    break
+                if aturar.is_set():
+                    senyal.set()
+            yield parella[0].result(), parella[1].result()
+    finally:
+        #Si s'atura abans d'acabar, els blocs pendents no s'arriben a executar i els que s'estan executant
+        #s'interrompen, de manera que no cal esperar-los
+        senyal.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+#Segons mínims entre dos punts de control d'una execució (a més del que es desa en acabar o aturar-se)
+INTERVAL_PUNT_CONTROL = 60.0
+
+
+def _llegir_punt_control(directori, configuracio):
+    """
+    Llegeix l'estat desat per _desar_punt_control a 'directori', o None si encara no n'hi ha.
+    Si la configuració desada no coincideix amb 'configuracio' es produeix un ValueError, per no
+    barrejar resultats de configuracions diferents. Si la llavor és None, s'accepta la desada.
+    """
+    cami = os.path.join(directori, "punt_control.pkl")
+    if not os.path.exists(cami):
+        return None
+    with open(cami, "rb") as f:
+        estat = pickle.load(f)
+    desada = dict(estat["configuracio"])
+    if configuracio["llavor"] is None:
+        desada["llavor"] = None
+    if desada != configuracio:
+        raise ValueError(f"El punt de control de '{directori}' correspon a una altra configuració: "
+                         f"{estat['configuracio']}")
+    return estat
+
+
+def _desar_punt_control(directori, estat):
+#Desa l'estat de l'execució de manera atòmica: s'escriu en un fitxer temporal que després substitueix l'anterior
+#L'estat només conté dades simples (els acumuladors com a Acumulador.estat()), perquè un punt de control desat
+#executant el fitxer com a programa es pugui reprendre important-lo com a mòdul, i a l'inrevés
+    cami = os.path.join(directori, "punt_control.pkl")
+    with open(cami + ".tmp", "wb") as f:
+        pickle.dump(estat, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(cami + ".tmp", cami)
+
+
+class EstatExecucio:
+    """
+    Estat d'una execució d'executar_simulacions: blocs acabats, simulacions fetes, acumuladors i files
+    guardades de cada mode. Es desa com a punt de control (vegeu _desar_punt_control) i, com que cada
+    bloc té la seva llavor, en reprendre'l cada flux aleatori continua on s'havia aturat.
+    """
+    def __init__(self, configuracio, max_files, estat=None):
+        self.configuracio = dict(configuracio, max_files=max_files)
+        self.max_files = max_files
+        self.blocs_fets = estat["blocs_fets"] if estat is not None else 0
+        self.fetes = estat["fetes"] if estat is not None else 0
+        self.represes = self.fetes        # Simulacions que ja hi havia al punt de control
+        #Una execució que ja havia acabat (totes les simulacions fetes o la precisió assolida) no continua
+        self.acabat = estat is not None and estat["acabat"]
+        self.files = estat["files"] if estat is not None else 0
+        if estat is not None:
+            self.acum_ret, self.acum_no = (Acumulador.des_de_estat(estat[c]) for c in ("acum_ret", "acum_no"))
+            self.finals_ret, self.finals_no = estat["finals"]
+        else:
+            self.acum_ret, self.acum_no = Acumulador(), Acumulador()
+            self.finals_ret, self.finals_no = [], []
+
+    def obrir_files(self, directori, capacitat):
+#Amb NumPy i totes les files, les guarda en un MagatzemResultats per mode (a 'directori', si es dona, en
+#subdirectoris 'retirar' i 'no_retirar'); en reprendre, les files posteriors a l'últim punt de control es
+#tornen a escriure
+        if not NUMPY_AVAILABLE or self.max_files is not None:
+            return
+        if self.fetes:
+            self.finals_ret, self.finals_no = (MagatzemResultats.obrir(os.path.join(directori, mode), escriptura=True)
+                                               for mode in ("retirar", "no_retirar"))
+            self.finals_ret.n = self.finals_no.n = self.files
+        else:
+            self.finals_ret, self.finals_no = (MagatzemResultats(capacitat, directori and os.path.join(directori, mode))
+                                               for mode in ("retirar", "no_retirar"))
+
+    def afegir(self, parcial_ret, parcial_no, n):
+#Afegeix els resultats d'un bloc de n simulacions per condició. Amb una mostra, la del bloc s'uneix a la guardada
+#i es retalla de seguida a max_files files, de manera que mai se'n guarden més de max_files per mode
+        self.acum_ret.combinar(parcial_ret[0])
+        self.acum_no.combinar(parcial_no[0])
+        if isinstance(self.finals_ret, MagatzemResultats):
+            self.finals_ret.afegir_magatzem(parcial_ret[1])
+            self.finals_no.afegir_magatzem(parcial_no[1])
+        elif self.max_files:
+            self.finals_ret = _retallar_mostra(self.finals_ret + parcial_ret[1], self.max_files)
+            self.finals_no = _retallar_mostra(self.finals_no + parcial_no[1], self.max_files)
+        else:
+            self.finals_ret.extend(parcial_ret[1])
+            self.finals_no.extend(parcial_no[1])
+        self.fetes += n
+        self.blocs_fets += 1
+
+    def desar(self, directori):
+#Desa el punt de control. Les mostres ja són retallades (vegeu afegir); les columnes del magatzem ja són fitxers i
+#només cal desar-les
+        magatzem = isinstance(self.finals_ret, MagatzemResultats)
+        if magatzem:
+            self.finals_ret.desar()
+            self.finals_no.desar()
+        _desar_punt_control(directori, {
+            "configuracio": self.configuracio, "blocs_fets": self.blocs_fets, "fetes": self.fetes,
+            "acabat": self.acabat, "acum_ret": self.acum_ret.estat(), "acum_no": self.acum_no.estat(),
+            "files": len(self.finals_ret),
+            "finals": ([], []) if magatzem else (self.finals_ret, self.finals_no),
+        })
+
+
+def _tasques_blocs(estr_nom, R, N, llavor, pendents, parametres):
+#Tasques de _simular_bloc dels blocs pendents, generades a mesura que cal (amb precisio N pot ser pràcticament
+#il·limitat). Les dues condicions s'alternen bloc a bloc perquè els resultats parcials sempre les tinguin totes dues
+    mida = _mida_bloc(R)
+    for b in pendents:
+        for retirar, ll in zip((True, False), _llavors_bloc(llavor, b)):
+            yield (estr_nom, R, retirar, 1 + b * mida, min(mida, N - b * mida), ll, *parametres)
+
+
+def _desar_a_memoria(memoria, configuracio, dades, directori_temporal):
+#Desa a la memòria cau el resultat d'una execució acabada (les files, de la carpeta temporal si n'hi ha) i el
+#retorna tal com es tornarà a llegir. D'una execució cancel·lada no es desa res, però les files es retornen: la
+#carpeta temporal s'esborra quan ja no s'utilitzen (si no es pot, MemoriaResultats l'esborrarà més endavant)
+    if not dades["cancelat"]:
+        dades = memoria.desar(configuracio, dades, moure=directori_temporal is not None)
+    if directori_temporal is not None:
+        if dades["cancelat"]:
+            for finals in (dades["finals_ret"], dades["finals_no"]):
+                weakref.finalize(finals, shutil.rmtree, directori_temporal, True)
+        else:
+            shutil.rmtree(directori_temporal, ignore_errors=True)
+    return dades
+
+
+def _desar_configuracio(directori, dades):
+#Desa les files de cada mode, la configuració i els acumuladors de l'execució a 'directori', per poder tornar a
+#carregar els resultats (carregar_resultats). Les files que encara no hi són (una mostra, o totes sense NumPy)
+#s'hi escriuen ara: amb NumPy en un MagatzemResultats per mode i, sense, en un fitxer CSV per mode
+    os.makedirs(directori, exist_ok=True)
+    for mode, nom in [("retirar", "ret"), ("no_retirar", "no")]:
+        finals, carpeta = dades[f"finals_{nom}"], os.path.join(directori, mode)
+        if isinstance(finals, MagatzemResultats) and finals.directori == carpeta:
+            finals.desar()
+        elif NUMPY_AVAILABLE:
+            magatzem = MagatzemResultats(len(finals), carpeta)
+            if isinstance(finals, MagatzemResultats):
+                magatzem.afegir_magatzem(finals)
+            elif finals:
+                magatzem.afegir(*zip(*finals))
+            magatzem.tancar()
+        else:
+            import csv
+            with open(carpeta + ".csv", "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(MagatzemResultats.COLUMNES)
+                w.writerows(finals)
+    configuracio = {c: dades[c] for c in ("estr", "R", "N", "llavor", "cancelat", "base", "maxim", "capital",
+                                          "objectiu", "disposicio", "confianca")}
+    #Amb què s'ha simulat: la mateixa llavor només dona els mateixos resultats amb el mateix motor i blocs
+    configuracio.update((c, dades.get(c)) for c in ("versio_motor", "mida_bloc", "versio_numpy"))
+    with open(os.path.join(directori, "resultats.json"), "w", encoding="utf-8") as f:
+        json.dump(dict(configuracio, acum_ret=dades["acum_ret"].estat(), acum_no=dades["acum_no"].estat()), f)
+
+
+def executar_simulacions(estr_nom, R, N, llavor=None, processos=None, max_files=0, directori=None,
+                         progres=None, aturar=None, base=1, maxim=APOSTA_MAXIMA, precisio=None,
+                         confianca=0.95, capital=None, objectiu=None, disposicio="vermell", cronometres=None,
+                         punt_control=None, memoria=None):
+    """
+    Executa les N simulacions de l'estratègia retirant-se i sense retirar-se, en blocs de _mida_bloc(R)
+    repartits entre 'processos' processos; cada bloc té la seva llavor, i el resultat no depèn dels processos.
+    max_files=None guarda totes les files (a 'directori', si es dona) i max_files=k una mostra de k.
+    Amb 'precisio' s'atura quan els intervals de les dues esperances són prou estrets, 'aturar' (Event) la
+    cancel·la, 'punt_control' (directori) permet reprendre-la i 'memoria' (MemoriaResultats) la reaprofita.
+    Retorna el diccionari de resultats que fa servir la interfície.
+    """
+    inici_temps = time.perf_counter()
+    processos = _nombre_processos(processos)
+    disposicio = _disposicio(disposicio).text     #Es valida abans de repartir la feina
+    #Configuració que determina els resultats (punt de control i memòria cau)
+    configuracio = {"estr": estr_nom, "R": R, "N": N, "llavor": llavor, "base": base, "maxim": maxim,
+                    "capital": capital, "objectiu": objectiu, "disposicio": disposicio, "precisio": precisio,
+                    "confianca": confianca, "versio_motor": VERSIO_MOTOR, "mida_bloc": _mida_bloc(R),
+                    "numpy": NUMPY_AVAILABLE}
+    estat = None
+    if punt_control is not None:
+        os.makedirs(punt_control, exist_ok=True)
+        estat = _llegir_punt_control(punt_control, dict(configuracio, max_files=max_files))
+        if estat is not None:
+            llavor = estat["configuracio"]["llavor"]
+    configuracio["llavor"] = llavor = llavor_nova() if llavor is None else llavor
+    execucio = EstatExecucio(configuracio, max_files, estat)
+
+    #Si la memòria cau ja té els resultats d'aquesta configuració, no cal simular res. Si no, les files no
+    #s'escriuen directament a la carpeta de la memòria cau: només hi passen si l'execució acaba
+    usar_memoria = memoria is not None and NUMPY_AVAILABLE and directori is None and max_files in (None, 0)
+    directori_temporal = None
+    if usar_memoria:
+        dades = memoria.buscar(configuracio, amb_files=max_files is None)
+        if dades is not None:
+            return dades
+        if max_files is None and punt_control is None:
+            directori_temporal = memoria.carpeta_temporal()
+    mida = _mida_bloc(R)
+    #Amb precisio no se sap quantes files hi haurà: el magatzem creix a mesura que cal
+    execucio.obrir_files(directori or punt_control or directori_temporal, N if precisio is None else mida)
+
+    #Blocs que falten, units en ordre a mesura que acaben
+    pendents = range(execucio.blocs_fets, execucio.blocs_fets if execucio.acabat else -(-N // mida))
+    tasques = _tasques_blocs(estr_nom, R, N, llavor, pendents,
+                             (max_files, base, maxim, capital, objectiu, disposicio))
+    cancelat = False
+    ultim_punt_control = time.perf_counter()
+    #Amb un sol bloc per condició no val la pena crear el grup de processos
+    resultats = _resultats_blocs(tasques, processos if len(pendents) > 1 else 1, aturar)
+    try:
+        for b in pendents:
+            with _mesura(cronometres, "simulació"):
+                parcial_ret, parcial_no = next(resultats)
+            if parcial_ret is None or parcial_no is None:
+                #Bloc interromput per 'aturar': no es compta
+                cancelat = True
+                break
+            with _mesura(cronometres, "agregació"):
+                execucio.afegir(parcial_ret, parcial_no, min(mida, N - b * mida))
+            if punt_control is not None and time.perf_counter() - ultim_punt_control >= INTERVAL_PUNT_CONTROL:
+                execucio.desar(punt_control)
+                ultim_punt_control = time.perf_counter()
+            if progres is not None:
+                progres(execucio.fetes, N)
+            if aturar is not None and aturar.is_set() and execucio.fetes < N:
+                cancelat = True
+                break
+            if precisio is not None and max(execucio.acum_ret.interval_esperanca(confianca),
+                                            execucio.acum_no.interval_esperanca(confianca)) <= precisio:
+                execucio.acabat = True
+                break
+        else:
+            execucio.acabat = True
+    finally:
+        resultats.close()
+    if punt_control is not None:
+        execucio.desar(punt_control)
+
+    acum_ret, acum_no = execucio.acum_ret, execucio.acum_no
+    finals_ret, finals_no = execucio.finals_ret, execucio.finals_no
+    if max_files:
+        with _mesura(cronometres, "agregació"):
+            finals_ret = _combinar_mostres(finals_ret, max_files)
+            finals_no = _combinar_mostres(finals_no, max_files)
+            if NUMPY_AVAILABLE:
+                finals_ret = MagatzemResultats.des_de_files(finals_ret)
+                finals_no = MagatzemResultats.des_de_files(finals_no)
+
+    credit_il_limitat = capital is None and objectiu is None
+    with _mesura(cronometres, "càlcul exacte"):
+        exacta_ret = esperanca_exacta_retirar(estr_nom, R, base, maxim, disposicio) if credit_il_limitat else None
+    dades = {
+        "estr": estr_nom, "R": R, "N": execucio.fetes, "llavor": llavor, "cancelat": cancelat,
+        "base": base, "maxim": maxim, "capital": capital, "objectiu": objectiu, "disposicio": disposicio,
+        "finals_ret": finals_ret, "finals_no": finals_no,
+        "acum_ret": acum_ret, "acum_no": acum_no,
+        "mitjana_ret": acum_ret.mitjana, "mitjana_no": acum_no.mitjana,
+        "esperanca_ret": acum_ret.esperanca, "esperanca_no": acum_no.esperanca,
+        "esperanca_teo": -1 / 37,
+        "exacta_ret": exacta_ret, "exacta_no": None,
+        "confianca": confianca, "precisio": precisio,
+        "ic_ret": acum_ret.interval_esperanca(confianca), "ic_no": acum_no.interval_esperanca(confianca),
+        "assolit": precisio is not None and max(acum_ret.interval_esperanca(confianca),
+                                                acum_no.interval_esperanca(confianca)) <= precisio,
+        "represes": execucio.represes,
+        "temps": time.perf_counter() - inici_temps,
+        "memoria": False,
+        "versio_motor": VERSIO_MOTOR, "mida_bloc": _mida_bloc(R),
+        "versio_numpy": np.__version__ if NUMPY_AVAILABLE else None,
+    }
+    if directori:
+        _desar_configuracio(directori, dades)
+    if usar_memoria:
+        dades = _desar_a_memoria(memoria, configuracio, dades, directori_temporal)
+    return dades
+
+#Escombrat de paràmetres amb memòria cau
+
+#Versió del motor de simulació: s'ha d'augmentar si canvien els resultats d'una mateixa llavor
+VERSIO_MOTOR = 4
+
+
+def _clau_cella(estr, base, maxim, R, llavor, disposicio="vermell"):
+#Resum (hash) del contingut que determina els resultats d'una cel·la de l'escombrat
+    config = {"estr": estr, "base": base, "maxim": maxim, "R": R, "llavor": llavor, "disposicio": disposicio,
+              "versio": VERSIO_MOTOR, "numpy": NUMPY_AVAILABLE}
+    text = json.dumps(config, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _es_bloc_antic(nom):
+#Fitxers de bloc d'abans que els blocs de l'escombrat tinguessin mida fixa (bloc_{b}_{n}.json, amb n les
+#simulacions del bloc): en canviar N l'últim bloc canviava de nom, i ara ja no es fan servir
+    parts = nom[:-len(".json")].split("_") if nom.endswith(".json") else []
+    return len(parts) == 3 and parts[0] == "bloc" and parts[1].isdigit() and parts[2].isdigit()
+
+
+def _llegir_bloc_cella(carpeta, b, mida, n):
+#Acumuladors (retirar-se, no retirar-se) de les n primeres partides del bloc b d'una cel·la desats a 'carpeta',
+#o None si no hi són. Un bloc sencer es llegeix de bloc_{b}.json; si només en compten les primeres n partides
+#(l'últim bloc, quan N no és múltiple de la mida) es refan a partir de les files desades a bloc_{b}_files.json
+    cami = os.path.join(carpeta, f"bloc_{b}.json" if n == mida else f"bloc_{b}_files.json")
+    if not os.path.exists(cami):
+        return None
+    with open(cami, encoding="utf-8") as f:
+        desat = json.load(f)
+    if desat["mida"] != mida:
+        return None
+    if n == mida:
+        return tuple(Acumulador.des_de_estat(e) for e in desat["acumuladors"])
+    return tuple(_acumulador_files(files[:n]) for files in desat["files"])
+
+
+def _acumulador_files(files):
+#Acumulador de les files (tirades, balanç, total apostat, caiguda màxima, ruïna) d'un bloc
+    acum = Acumulador()
+    for fila in files:
+        acum.afegir(*fila)
+    return acum
+
+
+def _desar_json(cami, dades):
+#Desa 'dades' en JSON de manera atòmica (fitxer temporal que després substitueix l'anterior)
+    os.makedirs(os.path.dirname(cami), exist_ok=True)
+    with open(cami + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(dades, f)
+    os.replace(cami + ".tmp", cami)
+
+
+def escombrar(estrategies, bases, maxims, rondes, N, llavor, directori_cache=None, processos=None,
+              disposicio="vermell"):
+    """
+    Avalua totes les combinacions (estratègia, aposta base, aposta màxima, R) amb N simulacions.
+    Cada cel·la es divideix en blocs de mida fixa (_mida_bloc(R)), cadascun amb la seva llavor, i
+    els acumuladors de cada bloc es desen a 'directori_cache' sota el hash dels paràmetres i la
+    llavor. Si N no és múltiple de la mida, l'últim bloc també es simula sencer (se'n desen les
+    files) i només se'n compten les primeres partides en agregar-lo. Així cap bloc depèn de N, i
+    ampliar la graella o augmentar N només calcula els blocs que falten. Tots els blocs pendents
+    de totes les cel·les s'executen junts al grup de processos.
+    Retorna una fila per cel·la amb les mitjanes, les esperances, els acumuladors i quants blocs
+    s'han calculat ara. Totes les cel·les juguen amb la mateixa 'disposicio' d'apostes.
+    """
+    disposicio = _disposicio(disposicio).text
+    celles = list(itertools.product(estrategies, bases, maxims, rondes))
+    #Partides que compten de cada bloc de la cel·la (totes, menys potser a l'últim); la mida depèn de R
+    blocs = {R: [min(_mida_bloc(R), N - inici + 1) for inici in range(1, N + 1, _mida_bloc(R))] for R in rondes}
+
+    #Blocs ja calculats (memòria cau) i blocs pendents
+    parcials = {}
+    pendents = []
+    for cella in celles:
+        mida = _mida_bloc(cella[3])
+        carpeta = directori_cache and os.path.join(directori_cache, _clau_cella(cella[0], *cella[1:], llavor, disposicio))
+        if carpeta and os.path.isdir(carpeta):
+            for nom in os.listdir(carpeta):
+                if _es_bloc_antic(nom):
+                    os.remove(os.path.join(carpeta, nom))
+        for b, n in enumerate(blocs[cella[3]]):
+            desat = carpeta and _llegir_bloc_cella(carpeta, b, mida, n)
+            if desat:
+                parcials[(cella, b)] = desat
+            else:
+                pendents.append((cella, b, carpeta))
+
+    #Cada bloc pendent se simula sencer; de l'últim bloc incomplet també se'n guarden les files
+    tasques = []
+    for (estr, base, maxim, R), b, _ in pendents:
+        mida = _mida_bloc(R)
+        max_files = 0 if blocs[R][b] == mida else None
+        for retirar, ll in zip((True, False), _llavors_bloc(llavor, b)):
+            tasques.append((estr, R, retirar, b * mida + 1, mida, ll, max_files, base, maxim, None, None, disposicio))
+    processos = _nombre_processos(processos)
+    if processos == 1 or len(tasques) <= 2:
+        resultats = [_simular_bloc(*t) for t in tasques]
+    else:
+        with _grup_processos(processos) as executor:
+            resultats = list(executor.map(_simular_bloc, *zip(*tasques)))
+
+    #Es desen els blocs nous a la memòria cau (en JSON, amb l'estat de cada acumulador i, si cal, les files)
+    for k, (cella, b, carpeta) in enumerate(pendents):
+        (acum_ret, files_ret), (acum_no, files_no) = resultats[2 * k], resultats[2 * k + 1]
+        mida, n = _mida_bloc(cella[3]), blocs[cella[3]][b]
+        files = [[fila[1:] for fila in files_ret], [fila[1:] for fila in files_no]] if n < mida else None
+        if carpeta:
+            _desar_json(os.path.join(carpeta, f"bloc_{b}.json"),
+                        {"mida": mida, "acumuladors": [acum_ret.estat(), acum_no.estat()]})
+            if files:
+                _desar_json(os.path.join(carpeta, f"bloc_{b}_files.json"), {"mida": mida, "files": files})
+        parcials[(cella, b)] = (acum_ret, acum_no) if n == mida else tuple(_acumulador_files(f[:n]) for f in files)
+
+    files = []
+    for cella in celles:
+        acum_ret, acum_no = Acumulador(), Acumulador()
+        for b in range(len(blocs[cella[3]])):
+            acum_ret.combinar(parcials[(cella, b)][0])
+            acum_no.combinar(parcials[(cella, b)][1])
+        estr, base, maxim, R = cella
+        files.append({
+            "estr": estr, "base": base, "maxim": maxim, "R": R, "N": N,
+            "mitjana_ret": acum_ret.mitjana, "esperanca_ret": acum_ret.esperanca,
+            "mitjana_no": acum_no.mitjana, "esperanca_no": acum_no.esperanca,
+            "acum_ret": acum_ret, "acum_no": acum_no,
+            "blocs_calculats": sum(1 for c, _, _ in pendents if c == cella),
+        })
+    return files
+
+#Memòria cau persistent de resultats
+
+#Directori i mida màxima (en bytes) per defecte de la memòria cau de resultats
+DIRECTORI_MEMORIA = os.path.join(os.path.expanduser("~"), ".ruleta_resultats")
+MIDA_MAXIMA_MEMORIA = 2 * 1024 ** 3
+
+
+class MemoriaResultats:
+    """
+    Memòria cau a disc dels resultats complets de cada execució, per tornar-los a mostrar o fer-ne
+    l'informe sense simular res. Cada execució es desa en una carpeta pròpia amb les columnes de
+    MagatzemResultats (fitxers .npy, que s'obren mapats a memòria) i un resum (resum.pkl) amb la
+    resta del diccionari de resultats (esperances exactes, acumuladors com a Acumulador.estat()...),
+    només amb dades simples perquè es pugui llegir tant des del programa com des del mòdul importat.
+    Com que també hi ha resultats.json (vegeu _desar_configuracio), cada carpeta es pot passar a
+    l'ordre 'report'. Un índex SQLite
+    (index.sqlite) guarda la configuració, la mida i l'últim ús de cada execució.
+    La clau és el hash de la configuració: estratègia, paràmetres, R, N, llavor i versió del motor.
+    Quan la mida total supera 'mida_maxima' s'esborren les execucions usades fa més temps (LRU).
+    """
+    #Errors en llegir una execució desada (carpeta incompleta o resum d'un format antic)
+    ERRORS_LECTURA = (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, KeyError, TypeError)
+
+    def __init__(self, directori=DIRECTORI_MEMORIA, mida_maxima=MIDA_MAXIMA_MEMORIA):
+        self.directori = directori
+        self.mida_maxima = mida_maxima
+        os.makedirs(directori, exist_ok=True)
+        #Carpetes temporals d'execucions cancel·lades que no s'han pogut esborrar (per exemple, a Windows)
+        for nom in os.listdir(directori):
+            cami = os.path.join(directori, nom)
+            if nom.startswith("tmp-") and time.time() - os.path.getmtime(cami) > 86400:
+                shutil.rmtree(cami, ignore_errors=True)
+        with self._connexio() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS execucions (clau TEXT PRIMARY KEY, configuracio TEXT, "
+                        "estr TEXT, R INTEGER, N INTEGER, llavor TEXT, disposicio TEXT, files INTEGER, "
+                        "mida INTEGER, creada REAL, ultim_us REAL)")
+
+    @contextlib.contextmanager
+    def _connexio(self):
+#Connexió nova a l'índex per a cada operació (es pot fer servir des de qualsevol fil), amb una transacció
+        con = sqlite3.connect(os.path.join(self.directori, "index.sqlite"), timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    @staticmethod
+    def clau(configuracio):
+#Hash de la configuració d'una execució
+        return hashlib.sha256(json.dumps(configuracio, sort_keys=True).encode()).hexdigest()[:32]
+
+    def carpeta(self, configuracio):
+#Carpeta on es desen els resultats de la configuració
+        return os.path.join(self.directori, self.clau(configuracio))
+
+    def carpeta_temporal(self):
+#Carpeta nova on una execució escriu les files abans de saber si acabarà (vegeu desar)
+        return tempfile.mkdtemp(prefix="tmp-", dir=self.directori)
+
+    def buscar(self, configuracio, amb_files=True):
+#Resultats desats d'aquesta configuració (amb les files de cada simulació, si amb_files), o None
+        clau = self.clau(configuracio)
+        with self._connexio() as con:
+            fila = con.execute("SELECT files FROM execucions WHERE clau = ?", (clau,)).fetchone()
+        if fila is None or (amb_files and not fila[0]):
+            return None
+        try:
+            return self.carregar(clau)
+        except self.ERRORS_LECTURA:
+            #Carpeta esborrada o incompleta, o resum en un format antic: es treu de l'índex i es tornarà a simular
+            self.esborrar(clau)
+            return None
+
+    def carregar(self, clau):
+#Obre els resultats desats amb aquesta clau i n'actualitza l'últim ús
+        carpeta = os.path.join(self.directori, clau)
+        with open(os.path.join(carpeta, "resum.pkl"), "rb") as f:
+            dades = pickle.load(f)
+        for nom in ("acum_ret", "acum_no"):
+            dades[nom] = Acumulador.des_de_estat(dades[nom])
+        for mode, nom in [("retirar", "ret"), ("no_retirar", "no")]:
+            dades[f"finals_{nom}"] = (MagatzemResultats.obrir(os.path.join(carpeta, mode))
+                                      if dades["files"] else [])
+        dades["memoria"] = True
+        with self._connexio() as con:
+            con.execute("UPDATE execucions SET ultim_us = ? WHERE clau = ?", (time.time(), clau))
+        return dades
+
+    def desar(self, configuracio, dades, moure=False):
+#Desa una execució acabada i aplica el límit de mida. Les columnes de les files es copien a carpeta() (amb
+#moure=True, s'hi mouen); retorna els resultats amb les files obertes des de la memòria cau
+        clau = self.clau(configuracio)
+        carpeta = os.path.join(self.directori, clau)
+        shutil.rmtree(carpeta, ignore_errors=True)
+        os.makedirs(carpeta, exist_ok=True)
+        files = isinstance(dades["finals_ret"], MagatzemResultats)
+        if files:
+            dades = dict(dades)
+            for mode, nom in [("retirar", "ret"), ("no_retirar", "no")]:
+                origen, desti = dades[f"finals_{nom}"].directori, os.path.join(carpeta, mode)
+                if moure:
+                    dades[f"finals_{nom}"].tancar()
+                    shutil.move(origen, desti)
+                else:
+                    dades[f"finals_{nom}"].desar()
+                    shutil.copytree(origen, desti)
+                dades[f"finals_{nom}"] = MagatzemResultats.obrir(desti)
+        _desar_configuracio(carpeta, dades)
+        resum = {k: v for k, v in dades.items() if k not in ("finals_ret", "finals_no")}
+        resum["acum_ret"], resum["acum_no"] = dades["acum_ret"].estat(), dades["acum_no"].estat()
+        with open(os.path.join(carpeta, "resum.pkl.tmp"), "wb") as f:
+            pickle.dump(dict(resum, files=files), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(os.path.join(carpeta, "resum.pkl.tmp"), os.path.join(carpeta, "resum.pkl"))
+        mida = sum(os.path.getsize(os.path.join(arrel, fitxer))
+                   for arrel, _, fitxers in os.walk(carpeta) for fitxer in fitxers)
+        ara = time.time()
+        with self._connexio() as con:
+            con.execute("INSERT OR REPLACE INTO execucions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (clau, json.dumps(configuracio, sort_keys=True), dades["estr"], dades["R"], dades["N"],
+                         str(dades["llavor"]), dades["disposicio"], int(files), mida, ara, ara))
+        self._expulsar(conservar=clau)
+        return dades
+
+    def esborrar(self, clau):
+#Treu una execució de l'índex i n'esborra la carpeta
+        with self._connexio() as con:
+            con.execute("DELETE FROM execucions WHERE clau = ?", (clau,))
+        #Si les columnes encara són obertes (per exemple a Windows) la carpeta pot no esborrar-se del tot
+        shutil.rmtree(os.path.join(self.directori, clau), ignore_errors=True)
+
+    def _expulsar(self, conservar=None):
+#Esborra les execucions usades fa més temps fins que la mida total no supera mida_maxima
+        with self._connexio() as con:
+            files = con.execute("SELECT clau, mida FROM execucions ORDER BY ultim_us DESC").fetchall()
+        total = sum(mida for _, mida in files)
+        for clau, mida in reversed(files):
+            if total <= self.mida_maxima:
+                break
+            if clau != conservar:
+                self.esborrar(clau)
+                total -= mida
+
+    def execucions(self):
+#Execucions desades, de la més recent a la més antiga (per mostrar-les en una llista)
+        with self._connexio() as con:
+            files = con.execute("SELECT clau, configuracio, N, files, mida, creada, ultim_us FROM execucions "
+                                "ORDER BY ultim_us DESC").fetchall()
+        return [{"clau": clau, "configuracio": json.loads(configuracio), "N": N, "files": bool(amb_files),
+                 "mida": mida, "creada": creada, "ultim_us": ultim_us}
+                for clau, configuracio, N, amb_files, mida, creada, ultim_us in files]
+
+#Comparació d'estratègies amb nombres aleatoris comuns
+
+def _interval(acum, z=1.96):
+#Mitjana i semiamplada de l'interval de confiança (95% per defecte) de la mitjana d'un acumulador
+    return acum.mitjana, z * math.sqrt(acum.variancia / acum.n) if acum.n else 0.0
+
+
+class MomentsConjunts:
+    """
+    Mitjanes i comoments (sumes dels productes de desviacions) de diverses variables observades
+    alhora a cada partida, que es combinen entre blocs amb la fórmula de Chan com l'Acumulador.
+    La comparació d'estratègies els fa servir amb (balanç, apostat) d'una configuració i de la
+    referència, per donar l'interval de la diferència aparellada d'esperances.
+    """
+    def __init__(self, variables=4):
+        self.n = 0
+        self.mitjana = np.zeros(variables)
+        self.comoments = np.zeros((variables, variables))
+
+    def afegir_lot(self, *columnes):
+#Afegeix un lot de partides (una columna de la mateixa longitud per variable)
+        lot = MomentsConjunts(len(columnes))
+        x = np.column_stack(columnes).astype(float)
+        lot.n = len(x)
+        if lot.n:
+            lot.mitjana = x.mean(axis=0)
+            d = x - lot.mitjana
+            lot.comoments = d.T @ d
+        self.combinar(lot)
+
+    def combinar(self, altre):
+        if altre.n == 0:
+            return
+        n = self.n + altre.n
+        delta = altre.mitjana - self.mitjana
+        self.comoments = self.comoments + altre.comoments + np.outer(delta, delta) * self.n * altre.n / n
+        self.mitjana = self.mitjana + delta * altre.n / n
+        self.n = n
+
+    def interval_diferencia_esperances(self, confianca=0.95):
+#Diferència d'esperances (balanç / apostat) de les variables (0, 1) menys les (2, 3) i semiamplada de
+#l'interval de confiança pel mètode delta, amb la covariància entre les dues configuracions
+        s_c, a_c, s_r, a_r = self.mitjana
+        if self.n < 2 or not a_c or not a_r:
+            return (s_c / a_c if a_c else 0.0) - (s_r / a_r if a_r else 0.0), math.inf
+        gradient = np.array([1 / a_c, -s_c / a_c ** 2, -1 / a_r, s_r / a_r ** 2])
+        variancia = gradient @ (self.comoments / (self.n - 1)) @ gradient / self.n
+        z = statistics.NormalDist().inv_cdf((1 + confianca) / 2)
+        return s_c / a_c - s_r / a_r, z * math.sqrt(max(float(variancia), 0.0))
+
+
+def _comparar_bloc(R, n, llavor, estrategies, referencia, disposicio="vermell"):
+    """
+    Juga un bloc de n partides amb les mateixes tirades per a totes les estratègies i els dos
+    modes (retirar-se i no retirar-se). Les tirades es generen una sola vegada per tirada i
+    partida; les apostes de l'estratègia aleatòria surten d'un generador a part, perquè no
+    alterin la seqüència de tirades. Retorna un Acumulador per configuració (estratègia, retirar),
+    un per a cada diferència aparellada respecte la referència, un per a cada diferència
+    retirar-se menys no retirar-se de cada estratègia i uns MomentsConjunts per configuració
+    amb el balanç i l'apostat de la configuració i de la referència.
+    """
+    rng_tirades, rng_apostes = GeneradorAleatori(llavor).fills(2)
+    configuracions = [(nom, retirar) for nom in estrategies for retirar in (True, False)]
+    lots = {c: LotPartides(c[0], R, n, c[1], rng_apostes, disposicio=disposicio) for c in configuracions}
+
+    for i in range(1, R + 1):
+        numeros = rng_tirades.integers(0, 37, size=n)
+        for lot in lots.values():
+            if not lot.acabat:
+                lot.pas(i, numeros[lot.actives] if lot.filtrar else numeros)
+
+    acums, difs_ref, difs_modes, moments = {}, {}, {}, {}
+    zeros = np.zeros(n, dtype=np.int64)
+    ref = lots[referencia]
+    for c, lot in lots.items():
+        acums[c] = Acumulador()
+        acums[c].afegir_lot(lot.tirades, lot.saldo, lot.total_apostat, lot.caiguda, lot.arruinada)
+        difs_ref[c] = Acumulador()
+        difs_ref[c].afegir_lot(zeros, lot.saldo - ref.saldo, zeros)
+        moments[c] = MomentsConjunts()
+        moments[c].afegir_lot(lot.saldo, lot.total_apostat, ref.saldo, ref.total_apostat)
+    for nom in estrategies:
+        difs_modes[nom] = Acumulador()
+        difs_modes[nom].afegir_lot(zeros, lots[(nom, True)].saldo - lots[(nom, False)].saldo, zeros)
+    return acums, difs_ref, difs_modes, moments
+
+
+def comparar_estrategies(R, N, llavor=None, estrategies=None, referencia=("Sempre el mateix valor", False),
+                         processos=None, disposicio="vermell"):
+    """
+    Compara totes les estratègies i els dos modes amb nombres aleatoris comuns: cada simulació
+    genera una sola seqüència de tirades, que juguen totes les configuracions. Com que les
+    configuracions comparteixen l'atzar, les diferències aparellades tenen molta menys variància
+    que si s'executessin per separat. Requereix NumPy.
+    Retorna un diccionari amb una fila per configuració (balanç mitjà i esperança amb interval
+    del 95%, i diferències aparellades de balanç i d'esperança respecte 'referencia') i la
+    diferència retirar-se menys no retirar-se de cada estratègia. Totes les configuracions fan
+    les apostes de 'disposicio'.
+    """
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("La comparació d'estratègies requereix NumPy (pip install numpy)")
+    if llavor is None:
+        llavor = llavor_nova()
+    estrategies = list(estrategies or ESTRATEGIES)
+    if referencia[0] not in estrategies:
+        #La referència sempre es juga, encara que no sigui una de les estratègies demanades
+        estrategies.append(referencia[0])
+    processos = _nombre_processos(processos)
+    disposicio = _disposicio(disposicio).text
+
+    #Blocs de _mida_bloc(R) partides, com a executar_simulacions, cadascun amb una llavor derivada de la mestra
+    #(SeedSequence.spawn), de manera que el resultat no depèn del nombre de processos
+    mida = _mida_bloc(R)
+    blocs = [min(mida, N - inici) for inici in range(0, N, mida)]
+    llavors = np.random.SeedSequence(llavor).spawn(len(blocs))
+    arguments = ([R] * len(blocs), blocs, llavors, [estrategies] * len(blocs), [referencia] * len(blocs),
+                 [disposicio] * len(blocs))
+
+    acums, difs_ref, difs_modes, moments = {}, {}, {}, {}
+
+    def unir(parcials):
+        for parcial in parcials:
+            for total, bloc, nou in zip((acums, difs_ref, difs_modes, moments), parcial,
+                                        (Acumulador, Acumulador, Acumulador, MomentsConjunts)):
+                for clau, valor in bloc.items():
+                    total.setdefault(clau, nou()).combinar(valor)
+
+    if processos == 1 or len(blocs) == 1:
+        unir(map(_comparar_bloc, *arguments))
+    else:
+        executor = _grup_processos(processos)
+        try:
+            unir(executor.map(_comparar_bloc, *arguments))
+        finally:
+            #Si falla un bloc, els pendents no s'arriben a executar
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    files = []
+    for (nom, retirar), acum in acums.items():
+        mitjana, ic = _interval(acum)
+        dif, ic_dif = _interval(difs_ref[(nom, retirar)])
+        dif_esperanca, ic_dif_esperanca = moments[(nom, retirar)].interval_diferencia_esperances()
+        files.append({"estr": nom, "retirar": retirar, "mitjana": mitjana, "ic": ic,
+                      "esperanca": acum.esperanca, "ic_esperanca": acum.interval_esperanca(),
+                      "dif_ref": dif, "ic_dif_ref": ic_dif,
+                      "dif_esperanca_ref": dif_esperanca, "ic_dif_esperanca_ref": ic_dif_esperanca})
+    return {
+        "R": R, "N": N, "llavor": llavor, "referencia": referencia, "disposicio": disposicio, "files": files,
+        "dif_modes": {nom: _interval(acum) for nom, acum in difs_modes.items()},
     }
-    return textos.get(nom, "")
+
+#Proves de rendiment
+
+#Mides (R, N) per defecte de les proves de rendiment
+MIDES_BENCHMARK = [(100, 20000), (1000, 100000)]
+#Partides que es juguen amb Simulador.jugar a cada prova (el motor tirada a tirada és molt més lent)
+PARTIDES_BENCHMARK_ESCALAR = 2000
+
+
+def _prova(proves, nom, R, N, funcio, repeticions=1, **camps):
+#Executa la funció 'repeticions' vegades, es queda amb el millor temps i l'afegeix a les proves.
+#La funció retorna les tirades jugades (per calcular les tirades per segon) o None
+    millor, tirades = None, None
+    for _ in range(repeticions):
+        inici = time.perf_counter()
+        tirades = funcio()
+        durada = time.perf_counter() - inici
+        millor = durada if millor is None else min(millor, durada)
+    prova = {"prova": nom, "R": R, "N": N, **camps, "segons": millor}
+    if tirades is not None:
+        prova["tirades_per_segon"] = tirades / millor if millor else None
+    proves.append(prova)
+    return prova
+
+
+def _temps_finestra_resultats(dades):
+#Temps d'obrir i dibuixar la finestra de resultats (cal una pantalla per a tkinter). La interfície es crea
+#sense memòria cau, per no crear ni tocar la de l'usuari
+    _carregar_gui()
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        app = App(root, directori_memoria=None)
+        inici = time.perf_counter()
+        app._mostrar_resultats_window(dades)
+        app.result_window.update_idletasks()
+        return time.perf_counter() - inici
+    finally:
+        root.destroy()
+
+
+def executar_benchmarks(mides=MIDES_BENCHMARK, estrategies=None, llavor=0, processos=None, repeticions=1,
+                        progres=None):
+    """
+    Proves de rendiment del camí crític de la simulació, per a cada mida (R, N):
+     - Simulador.jugar per estratègia (PARTIDES_BENCHMARK_ESCALAR partides sense retirar-se).
+     - simular_lot per estratègia (motor vectoritzat, si hi ha NumPy).
+     - executar_simulacions de cap a cap, com el botó "Calcular resultats" (amb tots els processos
+       i guardant totes les files), amb el temps de cada fase (Cronometres).
+     - La finestra de resultats i generar_informe_pdf amb aquestes dades, si hi ha pantalla i reportlab.
+    Les proves que no es poden fer queden a la llista amb el motiu ('omesa').
+    Retorna un diccionari serialitzable en JSON amb l'entorn i els resultats, per comparar-lo entre versions.
+    """
+    estrategies = estrategies or ESTRATEGIES
+    proves = []
+    for R, N in mides:
+        if progres is not None:
+            progres(f"R={R} N={N}")
+        partides = min(N, PARTIDES_BENCHMARK_ESCALAR)
+        for nom in estrategies:
+            def escalar():
+                simulador = Simulador(crear_estrategia(nom), R, GeneradorAleatori(llavor))
+                return sum(simulador.jugar(retirar=False)[0] for _ in range(partides))
+            _prova(proves, "Simulador.jugar", R, partides, escalar, repeticions, estrategia=nom)
+            if NUMPY_AVAILABLE:
+                _prova(proves, "simular_lot", R, N,
+                       lambda: int(simular_lot(nom, R, N, retirar=False, rng=GeneradorAleatori(llavor))[0].sum()),
+                       repeticions, estrategia=nom)
+
+        #De cap a cap amb la primera estratègia: simulació, agregació i càlculs exactes
+        cronometres = Cronometres()
+        dades = {}
+
+        def calcular():
+            dades.update(executar_simulacions(estrategies[0], R, N, llavor=llavor, processos=processos,
+                                              max_files=None, cronometres=cronometres))
+            return dades["acum_ret"].suma_tirades + dades["acum_no"].suma_tirades
+        prova = _prova(proves, "executar_simulacions", R, N, calcular, estrategia=estrategies[0])
+        prova["fases"] = cronometres.diccionari()
+
+        finestra = {"prova": "finestra de resultats", "R": R, "N": N, "estrategia": estrategies[0]}
+        try:
+            finestra["segons"] = _temps_finestra_resultats(dades)
+        except Exception as e:
+            finestra.update(segons=None, omesa=f"No s'ha pogut obrir la finestra: {e}")
+        proves.append(finestra)
+        if _carregar_reportlab():
+            cronometres_pdf = Cronometres()
+            with tempfile.TemporaryDirectory() as carpeta:
+                _prova(proves, "generar_informe_pdf", R, N,
+                       lambda: generar_informe_pdf(dades, os.path.join(carpeta, "informe.pdf"),
+                                                   cronometres=cronometres_pdf), estrategia=estrategies[0])
+            proves[-1]["fases"] = cronometres_pdf.diccionari()
+        else:
+            proves.append({"prova": "generar_informe_pdf", "R": R, "N": N, "estrategia": estrategies[0],
+                           "segons": None, "omesa": "reportlab no està disponible"})
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "versio_motor": VERSIO_MOTOR,
+        "python": platform.python_version(),
+        "numpy": np.__version__ if NUMPY_AVAILABLE else None,
+        "plataforma": platform.platform(),
+        "processadors": os.cpu_count(),
+        "processos": processos or os.cpu_count() or 1,
+        "llavor": llavor,
+        "proves": proves,
+    }
+
+
+def comparar_benchmarks(anterior, actual):
+#Quocient de temps (actual / anterior) de les proves que coincideixen (mateixa prova, estratègia, R i N)
+    clau = lambda p: (p["prova"], p.get("estrategia"), p["R"], p["N"])
+    temps_anteriors = {clau(p): p["segons"] for p in anterior["proves"] if p.get("segons")}
+    return [(p, p["segons"] / temps_anteriors[clau(p)]) for p in actual["proves"]
+            if p.get("segons") and clau(p) in temps_anteriors]
+
+#Execució sense interfície (línia d'ordres)
+
+def comprovar_format_sortida(fitxer):
+#Comprova que el format del fitxer (segons l'extensió) es pot escriure amb les dependències instal·lades,
+#abans de simular res; si no, es produeix un ValueError
+    import importlib.util
+    ext = os.path.splitext(fitxer)[1].lower()
+    if ext not in (".csv", ".npy", ".parquet"):
+        raise ValueError(f"Format de sortida no suportat: {ext or fitxer} (s'admet .csv, .npy o .parquet)")
+    if ext != ".csv" and not NUMPY_AVAILABLE:
+        raise ValueError("Per desar en .npy o .parquet cal tenir NumPy instal·lat")
+    if ext == ".parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("Per desar en .parquet cal tenir pyarrow instal·lat")
+
+
+def desar_resultats(dades, fitxer):
+#Desa les dades de cada simulació en un fitxer .csv, .npy o .parquet (segons l'extensió)
+    comprovar_format_sortida(fitxer)
+    ret, no = dades["finals_ret"], dades["finals_no"]
+    if not isinstance(ret, MagatzemResultats):
+        #Sense NumPy només es pot desar en CSV, fila a fila
+        import csv
+        with open(fitxer, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["retirar"] + list(MagatzemResultats.COLUMNES))
+            w.writerows([(1,) + fila for fila in ret] + [(0,) + fila for fila in no])
+        return
+    #Una part per mode, amb la columna 'retirar' constant (1 = es retira, 0 = no es retira)
+    escriure_columnes([{"retirar": np.int8(1), **{c: ret.columna(c) for c in MagatzemResultats.COLUMNES}},
+                       {"retirar": np.int8(0), **{c: no.columna(c) for c in MagatzemResultats.COLUMNES}}], fitxer)
+
+
+def _disposicio_arg(valor):
+#Valida el text d'una disposició d'apostes de la línia d'ordres i el retorna en forma canònica
+    try:
+        return Disposicio(valor).text
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _mida_benchmark(valor):
+#Converteix una mida de prova de rendiment "RxN" (per exemple 1000x1e5) en la tupla (R, N)
+    try:
+        R, N = valor.lower().split("x")
+        return _enter_positiu(R), _enter_positiu(N)
+    except (ValueError, argparse.ArgumentTypeError):
+        raise argparse.ArgumentTypeError(f"Mida no vàlida: '{valor}' (format RxN, per exemple 1000x100000)")
+
+
+def _enter_positiu(valor):
+#Converteix un valor de la línia d'ordres en un enter positiu (admet notació com 1e6)
+    try:
+        n = int(float(valor))
+    except (ValueError, OverflowError):
+        raise argparse.ArgumentTypeError(f"'{valor}' no és un nombre vàlid")
+    if n <= 0:
+        raise argparse.ArgumentTypeError("el valor ha de ser positiu")
+    return n
+
+
+def _sortida_arg(valor):
+#Valida el fitxer de sortida de la línia d'ordres abans de simular (vegeu comprovar_format_sortida)
+    try:
+        comprovar_format_sortida(valor)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return valor
+
+
+def _llavor_arg(valor):
+#Converteix una llavor de la línia d'ordres en un enter no negatiu (SeedSequence no admet llavors negatives)
+    try:
+        llavor = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{valor}' no és un enter vàlid")
+    if llavor < 0:
+        raise argparse.ArgumentTypeError("la llavor no pot ser negativa")
+    return llavor
+
+
+def _real_positiu(valor):
+#Converteix un valor de la línia d'ordres en un nombre real positiu (per exemple, la precisió)
+    try:
+        x = float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{valor}' no és un nombre vàlid")
+    if not 0 < x < math.inf:
+        raise argparse.ArgumentTypeError("el valor ha de ser positiu")
+    return x
+
+
+def _probabilitat(valor):
+#Converteix un valor de la línia d'ordres en un nombre estrictament entre 0 i 1 (per exemple, la confiança)
+    try:
+        x = float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{valor}' no és un nombre vàlid")
+    if not 0 < x < 1:
+        raise argparse.ArgumentTypeError("el valor ha de ser entre 0 i 1 (sense incloure'ls)")
+    return x
+
+
+def main(argv=None):
+    """
+    Punt d'entrada del programa. Sense arguments obre la interfície gràfica.
+    Amb l'ordre 'simulate' executa les simulacions sense interfície, per exemple:
+        python simulador.py simulate --strategy Martingala -R 1000 -N 1e6 --seed 42 --out results.parquet
+    Amb --plugin (abans de l'ordre) es carreguen estratègies externes (vegeu carregar_plugins).
+    """
+    #Els plugins es carreguen abans de definir les opcions, perquè les seves estratègies hi surtin
+    previ = argparse.ArgumentParser(add_help=False)
+    previ.add_argument("--plugin", action="append", default=[])
+    carregar_plugins(previ.parse_known_args(argv)[0].plugin)
+
+    parser = argparse.ArgumentParser(description="Simulador de la Ruleta Europea")
+    parser.add_argument("--plugin", action="append", default=[],
+                        help="Fitxer .py o mòdul amb estratègies externes (es pot repetir)")
+    ordres = parser.add_subparsers(dest="ordre")
+    sim = ordres.add_parser("simulate", help="Executa les simulacions sense interfície gràfica")
+    sim.add_argument("--strategy", required=True, choices=ESTRATEGIES, help="Estratègia d'aposta")
+    sim.add_argument("-R", type=_enter_positiu, required=True, help="Tirades per simulació")
+    sim.add_argument("-N", type=_enter_positiu, default=None,
+                     help="Nombre de simulacions (amb --precision, el màxim)")
+    sim.add_argument("--precision", type=_real_positiu, default=None,
+                     help="Simula fins que l'interval de confiança de les esperances sigui ± aquest valor")
+    sim.add_argument("--confidence", type=_probabilitat, default=0.95, help="Nivell de confiança (amb --precision)")
+    sim.add_argument("--seed", type=_llavor_arg, default=None, help="Llavor mestra (per repetir resultats)")
+    sim.add_argument("--base", type=_enter_positiu, default=1, help="Aposta base")
+    sim.add_argument("--cap", type=_enter_positiu, default=APOSTA_MAXIMA, help="Aposta màxima de la taula")
+    sim.add_argument("--bets", type=_disposicio_arg, default="vermell",
+                     help="Apostes de cada tirada, per exemple 'vermell' o '2*vermell+ple0' (vegeu Disposicio)")
+    sim.add_argument("--bankroll", type=_enter_positiu, default=None,
+                     help="Capital inicial: la partida s'arruïna quan no pot cobrir la següent aposta")
+    sim.add_argument("--take-profit", type=_enter_positiu, default=None,
+                     help="Guany amb què el jugador es planta")
+    sim.add_argument("--processes", type=_enter_positiu, default=None, help="Processos a utilitzar")
+    sim.add_argument("--out", type=_sortida_arg, default=None, help="Fitxer de sortida (.csv, .npy o .parquet)")
+    sim.add_argument("--sample", type=_enter_positiu, default=None,
+                     help="Desa només una mostra aleatòria d'aquestes files per mode (amb --out, --save-dir o --pdf)")
+    sim.add_argument("--save-dir", default=None,
+                     help="Directori on desar els resultats per columnes (per a l'ordre 'report')")
+    sim.add_argument("--pdf", default=None, help="Genera també l'informe PDF")
+    sim.add_argument("--exact", action="store_true",
+                     help="Calcula l'esperança exacta sense retirar-se (pot ser lent per a R grans)")
+    sim.add_argument("--exact-loss", action="store_true",
+                     help="Calcula la probabilitat exacta d'acabar perdent sense retirar-se (pot ser lent)")
+    sim.add_argument("--timings", action="store_true", help="Mostra el temps de cada fase (simulació, agregació...)")
+    sim.add_argument("--checkpoint", default=None,
+                     help="Directori on es desa periòdicament l'estat; si ja en té, l'execució es reprèn")
+    sim.add_argument("--results-cache", nargs="?", const=DIRECTORI_MEMORIA, default=None,
+                     help="Memòria cau de resultats: si ja hi són, no es simula res (directori opcional)")
+    sim.add_argument("--cache-size", type=_enter_positiu, default=MIDA_MAXIMA_MEMORIA // 1024 ** 2,
+                     help="Mida màxima de la memòria cau de resultats, en MB")
+    comp = ordres.add_parser("compare", help="Compara totes les estratègies amb les mateixes tirades")
+    comp.add_argument("-R", type=_enter_positiu, required=True, help="Tirades per simulació")
+    comp.add_argument("-N", type=_enter_positiu, required=True, help="Nombre de simulacions")
+    comp.add_argument("--seed", type=_llavor_arg, default=None, help="Llavor mestra (per repetir resultats)")
+    comp.add_argument("--processes", type=_enter_positiu, default=None, help="Processos a utilitzar")
+    comp.add_argument("--bets", type=_disposicio_arg, default="vermell", help="Apostes de cada tirada")
+    comp.add_argument("--reference", choices=ESTRATEGIES, default="Sempre el mateix valor",
+                      help="Estratègia de referència (sense retirar-se) per a les diferències")
+    esc = ordres.add_parser("sweep", help="Escombrat de paràmetres amb memòria cau per cel·la")
+    esc.add_argument("--strategy", nargs="+", choices=ESTRATEGIES, default=ESTRATEGIES, help="Estratègies")
+    esc.add_argument("--base", nargs="+", type=_enter_positiu, default=[1], help="Apostes base")
+    esc.add_argument("--cap", nargs="+", type=_enter_positiu, default=[APOSTA_MAXIMA], help="Apostes màximes")
+    esc.add_argument("-R", nargs="+", type=_enter_positiu, required=True, help="Tirades per simulació")
+    esc.add_argument("-N", type=_enter_positiu, required=True, help="Simulacions per cel·la")
+    esc.add_argument("--seed", type=_llavor_arg, default=0, help="Llavor mestra")
+    esc.add_argument("--cache-dir", default=".ruleta_cache", help="Directori de la memòria cau")
+    esc.add_argument("--processes", type=_enter_positiu, default=None, help="Processos a utilitzar")
+    esc.add_argument("--bets", type=_disposicio_arg, default="vermell", help="Apostes de cada tirada")
+    inf = ordres.add_parser("report", help="Genera l'informe PDF de resultats desats amb --save-dir")
+    inf.add_argument("directori", help="Directori dels resultats")
+    inf.add_argument("--pdf", required=True, help="Fitxer PDF de sortida")
+    inf.add_argument("--max-detail", type=_enter_positiu, default=MAX_FILES_DETALL_PDF,
+                     help="Màxim de files per mode amb detall complet")
+    inf.add_argument("--sample", type=_enter_positiu, default=FILES_MOSTRA_PDF,
+                     help="Files de la mostra quan se supera --max-detail")
+    inf.add_argument("--timings", action="store_true", help="Mostra el temps de cada fase de l'informe")
+    inf.add_argument("--exact", action="store_true",
+                     help="Inclou l'esperança exacta sense retirar-se (pot ser lent per a R grans)")
+    ben = ordres.add_parser("bench", help="Proves de rendiment (resultats en JSON)")
+    ben.add_argument("--size", action="append", type=_mida_benchmark, default=None,
+                     help="Mida RxN, per exemple 1000x100000 (es pot repetir)")
+    ben.add_argument("--strategy", nargs="+", choices=ESTRATEGIES, default=None, help="Estratègies")
+    ben.add_argument("--seed", type=_llavor_arg, default=0, help="Llavor mestra")
+    ben.add_argument("--processes", type=_enter_positiu, default=None, help="Processos a utilitzar")
+    ben.add_argument("--repeat", type=_enter_positiu, default=1, help="Repeticions (es guarda el millor temps)")
+    ben.add_argument("--out", default=None, help="Fitxer JSON on desar els resultats")
+    ben.add_argument("--compare", default=None, help="Fitxer JSON d'una execució anterior per comparar-hi els temps")
+    exe = ordres.add_parser("runs", help="Llista les execucions desades a la memòria cau de resultats")
+    exe.add_argument("--results-cache", default=DIRECTORI_MEMORIA, help="Directori de la memòria cau")
+    args = parser.parse_args(argv)
+
+    if args.ordre is None:
+        _carregar_gui()
+        root = tk.Tk()      #Creació de la finestra base de Tkinter
+        App(root)           #Instanciació de la classe principal del simulador
+        root.mainloop()     #Bucle principal de l’aplicació (manté la finestra activa)
+        return 0
+
+    if args.ordre == "compare":
+        try:
+            comp = comparar_estrategies(args.R, args.N, llavor=args.seed, processos=args.processes,
+                                        referencia=(args.reference, False), disposicio=args.bets)
+        except RuntimeError as e:
+            parser.error(str(e))
+        print(f"Comparació amb tirades comunes  R={comp['R']}  N={comp['N']}  llavor={comp['llavor']}  "
+              f"apostes={comp['disposicio']}")
+        print(f"Referència: {args.reference} (no retirar-se). Intervals de confiança del 95%.")
+        print(f"{'Estratègia':<24}{'Mode':<15}{'Balanç mitjà':>22}{'Esperança':>22}{'Dif. balanç':>26}"
+              f"{'Dif. esperança':>26}")
+        for f in comp["files"]:
+            mode = "Retirar-se" if f["retirar"] else "No retirar-se"
+            print(f"{f['estr']:<24}{mode:<15}{f['mitjana']:>12.3f} ± {f['ic']:<7.3f}"
+                  f"{f['esperanca']:>12.5f} ± {f['ic_esperanca']:<7.5f}"
+                  f"{f['dif_ref']:>16.3f} ± {f['ic_dif_ref']:<7.3f}"
+                  f"{f['dif_esperanca_ref']:>16.5f} ± {f['ic_dif_esperanca_ref']:<7.5f}")
+        print("Diferència de balanç retirar-se menys no retirar-se:")
+        for nom, (dif, ic) in comp["dif_modes"].items():
+            print(f"  {nom:<24}{dif:>10.3f} ± {ic:.3f}")
+        return 0
+
+    if args.ordre == "sweep":
+        files = escombrar(args.strategy, args.base, args.cap, args.R, args.N, args.seed,
+                          directori_cache=args.cache_dir, processos=args.processes, disposicio=args.bets)
+        print(f"{'Estratègia':<24}{'Base':>6}{'Màxim':>8}{'R':>7}{'Esp. retirar':>14}{'Esp. no retirar':>17}{'Blocs nous':>12}")
+        for f in files:
+            print(f"{f['estr']:<24}{f['base']:>6}{f['maxim']:>8}{f['R']:>7}{f['esperanca_ret']:>14.5f}"
+                  f"{f['esperanca_no']:>17.5f}{f['blocs_calculats']:>12}")
+        return 0
+
+    if args.ordre == "report":
+        cronometres = Cronometres() if args.timings else None
+        dades = carregar_resultats(args.directori)
+        if args.exact:
+            with _mesura(cronometres, "càlcul exacte"):
+                afegir_exacta_no(dades)
+        generar_informe_pdf(dades, args.pdf, args.max_detail, args.sample, cronometres=cronometres)
+        print(f"S'ha generat l'informe: {args.pdf}")
+        if cronometres is not None:
+            print(f"Temps: {cronometres.resum()}")
+        return 0
+
+    if args.ordre == "runs":
+        memoria = MemoriaResultats(args.results_cache)
+        print(f"{'Data':<18}{'Estratègia':<24}{'R':>7}{'N':>12}{'Llavor':>22}  {'Apostes':<16}{'MB':>8}  Carpeta")
+        for e in memoria.execucions():
+            c = e["configuracio"]
+            print(f"{datetime.fromtimestamp(e['creada']).strftime('%d/%m/%Y %H:%M'):<18}{c['estr']:<24}{c['R']:>7}"
+                  f"{e['N']:>12}{c['llavor']:>22}  {c['disposicio']:<16}{e['mida'] / 1024 ** 2:>8.1f}  "
+                  f"{os.path.join(memoria.directori, e['clau']) if e['files'] else '(només resum)'}")
+        return 0
+
+    if args.ordre == "bench":
+        resultats = executar_benchmarks(args.size or MIDES_BENCHMARK, args.strategy, args.seed, args.processes,
+                                        args.repeat, progres=lambda text: print(f"Proves amb {text}..."))
+        for p in resultats["proves"]:
+            descripcio = f"{p['prova']:<24}{p.get('estrategia', ''):<24}R={p['R']:<7}N={p['N']:<10}"
+            if p["segons"] is None:
+                print(f"{descripcio}omesa: {p['omesa']}")
+            else:
+                velocitat = f"{p['tirades_per_segon']:>16,.0f} tirades/s" if p.get("tirades_per_segon") else ""
+                print(f"{descripcio}{p['segons']:>10.3f} s{velocitat}")
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                anterior = json.load(f)
+            print(f"Temps respecte de {args.compare} (< 1 és més ràpid):")
+            for p, quocient in comparar_benchmarks(anterior, resultats):
+                print(f"  {p['prova']:<24}{p.get('estrategia', ''):<24}R={p['R']:<7}N={p['N']:<10}{quocient:>8.2f}×")
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(resultats, f, indent=2, ensure_ascii=False)
+            print(f"Resultats desats a: {args.out}")
+        return 0
+
+    if args.N is None and args.precision is None:
+        parser.error("cal indicar -N o --precision")
+    #Amb --precision i sense -N, el màxim de simulacions és pràcticament il·limitat
+    N = args.N or 10 ** 12
+
+    #Les files de cada simulació només es guarden si s'han de desar
+    max_files = (args.sample if args.sample else None) if (args.out or args.save_dir or args.pdf) else 0
+    cronometres = Cronometres() if args.timings else None
+    dades = executar_simulacions(args.strategy, args.R, N, llavor=args.seed, processos=args.processes,
+                                 max_files=max_files, directori=args.save_dir, base=args.base, maxim=args.cap,
+                                 precisio=args.precision, confianca=args.confidence,
+                                 capital=args.bankroll, objectiu=args.take_profit, disposicio=args.bets,
+                                 cronometres=cronometres, punt_control=args.checkpoint,
+                                 memoria=args.results_cache and MemoriaResultats(args.results_cache,
+                                                                                args.cache_size * 1024 ** 2))
+    print(f"Estratègia: {dades['estr']}  R={dades['R']}  N={dades['N']}  llavor={dades['llavor']}  "
+          f"apostes={dades['disposicio']}")
+    if dades["memoria"]:
+        print("Resultats de la memòria cau (no s'ha simulat res)")
+    if dades["represes"]:
+        print(f"Represa des del punt de control de {args.checkpoint} amb {dades['represes']} simulacions fetes")
+    if args.bankroll is not None or args.take_profit is not None:
+        print(f"Capital inicial: {args.bankroll or 'il·limitat'}  Objectiu de guany: {args.take_profit or 'cap'}")
+    if args.precision is not None:
+        estat = "assolida" if dades["assolit"] else "no assolida (s'ha arribat al màxim de N)"
+        print(f"Precisió ±{args.precision} ({args.confidence:.0%}) {estat} amb N={dades['N']} "
+              f"en {dades['temps']:.2f} s")
+    print(f"Mitjana balanç (Retirar-se): {dades['mitjana_ret']:.3f}")
+    print(f"Mitjana balanç (No retirar-se): {dades['mitjana_no']:.3f}")
+    print(f"Esperança matemàtica (Retirar-se): {dades['esperanca_ret']:.5f} ± {dades['ic_ret']:.5f}")
+    if dades["exacta_ret"]:
+        print(f"Esperança exacta (Retirar-se): {dades['exacta_ret']['esperanca']:.5f}")
+    print(f"Esperança matemàtica (No retirar-se): {dades['esperanca_no']:.5f} ± {dades['ic_no']:.5f}")
+    if args.exact:
+        with _mesura(cronometres, "càlcul exacte"):
+            afegir_exacta_no(dades)
+    if dades["exacta_no"]:
+        print(f"Esperança exacta (No retirar-se): {dades['exacta_no']['esperanca']:.5f}")
+    if args.exact_loss:
+        if not NUMPY_AVAILABLE:
+            print("La probabilitat exacta d'acabar perdent requereix NumPy (pip install numpy)")
+        elif dades["capital"] is None and dades["objectiu"] is None:
+            with _mesura(cronometres, "càlcul exacte"):
+                _, _, perdua, cota = distribucio_no_retirar(dades["estr"], dades["R"], TOLERANCIA_DISTRIBUCIO,
+                                                            dades["base"], dades["maxim"], dades["disposicio"])
+            print(f"Probabilitat d'acabar perdent (No retirar-se, crèdit il·limitat): exacta={perdua:.5f} "
+                  f"(error ≤ {cota:.1e}) simulada={dades['acum_no'].perdudes / dades['N']:.5f}")
+        else:
+            print("La probabilitat exacta d'acabar perdent només es calcula amb crèdit il·limitat")
+    print(f"Esperança matemàtica (teòrica): {dades['esperanca_teo']:.5f}")
+    for titol, acum in [("Retirar-se", dades["acum_ret"]), ("No retirar-se", dades["acum_no"])]:
+        print(f"Balanç ({titol}): desviació={math.sqrt(acum.variancia):.3f} mín={acum.minim} "
+              f"mediana≈{acum.quantil(0.5):.1f} màx={acum.maxim} partides perdudes={acum.perdudes}")
+        if dades["capital"] is not None or dades["objectiu"] is not None:
+            print(f"Caiguda màxima ({titol}): mitjana={acum.caiguda_mitjana:.3f} màx={acum.caiguda_maxima}")
+        if dades["capital"] is not None:
+            temps = (f"tirada mitjana={acum.temps_ruina_mitja:.1f} mediana={acum.quantil_temps_ruina(0.5)} "
+                     f"90%={acum.quantil_temps_ruina(0.9)}" if acum.arruinades else "cap partida arruïnada")
+            print(f"Ruïna ({titol}): probabilitat={acum.prob_ruina:.5f} {temps}")
+    if args.out:
+        desar_resultats(dades, args.out)
+        print(f"Resultats desats a: {args.out}")
+    if args.pdf:
+        generar_informe_pdf(dades, args.pdf, cronometres=cronometres)
+        print(f"S'ha generat l'informe: {args.pdf}")
+    if cronometres is not None:
+        print(f"Temps: {cronometres.resum()}")
+    return 0
+
+#Informe PDF
+
+#Files de cada tros de taula de detall (aproximadament una pàgina A4)
+FILES_PER_TAULA_PDF = 45
+#Per sobre d'aquest nombre de files per mode, el detall es substitueix per quantils, histograma i una mostra
+MAX_FILES_DETALL_PDF = 5000
+#Files de la mostra aleatòria que s'inclou quan el detall és massa gran
+FILES_MOSTRA_PDF = 500
+
+
+def _taules_detall_pdf(files):
+#Taules de detall dividides en trossos petits: el cost de maquetació de reportlab creix molt amb taules grans
+    capcalera = ["Simulació", "Tirades jugades", "Balanç final", "Total apostat", "Caiguda màxima", "Ruïna"]
+    estil = TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("ALIGN", (1, 1), (-1, -1), "CENTER")
+    ])
+    taules = []
+    for inici in range(0, len(files), FILES_PER_TAULA_PDF):
+        tros = files[inici:inici + FILES_PER_TAULA_PDF]
+        table = Table([capcalera] + [[str(int(v)) for v in fila] for fila in tros],
+                      colWidths=[60, 85, 80, 80, 85, 45])
+        table.setStyle(estil)
+        taules.append(table)
+    return taules
+
+
+def _histograma_pdf(balancos, n_barres=30):
+#Dibuix amb l'histograma del balanç final
+    recomptes, vores = np.histogram(balancos, bins=n_barres)
+    dibuix = Drawing(460, 200)
+    grafic = VerticalBarChart()
+    grafic.x, grafic.y, grafic.width, grafic.height = 40, 40, 400, 140
+    grafic.data = [recomptes.tolist()]
+    grafic.categoryAxis.categoryNames = [f"{v:.0f}" if i % 5 == 0 else "" for i, v in enumerate(vores[:-1])]
+    grafic.categoryAxis.labels.fontSize = 6
+    grafic.valueAxis.labels.fontSize = 6
+    grafic.bars[0].fillColor = colors.grey
+    dibuix.add(grafic)
+    return dibuix
+
+
+def _files_mostra(dataset, k, llavor):
+#Mostra aleatòria (reproduïble) de k files, ordenades per número de simulació
+    if isinstance(dataset, MagatzemResultats):
+        tria = np.sort(np.random.default_rng(llavor).choice(len(dataset), size=k, replace=False))
+        return list(zip(*(dataset.columna(c)[tria].tolist() for c in MagatzemResultats.COLUMNES)))
+    return sorted(random.Random(llavor).sample(list(dataset), k))
+
+
+def _descripcio_motor(dades):
+#Versió del motor, mida dels blocs i versió de NumPy amb què s'han obtingut els resultats: amb una altra
+#combinació la mateixa llavor no reprodueix la simulació. Els resultats desats abans de guardar-ho no en tenen
+    if dades.get("versio_motor") is None:
+        return "desconegut"
+    numpy = f"NumPy {dades['versio_numpy']}" if dades.get("versio_numpy") else "sense NumPy"
+    return f"versió {dades['versio_motor']}, blocs de {dades['mida_bloc']} simulacions, {numpy}"
+
+
+def generar_informe_pdf(dades, fitxer, max_files_detall=MAX_FILES_DETALL_PDF, mostra=FILES_MOSTRA_PDF,
+                        cronometres=None):
+    """
+    Genera un informe PDF amb les dades de la simulació realitzada, sense necessitat de la interfície.
+    L'informe inclou:
+     - Informació general de la configuració i resultats globals (mitjanes i esperances), sempre al principi.
+     - Per a cada mode, les dades de cada simulació en taules d'una pàgina. Si hi ha més de
+       max_files_detall files, en lloc del detall complet s'inclouen els quantils i l'histograma
+       del balanç i una mostra aleatòria de 'mostra' files.
+    Amb 'cronometres' es mesura per separat la preparació del contingut i la maquetació (reportlab).
+    """
+    if not _carregar_reportlab():
+        raise RuntimeError("La llibreria 'reportlab' no està disponible (pip install reportlab)")
+
+    with _mesura(cronometres, "informe PDF (contingut)"):
+        elements = _elements_informe_pdf(dades, max_files_detall, mostra)
+    #Construcció del document PDF amb mida de pàgina A4
+    with _mesura(cronometres, "informe PDF (maquetació)"):
+        SimpleDocTemplate(fitxer, pagesize=A4).build(elements)
+
+
+def _elements_informe_pdf(dades, max_files_detall, mostra):
+#Elements (paràgrafs, taules i gràfics) de l'informe PDF, en ordre
+    styles = getSampleStyleSheet()
+    elements = []
+
+    #Capçalera del document amb títol i data d’execució
+    elements.append(Paragraph(f"Informe de simulacions - Estratègia: {dades['estr']}", styles["Title"]))
+    elements.append(Spacer(1, 8))
+    elements.append(Paragraph(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles["Normal"]))
+    elements.append(Spacer(1, 12))
+
+    #Apartat: resultats generals de la simulació
+    elements.append(Paragraph("Resultats generals:", styles["Heading2"]))
+    data_general = [
+        ["Estratègia", dades["estr"]],
+        ["Tirades per simulació (R)", str(dades["R"])],
+        ["Nombre de simulacions (N)", str(dades["N"])],
+        ["Aposta base / Aposta màxima", f"{dades.get('base', 1)} / {dades.get('maxim', APOSTA_MAXIMA)}"],
+        ["Apostes de cada tirada", dades.get("disposicio", "vermell")],
+        ["Llavor (per repetir la simulació)", str(dades.get("llavor"))],
+        ["Motor de simulació (amb la llavor)", _descripcio_motor(dades)],
+        ["Mitjana balanç (Retirar-se)", f"{dades['mitjana_ret']:.3f}"],
+        ["Mitjana balanç (No retirar-se)", f"{dades['mitjana_no']:.3f}"],
+        ["Esperança justa (Retirar-se)", f"{dades['esperanca_ret']:.5f}"],
+        ["Esperança justa (No retirar-se)", f"{dades['esperanca_no']:.5f}"],
+        ["Esperança teòrica (ruleta europea)", f"{dades['esperanca_teo']:.5f}"]
+    ]
+    if "ic_ret" in dades:
+        data_general.insert(11, [f"Interval de confiança {dades.get('confianca', 0.95):.0%} (Retirar-se / No retirar-se)",
+                                f"± {dades['ic_ret']:.5f} / ± {dades['ic_no']:.5f}"])
+    if dades.get("exacta_ret"):
+        data_general.append(["Esperança exacta (Retirar-se)", f"{dades['exacta_ret']['esperanca']:.5f}"])
+    if dades.get("exacta_no"):
+        data_general.append(["Esperança exacta (No retirar-se)", f"{dades['exacta_no']['esperanca']:.5f}"])
+    if dades.get("capital") is not None or dades.get("objectiu") is not None:
+        data_general.append(["Capital inicial / Objectiu de guany",
+                             f"{dades.get('capital') or 'il·limitat'} / {dades.get('objectiu') or 'cap'}"])
+    for titol, acum in [("Retirar-se", dades.get("acum_ret")), ("No retirar-se", dades.get("acum_no"))]:
+        if acum is None or (dades.get("capital") is None and dades.get("objectiu") is None):
+            continue
+        data_general.append([f"Caiguda màxima mitjana / màxima ({titol})",
+                             f"{acum.caiguda_mitjana:.3f} / {acum.caiguda_maxima}"])
+        if dades.get("capital") is not None:
+            data_general.append([f"Probabilitat de ruïna ({titol})", f"{acum.prob_ruina:.5f}"])
+            if acum.arruinades:
+                data_general.append([f"Tirada de la ruïna: mitjana / mediana / 90% ({titol})",
+                                     f"{acum.temps_ruina_mitja:.1f} / {acum.quantil_temps_ruina(0.5)} / "
+                                     f"{acum.quantil_temps_ruina(0.9)}"])
+
+    #Creació de la taula amb els resultats generals
+    tgen = Table(data_general, colWidths=[300, 220])
+    tgen.setStyle(TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("ALIGN", (0, 0), (-1, -1), "LEFT")
+    ]))
+    elements.append(tgen)
+    elements.append(Spacer(1, 12))
+
+    #Apartat: resultats detallats de cada mode
+    for title, data, acum in [
+        ("Retirar-se al primer guany", dades["finals_ret"], dades.get("acum_ret")),
+        ("No retirar-se (totes les tirades)", dades["finals_no"], dades.get("acum_no"))
+    ]:
+        elements.append(Paragraph(f"Resultats per simulació - {title}", styles["Heading2"]))
+        if len(data) <= max_files_detall:
+            elements.extend(_taules_detall_pdf(list(data)))
+            elements.append(Spacer(1, 10))
+            continue
+
+        #Massa files: resum de la distribució del balanç, histograma i una mostra de files
+        if acum is not None:
+            quantils = [("Mínim", acum.minim), ("Quantil 1%", acum.quantil(0.01)),
+                        ("Quantil 25%", acum.quantil(0.25)), ("Mediana", acum.quantil(0.5)),
+                        ("Quantil 75%", acum.quantil(0.75)), ("Quantil 99%", acum.quantil(0.99)),
+                        ("Màxim", acum.maxim), ("Desviació típica", math.sqrt(acum.variancia)),
+                        ("Partides perdudes", acum.perdudes)]
+            tq = Table([["Balanç final", "Valor"]] + [[t, f"{v:.2f}" if isinstance(v, float) else str(v)]
+                                                       for t, v in quantils], colWidths=[200, 120])
+            tq.setStyle(TableStyle([
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ]))
+            elements.append(tq)
+            elements.append(Spacer(1, 8))
+        if isinstance(data, MagatzemResultats):
+            elements.append(Paragraph("Histograma del balanç final", styles["Heading3"]))
+            elements.append(_histograma_pdf(data.columna("balanc")))
+        elements.append(Paragraph(f"Mostra aleatòria de {mostra} de les {len(data)} simulacions", styles["Heading3"]))
+        elements.extend(_taules_detall_pdf(_files_mostra(data, min(mostra, len(data)), dades.get("llavor"))))
+        elements.append(Spacer(1, 10))
+    return elements
+
+
+def carregar_resultats(directori):
+#Torna a construir el diccionari de resultats a partir d'un directori desat per executar_simulacions (vegeu
+#_desar_configuracio). Els acumuladors desats inclouen totes les simulacions encara que només s'hagi desat una mostra
+#de les files; en directoris que no en tenen, es calculen a partir de les files
+    with open(os.path.join(directori, "resultats.json"), encoding="utf-8") as f:
+        dades = json.load(f)
+    for mode, clau in [("retirar", "ret"), ("no_retirar", "no")]:
+        cami_csv = os.path.join(directori, mode + ".csv")
+        if os.path.exists(cami_csv):
+            import csv
+            with open(cami_csv, newline="", encoding="utf-8") as f:
+                files = [tuple(int(v) for v in fila) for fila in itertools.islice(csv.reader(f), 1, None)]
+            finals = MagatzemResultats.des_de_files(files) if NUMPY_AVAILABLE else files
+        else:
+            finals = MagatzemResultats.obrir(os.path.join(directori, mode))
+        if f"acum_{clau}" in dades:
+            acum = Acumulador.des_de_estat(dades[f"acum_{clau}"])
+        else:
+            acum = Acumulador()
+            acum.afegir_lot(*(finals.columna(c) for c in list(MagatzemResultats.COLUMNES)[1:]))
+        dades[f"finals_{clau}"] = finals
+        dades[f"acum_{clau}"] = acum
+        dades[f"mitjana_{clau}"] = acum.mitjana
+        dades[f"esperanca_{clau}"] = acum.esperanca
+    dades["esperanca_teo"] = -1 / 37
+    confianca = dades.setdefault("confianca", 0.95)
+    dades["ic_ret"] = dades["acum_ret"].interval_esperanca(confianca)
+    dades["ic_no"] = dades["acum_no"].interval_esperanca(confianca)
+    dades["exacta_ret"] = dades["exacta_no"] = None
+    if dades["capital"] is None and dades["objectiu"] is None:
+        config = (dades["estr"], dades["R"], dades["base"], dades["maxim"], dades["disposicio"])
+        dades["exacta_ret"] = esperanca_exacta_retirar(*config)
+    return dades
 
 #Interfície gràfica (TKINTER)
+
+#Filtres disponibles a les taules de resultats (nom -> (columna, condició sobre el valor de la columna))
+FILTRES_TAULA = {
+    "Totes les partides": None,
+    "Només partides perdudes (balanç negatiu)": (2, lambda balanc: balanc < 0),
+    "Només partides guanyades (balanç positiu)": (2, lambda balanc: balanc > 0),
+    "Només partides arruïnades (capital esgotat)": (5, lambda arruinada: arruinada != 0),
+}
+
+
+def ordenar_i_filtrar(dataset, columna=None, descendent=False, filtre=None):
+    """
+    Retorna les posicions de les files de 'dataset' que compleixen el filtre (un valor de
+    FILTRES_TAULA), ordenades per la columna indicada (0 = simulació, 1 = tirades, 2 = balanç,
+    3 = total apostat, 4 = caiguda màxima, 5 = arruïnada). Sense ordenar ni filtrar retorna None,
+    que vol dir l'ordre original, per no crear un array de posicions de mida N.
+    Amb un MagatzemResultats tot es fa sobre els arrays de NumPy, sense crear cap fila.
+    """
+    if columna is None and filtre is None:
+        return None
+    if isinstance(dataset, MagatzemResultats):
+        columnes = [dataset.columna(c) for c in MagatzemResultats.COLUMNES]
+        posicions = np.arange(len(dataset))
+        if filtre is not None:
+            posicions = np.flatnonzero(filtre[1](columnes[filtre[0]]))
+        if columna is not None:
+            valors = columnes[columna][posicions]
+            posicions = posicions[np.argsort(-valors if descendent else valors, kind="stable")]
+        return posicions
+
+    posicions = [i for i, fila in enumerate(dataset) if filtre is None or filtre[1](fila[filtre[0]])]
+    if columna is not None:
+        posicions.sort(key=lambda i: dataset[i][columna], reverse=descendent)
+    return posicions
+
+
+class TaulaVirtual:
+    """
+    Taula de resultats que només crea les files visibles del Treeview.
+    Les dades es queden als arrays del magatzem (o a la llista de files) i, en desplaçar-se,
+    les mateixes files del Treeview es tornen a omplir amb la finestra de dades corresponent,
+    de manera que obrir la taula costa el mateix sigui quina sigui N. Clicant una capçalera
+    s'ordena per aquella columna i el desplegable permet filtrar les partides.
+    Amb 'cronometres' es mesura cada vegada que s'omple la taula ("omplir taula").
+    """
+    def __init__(self, pare, dataset, cols, files_visibles=20, cronometres=None):
+        self.dataset = dataset
+        self.cronometres = cronometres
+        self.cols = cols
+        self.files_visibles = files_visibles
+        self.inici = 0
+        self.columna = None
+        self.descendent = False
+        self.filtre = None
+        self.posicions = None            #Ordre original fins que s'ordena o es filtra
+
+        #Desplegable amb els filtres disponibles
+        self.cmb_filtre = ttk.Combobox(pare, values=list(FILTRES_TAULA), state="readonly", width=40)
+        self.cmb_filtre.set("Totes les partides")
+        self.cmb_filtre.bind("<<ComboboxSelected>>", self._canviar_filtre)
+        self.cmb_filtre.pack(pady=4)
+
+        #Widget Treeview amb un nombre fix de files, que es reutilitzen en desplaçar-se
+        self.tree = ttk.Treeview(pare, columns=cols, show="headings", height=files_visibles)
+        for i, c in enumerate(cols):
+            self.tree.heading(c, text=c, command=lambda i=i: self._ordenar(i))
+            self.tree.column(c, width=90, anchor="center")
+        self.items = [self.tree.insert("", "end", values=()) for _ in range(files_visibles)]
+
+        #Barra de desplaçament vertical, que treballa sobre les dades i no sobre el Treeview
+        self.vsb = ttk.Scrollbar(pare, orient="vertical", command=self._desplacar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="right", fill="y")
+        self.tree.bind("<MouseWheel>", lambda e: self._moure(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self._moure(-1))
+        self.tree.bind("<Button-5>", lambda e: self._moure(1))
+        self._omplir()
+
+    def _desplacar(self, accio, valor, unitat=None):
+#Resposta a la barra de desplaçament: "moveto fracció" o "scroll n units/pages"
+        if accio == "moveto":
+            self.inici = int(float(valor) * self._total())
+            self._omplir()
+        else:
+            pas = self.files_visibles if unitat == "pages" else 1
+            self._moure(int(valor) * pas)
+
+    def _moure(self, files):
+        self.inici += files
+        self._omplir()
+
+    def _omplir(self):
+#Omple les files del Treeview amb la finestra de dades que comença a self.inici
+        with _mesura(self.cronometres, "omplir taula"):
+            self._omplir_files()
+
+    def _total(self):
+#Nombre de files que es mostren (totes, si no hi ha cap filtre)
+        return len(self.dataset) if self.posicions is None else len(self.posicions)
+
+    def _omplir_files(self):
+        total = self._total()
+        self.inici = max(0, min(self.inici, total - self.files_visibles))
+        for k, item in enumerate(self.items):
+            i = self.inici + k
+            if i < total:
+                j = i if self.posicions is None else int(self.posicions[i])
+                fila = self.dataset[j] if not isinstance(self.dataset, MagatzemResultats) \
+                    else [self.dataset.columnes[c][j] for c in MagatzemResultats.COLUMNES]
+                self.tree.item(item, values=[int(v) for v in fila])
+            else:
+                self.tree.item(item, values=())
+        if total:
+            self.vsb.set(self.inici / total, min(1.0, (self.inici + self.files_visibles) / total))
+        else:
+            self.vsb.set(0, 1)
+
+    def _ordenar(self, columna):
+#Ordena per la columna clicada; un segon clic inverteix l'ordre
+        self.descendent = not self.descendent if self.columna == columna else False
+        self.columna = columna
+        self._actualitzar()
+
+    def _canviar_filtre(self, _event=None):
+        self.filtre = FILTRES_TAULA[self.cmb_filtre.get()]
+        self._actualitzar()
+
+    def _actualitzar(self):
+        with _mesura(self.cronometres, "ordenar i filtrar taula"):
+            self.posicions = ordenar_i_filtrar(self.dataset, self.columna, self.descendent, self.filtre)
+        self.inici = 0
+        self._omplir()
+
+
 class App:
     #Classe principal que defineix tota la interfície gràfica del simulador.
-    def __init__(self, root):
+    def __init__(self, root, directori_memoria=DIRECTORI_MEMORIA):
         self.root = root
         root.title("Simulador Ruleta - TDR Laia Almira Marimon")
         root.geometry("1000x720")
@@ -193,7 +3091,8 @@ class App:
         sub = tk.Label(
             root,
             text=("Aquest programa simula el joc de la ruleta europea aplicant diverses estratègies d’aposta "
-                  "com la Martingala, Fibonacci, d’Alembert, o bé apostes fixes o aleatòries, sempre apostant al vermell. "
+                  "com la Martingala, Fibonacci, d’Alembert, o bé apostes fixes o aleatòries, apostant al vermell "
+                  "o a qualsevol combinació d'apostes de la taula (plens, cavalls, dotzenes, columnes...). "
                   "També permet analitzar l’esperança matemàtica i el balanç mitjà de cada estratègia, tant en el cas "
                   "de retirar-se després de la primera victòria com en continuar jugant totes les tirades."),
             bg="#f0f0f0", wraplength=900, justify="center"
@@ -208,8 +3107,7 @@ class App:
         tk.Label(panel, text="Estratègia:", bg="#f0f0f0").grid(row=0, column=0, sticky="e", padx=6, pady=6)
         self.cmb = ttk.Combobox(
             panel,
-            values=["Martingala", "Fibonacci", "Estratègia d'Alembert",
-                    "Sempre el mateix valor", "Valor aleatori"],
+            values=ESTRATEGIES,
             state="readonly", width=30
         )
         self.cmb.grid(row=0, column=1, sticky="w", padx=6, pady=6)
@@ -225,15 +3123,94 @@ class App:
         self.ent_n = tk.Entry(panel, width=12)
         self.ent_n.grid(row=2, column=1, sticky="w", padx=6, pady=6)
 
+        #Entrada opcional per a la precisió objectiu: si s'omple, N és el màxim de simulacions
+        tk.Label(panel, text="Precisió de l'esperança (±, opcional):", bg="#f0f0f0").grid(
+            row=3, column=0, sticky="e", padx=6, pady=6)
+        self.ent_precisio = tk.Entry(panel, width=12)
+        self.ent_precisio.grid(row=3, column=1, sticky="w", padx=6, pady=6)
+
+        #Entrades opcionals per jugar amb capital finit i per plantar-se en arribar a un guany
+        tk.Label(panel, text="Capital inicial (opcional):", bg="#f0f0f0").grid(
+            row=4, column=0, sticky="e", padx=6, pady=6)
+        self.ent_capital = tk.Entry(panel, width=12)
+        self.ent_capital.grid(row=4, column=1, sticky="w", padx=6, pady=6)
+        tk.Label(panel, text="Objectiu de guany (opcional):", bg="#f0f0f0").grid(
+            row=5, column=0, sticky="e", padx=6, pady=6)
+        self.ent_objectiu = tk.Entry(panel, width=12)
+        self.ent_objectiu.grid(row=5, column=1, sticky="w", padx=6, pady=6)
+
+        #Llavor opcional: amb la mateixa llavor (la dels resultats o la de l'informe) es repeteix la simulació
+        tk.Label(panel, text="Llavor (opcional):", bg="#f0f0f0").grid(row=6, column=0, sticky="e", padx=6, pady=6)
+        self.ent_llavor = tk.Entry(panel, width=22)
+        self.ent_llavor.grid(row=6, column=1, sticky="w", padx=6, pady=6)
+
+        #Apostes de cada tirada (per defecte només el vermell), per exemple "2*vermell+ple0"
+        tk.Label(panel, text="Apostes de cada tirada:", bg="#f0f0f0").grid(row=7, column=0, sticky="e", padx=6, pady=6)
+        self.ent_apostes = tk.Entry(panel, width=22)
+        self.ent_apostes.insert(0, "vermell")
+        self.ent_apostes.grid(row=7, column=1, sticky="w", padx=6, pady=6)
+
+        #Opció de perfilat: temps de cada fase (simulació, agregació, finestra, taula, PDF)
+        self.var_temps = tk.BooleanVar(value=False)
+        tk.Checkbutton(panel, text="Mesurar el temps de cada fase", variable=self.var_temps,
+                       bg="#f0f0f0").grid(row=8, column=1, sticky="w", padx=6, pady=6)
+
+        #Directori opcional de punt de control: si la simulació s'atura, es reprèn on s'havia quedat
+        tk.Label(panel, text="Directori de punt de control (opcional):", bg="#f0f0f0").grid(
+            row=9, column=0, sticky="e", padx=6, pady=6)
+        self.ent_punt_control = tk.Entry(panel, width=40)
+        self.ent_punt_control.grid(row=9, column=1, sticky="w", padx=6, pady=6)
+
+        #Opció de calcular l'esperança exacta sense retirar-se (amb R gran pot tardar força)
+        self.var_exacte = tk.BooleanVar(value=False)
+        tk.Checkbutton(panel, text="Esperança exacta sense retirar-se (lent per a R grans)", variable=self.var_exacte,
+                       bg="#f0f0f0").grid(row=10, column=1, sticky="w", padx=6, pady=6)
+
+        #Mostra opcional de files (com --sample): buit = es guarden totes les files; amb k, només k files a l'atzar
+        #per mode, que amb N gran ocupen molta menys memòria (les estadístiques sempre inclouen totes les partides)
+        tk.Label(panel, text="Files a guardar per mode (opcional):", bg="#f0f0f0").grid(
+            row=11, column=0, sticky="e", padx=6, pady=6)
+        self.ent_mostra = tk.Entry(panel, width=22)
+        self.ent_mostra.grid(row=11, column=1, sticky="w", padx=6, pady=6)
+
         #Botó principal que inicia el càlcul i la simulació
         btn_frame = tk.Frame(root, bg="#f0f0f0")
         btn_frame.pack(pady=12)
-        tk.Button(btn_frame, text="Calcular resultats", bg="#c8c8c8", font=("Calibri", 12, "bold"),
-                  command=self.calcular).grid(row=0, column=0, padx=8)
+        self.btn_calcular = tk.Button(btn_frame, text="Calcular resultats", bg="#c8c8c8",
+                                      font=("Calibri", 12, "bold"), command=self.calcular)
+        self.btn_calcular.grid(row=0, column=0, padx=8)
+        #Botó per aturar una simulació en curs (només actiu mentre es calcula)
+        self.btn_cancelar = tk.Button(btn_frame, text="Cancel·lar", bg="#c8c8c8", font=("Calibri", 12),
+                                      command=self.cancelar, state="disabled")
+        self.btn_cancelar.grid(row=0, column=1, padx=8)
+        #Botó per tornar a obrir, sense simular, els resultats d'execucions anteriors (memòria cau)
+        tk.Button(btn_frame, text="Execucions anteriors", bg="#c8c8c8", font=("Calibri", 12),
+                  command=self._mostrar_execucions).grid(row=0, column=2, padx=8)
+
+        #Barra de progrés amb la velocitat (simulacions per segon) i el temps restant
+        prog_frame = tk.Frame(root, bg="#f0f0f0")
+        prog_frame.pack(pady=4)
+        self.barra = ttk.Progressbar(prog_frame, orient="horizontal", length=500, mode="determinate")
+        self.barra.pack()
+        self.lbl_progres = tk.Label(prog_frame, text="", bg="#f0f0f0")
+        self.lbl_progres.pack(pady=4)
 
         #Variables internes per guardar resultats i la finestra emergent de resultats
         self.ultims = None
         self.result_window = None
+        #Estat de l'execució en segon pla: fil de treball, cua de missatges i senyal d'aturada
+        self.fil = None
+        self.cua = queue.Queue()
+        self.aturar = threading.Event()
+        self.inici_calcul = None
+        self.cronometres = None      #Cronometres de l'últim càlcul (si s'ha demanat mesurar el temps)
+        #Memòria cau persistent dels resultats (directori_memoria=None o si no es pot crear el directori, no n'hi ha)
+        self.memoria = None
+        if directori_memoria is not None:
+            try:
+                self.memoria = MemoriaResultats(directori_memoria)
+            except (OSError, sqlite3.Error):
+                pass
 
         #Ajust de la graella per millorar la disposició dels elements
         panel.columnconfigure(1, weight=1)
@@ -262,52 +3239,131 @@ class App:
         except Exception:
             messagebox.showerror("Error", "Introdueix valors positius vàlids per a R i N.")
             return
+        try:
+            #La mateixa validació que --precision (rebutja també nan i inf)
+            precisio = _real_positiu(self.ent_precisio.get()) if self.ent_precisio.get().strip() else None
+        except argparse.ArgumentTypeError:
+            messagebox.showerror("Error", "La precisió ha de ser un valor positiu (per exemple 0.001).")
+            return
+        try:
+            capital, objectiu = (int(e.get()) if e.get().strip() else None
+                                 for e in (self.ent_capital, self.ent_objectiu))
+            if (capital is not None and capital <= 0) or (objectiu is not None and objectiu <= 0):
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "El capital inicial i l'objectiu han de ser enters positius.")
+            return
+        try:
+            llavor = int(self.ent_llavor.get()) if self.ent_llavor.get().strip() else None
+            if llavor is not None and llavor < 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "La llavor ha de ser un enter no negatiu.")
+            return
+        try:
+            disposicio = Disposicio(self.ent_apostes.get().strip() or "vermell").text
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        try:
+            #La mateixa validació que --sample
+            max_files = _enter_positiu(self.ent_mostra.get()) if self.ent_mostra.get().strip() else None
+        except argparse.ArgumentTypeError:
+            messagebox.showerror("Error", "Les files a guardar han de ser un enter positiu (o buit per guardar-les totes).")
+            return
 
-        #Inicialització del generador aleatori per garantir resultats diferents
-        random.seed(datetime.now().timestamp())
-
-        #Variables acumuladores per als resultats globals
-        finals_ret = []   #Resultats amb retirada al primer guany
-        finals_no = []    #Resultats sense retirada
-        sum_bal_ret = sum_ap_ret = sum_bal_no = sum_ap_no = 0
-        
-        #Execució de totes les simulacions
-        for sim_idx in range(1, N + 1):
-            #Simulació amb retirada al primer guany
-            e_ret = crear_estrategia(estr_nom)
-            sim_ret = Simulador(e_ret, R)
-            t_ret, bal_ret, ap_ret = sim_ret.jugar(retirar=True)
-            finals_ret.append((sim_idx, t_ret, bal_ret, ap_ret))
-            sum_bal_ret += bal_ret
-            sum_ap_ret += ap_ret
-
-            #Simulació sense retirada (es juga fins al final)
-            e_no = crear_estrategia(estr_nom)
-            sim_no = Simulador(e_no, R)
-            t_no, bal_no, ap_no = sim_no.jugar(retirar=False)
-            finals_no.append((sim_idx, t_no, bal_no, ap_no))
-            sum_bal_no += bal_no
-            sum_ap_no += ap_no
-
-        #Càlcul de les esperances i balances mitjanes
-        esperanca_ret = sum_bal_ret / sum_ap_ret if sum_ap_ret else 0
-        esperanca_no = sum_bal_no / sum_ap_no if sum_ap_no else 0
-        esperanca_teo = -1 / 37
-
-        mitjana_ret = statistics.mean([b for (_, _, b, _) in finals_ret]) if finals_ret else 0
-        mitjana_no = statistics.mean([b for (_, _, b, _) in finals_no]) if finals_no else 0
+        #Només es permet una simulació alhora
+        if self.fil is not None and self.fil.is_alive():
+            return
 
-        #Guardem tots els resultats en un diccionari per a ús posterior
-        self.ultims = {
-            "estr": estr_nom, "R": R, "N": N,
-            "finals_ret": finals_ret, "finals_no": finals_no,
-            "mitjana_ret": mitjana_ret, "mitjana_no": mitjana_no,
-            "esperanca_ret": esperanca_ret, "esperanca_no": esperanca_no,
-            "esperanca_teo": esperanca_teo,
-        }
+        #Execució de totes les simulacions en un fil de treball, repartides entre els nuclis disponibles
+        #El fil només comunica el progrés i el resultat per la cua, que es llegeix amb root.after
+        self.aturar.clear()
+        self.cronometres = Cronometres() if self.var_temps.get() else None
+        punt_control = self.ent_punt_control.get().strip() or None
+        self.inici_calcul = time.perf_counter()
+        self.barra.configure(maximum=N, value=0)
+        self.lbl_progres.config(text="Calculant...")
+        self.btn_calcular.config(state="disabled")
+        self.btn_cancelar.config(state="normal")
+        self.fil = threading.Thread(target=self._treball_calcul, args=(estr_nom, R, N, precisio, capital, objectiu, llavor,
+                                                                     disposicio, self.cronometres, punt_control,
+                                                                     self.memoria, self.var_exacte.get(), max_files),
+                                    daemon=True)
+        self.fil.start()
+        self.root.after(100, self._comprovar_cua)
+
+    def _treball_calcul(self, estr_nom, R, N, precisio=None, capital=None, objectiu=None, llavor=None,
+                        disposicio="vermell", cronometres=None, punt_control=None, memoria=None, exacte=False,
+                        max_files=None):
+#S'executa al fil de treball: no pot tocar cap element de Tk, només escriure a la cua
+#max_files=None guarda totes les files per a les taules i max_files=k, una mostra de k per mode
+        try:
+            dades = executar_simulacions(estr_nom, R, N, max_files=max_files, aturar=self.aturar, precisio=precisio,
+                                         capital=capital, objectiu=objectiu, llavor=llavor, disposicio=disposicio,
+                                         cronometres=cronometres, punt_control=punt_control, memoria=memoria,
+                                         progres=lambda fetes, total: self.cua.put(("progres", fetes, total)))
+            if exacte and not dades["cancelat"]:
+                with _mesura(cronometres, "càlcul exacte"):
+                    afegir_exacta_no(dades)
+            self.cua.put(("fi", dades))
+        except Exception as e:
+            self.cua.put(("error", e))
+
+    def _comprovar_cua(self):
+#Llegeix els missatges del fil de treball i actualitza la finestra (s'executa al fil de Tk)
+        try:
+            while True:
+                missatge = self.cua.get_nowait()
+                if missatge[0] == "progres":
+                    _, fetes, total = missatge
+                    transcorregut = time.perf_counter() - self.inici_calcul
+                    velocitat = fetes / transcorregut if transcorregut > 0 else 0
+                    restant = (total - fetes) / velocitat if velocitat else 0
+                    self.barra.configure(value=fetes)
+                    self.lbl_progres.config(
+                        text=f"{fetes} / {total} simulacions  ·  {velocitat:,.0f} sim/s  ·  temps restant: {restant:.1f} s")
+                else:
+                    self._fi_calcul(missatge)
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(100, self._comprovar_cua)
+
+    def _fi_calcul(self, missatge):
+#Restableix els botons i mostra els resultats (complets o parcials) o l'error
+        self.btn_calcular.config(state="normal")
+        self.btn_cancelar.config(state="disabled")
+        if missatge[0] == "error":
+            self.lbl_progres.config(text="")
+            messagebox.showerror("Error", f"No s'ha pogut completar la simulació:\n{missatge[1]}")
+            return
+        dades = missatge[1]
+        transcorregut = time.perf_counter() - self.inici_calcul
+        estat = "Cancel·lat" if dades["cancelat"] else "Fet"
+        represes = f" ({dades['represes']} del punt de control)" if dades.get("represes") else ""
+        if dades.get("memoria"):
+            represes = " (de la memòria cau, sense simular)"
+        self.lbl_progres.config(text=f"{estat}: {dades['N']} simulacions{represes} en {transcorregut:.1f} s")
+        if dades["N"] == 0:
+            return
 
-        #Obre una nova finestra amb els resultats detallats
-        self._mostrar_resultats_window(self.ultims)
+        #Guardem tots els resultats en un diccionari per a ús posterior
+        self.ultims = dades
+
+        #Obre una nova finestra amb els resultats detallats (amb cronòmetres, fins que està dibuixada)
+        with _mesura(self.cronometres, "finestra de resultats"):
+            self._mostrar_resultats_window(self.ultims)
+            if self.cronometres is not None:
+                self.result_window.update_idletasks()
+        if self.cronometres is not None:
+            self.lbl_progres.config(text=f"{self.lbl_progres.cget('text')}\n{self.cronometres.resum()}")
+
+    def cancelar(self):
+#Demana al fil de treball que s'aturi; es mostraran els resultats dels blocs ja acabats
+        self.aturar.set()
+        self.btn_cancelar.config(state="disabled")
+        self.lbl_progres.config(text="Aturant...")
 
     #Crea i mostra la finestra amb tots els resultats numèrics i taules
     def _mostrar_resultats_window(self, dades):
@@ -347,12 +3403,33 @@ class App:
         info = [
             ("Simulacions (N)", dades["N"]),
             ("Tirades per simulació (R)", dades["R"]),
+            ("Llavor", dades["llavor"]),
+            ("Apostes de cada tirada", dades.get("disposicio", "vermell")),
             ("Mitjana balanç (Retirar-se)", f"{dades['mitjana_ret']:.3f}"),
             ("Mitjana balanç (No retirar-se)", f"{dades['mitjana_no']:.3f}"),
             ("Esperança matemàtica (Retirar-se)", f"{dades['esperanca_ret']:.5f}"),
             ("Esperança matemàtica (No retirar-se)", f"{dades['esperanca_no']:.5f}"),
+            (f"Interval de confiança {dades.get('confianca', 0.95):.0%} (Retirar-se / No retirar-se)",
+             f"± {dades['ic_ret']:.5f} / ± {dades['ic_no']:.5f}"),
             ("Esperança matemàtica (teòrica)", f"{dades['esperanca_teo']:.5f}")
         ]
+        #Si l'estratègia és determinista, s'afegeix el valor exacte amb retirada
+        if dades.get("exacta_ret"):
+            info.insert(7, ("Esperança exacta (Retirar-se)", f"{dades['exacta_ret']['esperanca']:.5f}"))
+        if dades.get("exacta_no"):
+            info.insert(-2, ("Esperança exacta (No retirar-se)", f"{dades['exacta_no']['esperanca']:.5f}"))
+        #Amb capital o objectiu, la caiguda màxima; amb capital finit, probabilitat de ruïna i tirada de la ruïna
+        if dades.get("capital") is not None or dades.get("objectiu") is not None:
+            info.append(("Capital inicial / Objectiu de guany",
+                         f"{dades.get('capital') or 'il·limitat'} / {dades.get('objectiu') or 'cap'}"))
+            for titol, acum in [("Retirar-se", dades["acum_ret"]), ("No retirar-se", dades["acum_no"])]:
+                info.append((f"Caiguda màxima mitjana / màxima ({titol})",
+                             f"{acum.caiguda_mitjana:.3f} / {acum.caiguda_maxima}"))
+        if dades.get("capital") is not None:
+            for titol, acum in [("Retirar-se", dades["acum_ret"]), ("No retirar-se", dades["acum_no"])]:
+                temps = (f"  ·  tirada mitjana de la ruïna {acum.temps_ruina_mitja:.1f} "
+                         f"(mediana {acum.quantil_temps_ruina(0.5)})" if acum.arruinades else "")
+                info.append((f"Probabilitat de ruïna ({titol})", f"{acum.prob_ruina:.5f}{temps}"))
         #Mostra les dades generals en format etiquetes
         for t, v in info:
             r = tk.Frame(frame_vals, bg="#ffffff")
@@ -363,7 +3440,7 @@ class App:
         #Creació de dues taules per comparar les simulacions amb i sense retirada
         tables_frame = tk.Frame(content, bg="#f7f7f7")
         tables_frame.pack(padx=10, pady=12, fill="both", expand=True)
-        cols = ("Simulació", "Tirades", "Balanç final", "Total apostat")
+        cols = ("Simulació", "Tirades", "Balanç final", "Total apostat", "Caiguda màx.", "Ruïna")
 
         for idx, (title, dataset) in enumerate([
             ("RETIRAR-SE (primer guany)", dades["finals_ret"]),
@@ -373,21 +3450,8 @@ class App:
             f.grid(row=0, column=idx, padx=10, sticky="nsew")
             tk.Label(f, text=title, font=("Calibri", 13, "bold"), bg="#f7f7f7").pack(pady=6)
 
-            #Widget Treeview per mostrar les dades tabulades
-            tree = ttk.Treeview(f, columns=cols, show="headings", height=20)
-            for c in cols:
-                tree.heading(c, text=c)
-                tree.column(c, width=140, anchor="center")
-
-            #Barra de desplaçament vertical per a cada taula
-            vsb = ttk.Scrollbar(f, orient="vertical", command=tree.yview)
-            tree.configure(yscrollcommand=vsb.set)
-            tree.pack(side="left", fill="both", expand=True)
-            vsb.pack(side="right", fill="y")
-
-            #Afegim les dades fila a fila a la taula
-            for sim_idx, tirades, bal, total_ap in dataset:
-                tree.insert("", "end", values=(sim_idx, tirades, bal, total_ap))
+            #Taula virtual: només es mostren les files visibles, llegides directament dels resultats
+            TaulaVirtual(f, dataset, cols, cronometres=self.cronometres)
 
         #Botons inferiors per exportar dades o tancar la finestra
         btns = tk.Frame(content, bg="#f7f7f7")
@@ -396,6 +3460,61 @@ class App:
                   command=self._desc_pdf_prompt).grid(row=0, column=0, padx=8)
         tk.Button(btns, text="Tancar", bg="#d0d0d0", width=12,
                   command=top.destroy).grid(row=0, column=1, padx=8)
+    #Llista de les execucions desades a la memòria cau
+    def _mostrar_execucions(self):
+        """
+        Mostra una finestra amb les execucions desades a la memòria cau (MemoriaResultats).
+        Amb doble clic o el botó "Obrir" se'n mostren els resultats a l'instant, sense simular.
+        """
+        if self.memoria is None:
+            messagebox.showerror("Error", "La memòria cau de resultats no està disponible.")
+            return
+        top = tk.Toplevel(self.root)
+        top.title("Execucions anteriors")
+        top.geometry("1000x420")
+        cols = ("Data", "Estratègia", "R", "N", "Llavor", "Apostes", "Base / Màxim", "Capital / Objectiu",
+                "Detall", "Mida (MB)")
+        tree = ttk.Treeview(top, columns=cols, show="headings", height=14)
+        for c in cols:
+            tree.heading(c, text=c)
+            tree.column(c, width=95, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def omplir():
+            tree.delete(*tree.get_children())
+            for e in self.memoria.execucions():
+                c = e["configuracio"]
+                tree.insert("", "end", iid=e["clau"], values=(
+                    datetime.fromtimestamp(e["creada"]).strftime("%d/%m/%Y %H:%M"), c["estr"], c["R"], e["N"],
+                    c["llavor"], c["disposicio"], f"{c['base']} / {c['maxim']}",
+                    f"{c['capital'] or '-'} / {c['objectiu'] or '-'}", "Sí" if e["files"] else "No",
+                    f"{e['mida'] / 1024 ** 2:.1f}"))
+
+        def obrir(_event=None):
+            seleccio = tree.selection()
+            if not seleccio:
+                return
+            try:
+                dades = self.memoria.carregar(seleccio[0])
+            except MemoriaResultats.ERRORS_LECTURA as e:
+                messagebox.showerror("Error", f"No s'han pogut carregar els resultats:\n{e}")
+                return
+            self.ultims = dades
+            self._mostrar_resultats_window(dades)
+
+        def esborrar():
+            for clau in tree.selection():
+                self.memoria.esborrar(clau)
+            omplir()
+
+        tree.bind("<Double-1>", obrir)
+        btns = tk.Frame(top)
+        btns.pack(pady=8)
+        tk.Button(btns, text="Obrir", width=12, command=obrir).grid(row=0, column=0, padx=8)
+        tk.Button(btns, text="Esborrar", width=12, command=esborrar).grid(row=0, column=1, padx=8)
+        tk.Button(btns, text="Tancar", width=12, command=top.destroy).grid(row=0, column=2, padx=8)
+        omplir()
+
             #Funció auxiliar per comprovar si és possible generar el PDF
     def _desc_pdf_prompt(self):
         """
@@ -408,7 +3527,7 @@ class App:
             return
 
         #Comprovació de la disponibilitat de la llibreria 'reportlab'
-        if not REPORTLAB_AVAILABLE:
+        if not _carregar_reportlab():
             messagebox.showerror(
                 "Error",
                 "La llibreria 'reportlab' no està disponible.\nInstal·la-la amb:\n\npip install reportlab"
@@ -418,14 +3537,11 @@ class App:
         #Si tot és correcte, es procedeix a la generació del PDF
         self.descarregar_pdf(self.ultims)
 
-    #Funció que genera i desa l'informe complet de resultats en format PDF
+    #Funció que demana on desar l'informe i el genera en segon pla
     def descarregar_pdf(self, dades):
         """
-        Genera un informe PDF amb totes les dades de la simulació realitzada.
-        L'informe inclou:
-         - Informació general de la configuració de la simulació.
-         - Resultats globals (mitjanes i esperances).
-         - Dades detallades de cada simulació en forma de taula.
+        Demana el nom i la ubicació del fitxer i genera l'informe PDF (generar_informe_pdf)
+        en un fil de treball, perquè la finestra continuï responent mentre es construeix.
         """
         #S’obre un quadre de diàleg per triar el nom i la ubicació del fitxer PDF
         fitxer = filedialog.asksaveasfilename(
@@ -437,68 +3553,34 @@ class App:
         if not fitxer:
             return
 
-        #Creació del document PDF amb mida de pàgina A4
-        doc = SimpleDocTemplate(fitxer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        elements = []
-
-        #Capçalera del document amb títol i data d’execució
-        elements.append(Paragraph(f"Informe de simulacions - Estratègia: {dades['estr']}", styles["Title"]))
-        elements.append(Spacer(1, 8))
-        elements.append(Paragraph(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles["Normal"]))
-        elements.append(Spacer(1, 12))
-
-        #Apartat: resultats generals de la simulació
-        elements.append(Paragraph("Resultats generals:", styles["Heading2"]))
-        data_general = [
-            ["Estratègia", dades["estr"]],
-            ["Tirades per simulació (R)", str(dades["R"])],
-            ["Nombre de simulacions (N)", str(dades["N"])],
-            ["Mitjana balanç (Retirar-se)", f"{dades['mitjana_ret']:.3f}"],
-            ["Mitjana balanç (No retirar-se)", f"{dades['mitjana_no']:.3f}"],
-            ["Esperança justa (Retirar-se)", f"{dades['esperanca_ret']:.5f}"],
-            ["Esperança justa (No retirar-se)", f"{dades['esperanca_no']:.5f}"],
-            ["Esperança teòrica (ruleta europea)", f"{dades['esperanca_teo']:.5f}"]
-        ]
-
-        #Creació de la taula amb els resultats generals
-        tgen = Table(data_general, colWidths=[300, 220])
-        tgen.setStyle(TableStyle([
-            ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
-            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-            ("ALIGN", (0, 0), (-1, -1), "LEFT")
-        ]))
-        elements.append(tgen)
-        elements.append(Spacer(1, 12))
-
-        #Apartat: taules amb els resultats detallats de totes les simulacions
-        for title, data in [
-            ("Retirar-se al primer guany", dades["finals_ret"]),
-            ("No retirar-se (totes les tirades)", dades["finals_no"])
-        ]:
-            elements.append(Paragraph(f"Resultats per simulació - {title}", styles["Heading2"]))
-            #Capçalera i contingut de cada taula
-            data_t = [["Simulació", "Tirades jugades", "Balanç final", "Total apostat"]] + [
-                [str(i), str(t), str(b), str(ap)] for (i, t, b, ap) in data
-            ]
-            table = Table(data_t, colWidths=[70, 100, 100, 100])
-            table.setStyle(TableStyle([
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("ALIGN", (1, 1), (-1, -1), "CENTER")
-            ]))
-            elements.append(table)
-            elements.append(Spacer(1, 10))
-
-        #Finalització i construcció del document PDF
-        doc.build(elements)
-
-        #Missatge confirmant la creació correcta del fitxer
-        messagebox.showinfo("PDF creat", f"S'ha generat l'informe: {fitxer}")
+        cua = queue.Queue()
+        cronometres = self.cronometres
+
+        def generar():
+            try:
+                generar_informe_pdf(dades, fitxer, cronometres=cronometres)
+                cua.put(None)
+            except Exception as e:
+                cua.put(e)
+
+        def comprovar():
+            try:
+                error = cua.get_nowait()
+            except queue.Empty:
+                self.root.after(200, comprovar)
+                return
+            if error is not None:
+                messagebox.showerror("Error", f"No s'ha pogut generar el PDF:\n{error}")
+            else:
+                #Missatge confirmant la creació correcta del fitxer
+                temps = f"\n\n{cronometres.resum()}" if cronometres is not None else ""
+                messagebox.showinfo("PDF creat", f"S'ha generat l'informe: {fitxer}{temps}")
 
+        threading.Thread(target=generar, daemon=True).start()
+        self.root.after(200, comprovar)
 
-#Inicialització de la finestra principal i execució del programa
-root = tk.Tk()      #Creació de la finestra base de Tkinter
-app = App(root)     #Instanciació de la classe principal del simulador
-root.mainloop()     #Bucle principal de l’aplicació (manté la finestra activa)
+#Inicialització del programa (interfície gràfica o línia d'ordres)
+#Només s'executa si s'obre aquest fitxer directament (els processos treballadors el tornen a importar)
+if __name__ == "__main__":
+    sys.exit(main())
 
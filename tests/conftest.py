@@ -0,0 +1,9 @@
+import importlib
+import os
+import sys
+
+#El simulador és un sol fitxer a l'arrel del repositori. S'importa pel nom del fitxer (i no des del camí) perquè
+#els processos treballadors el puguin tornar a importar
+ARREL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ARREL)
+simulador = importlib.import_module("Codi_Simulador_TDR-Laia_Almira_Marimon (4)")
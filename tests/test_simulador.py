@@ -0,0 +1,1259 @@
+import csv
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import ARREL, simulador as sim
+
+
+CONFIGURACIONS_CAPITAL = [(None, None), (50, None), (None, 20), (30, 10)]
+DISPOSICIONS = ["vermell", "2*vermell+ple0", "dotzena1+columna2"]
+
+
+class TiradesFixades:
+#Generador per a una partida de Simulador: dona les tirades (0-36) i els sortejos (1-10) indicats, en ordre
+    def __init__(self, tirades, sortejos):
+        self.tirades = iter(tirades.tolist())
+        self.sortejos = iter(sortejos.tolist())
+
+    def tirada(self):
+        return next(self.tirades)
+
+    def randint(self, a, b):
+        return next(self.sortejos)
+
+
+class SortejosLot:
+#Sortejos de l'estratègia aleatòria per a un LotPartides: a la tirada i, la columna i-1 de les partides actives
+    def __init__(self, lot, sortejos):
+        self.lot = lot
+        self.sortejos = sortejos
+        self.i = 0
+
+    def integers(self, baix, alt, size=None):
+        return self.sortejos[self.lot.actives if self.lot.filtrar else slice(None), self.i - 1]
+
+
+class ColumnesFixades:
+#Generador per a simular_lot sense partides que s'aturin: cada crida dona la columna següent de les tirades
+#(interval 0-36) o dels sortejos (interval 1-10)
+    def __init__(self, tirades, sortejos):
+        self.columnes = {(0, 37): iter(tirades.T), (1, 11): iter(sortejos.T)}
+
+    def integers(self, baix, alt, size=None):
+        return next(self.columnes[(baix, alt)])
+
+
+def _tirades_i_sortejos(n, R, llavor=0):
+    rng = np.random.default_rng(llavor)
+    return rng.integers(0, 37, size=(n, R)), rng.integers(1, 11, size=(n, R))
+
+
+def _jugar_escalar(nom, tirades, sortejos, retirar, base=1, maxim=sim.APOSTA_MAXIMA, capital=None, objectiu=None,
+                   disposicio="vermell"):
+    files = []
+    for t, s in zip(tirades, sortejos):
+        simulador = sim.Simulador(sim.crear_estrategia(nom, base, maxim), tirades.shape[1], TiradesFixades(t, s),
+                                  capital, objectiu, disposicio)
+        files.append((*simulador.jugar(retirar), simulador.caiguda_maxima, simulador.arruinat))
+    return files
+
+
+def _jugar_lot(nom, tirades, sortejos, retirar, **parametres):
+    n, R = tirades.shape
+    lot = sim.LotPartides(nom, R, n, retirar, None, **parametres)
+    lot.rng = SortejosLot(lot, sortejos)
+    for i in range(1, R + 1):
+        if lot.acabat:
+            break
+        lot.rng.i = i
+        lot.pas(i, tirades[lot.actives if lot.filtrar else slice(None), i - 1])
+    return list(zip(lot.tirades.tolist(), lot.saldo.tolist(), lot.total_apostat.tolist(), lot.caiguda.tolist(),
+                    lot.arruinada.tolist()))
+
+
+def test_sense_avisos_pyflakes():
+    api = pytest.importorskip("pyflakes.api")
+    reporter = pytest.importorskip("pyflakes.reporter")
+    sortida = io.StringIO()
+    avisos = api.checkPath(sim.__file__, reporter.Reporter(sortida, sortida))
+    assert avisos == 0, sortida.getvalue()
+
+#Motor vectoritzat i motor escalar
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+@pytest.mark.parametrize("disposicio", DISPOSICIONS)
+@pytest.mark.parametrize("capital, objectiu", CONFIGURACIONS_CAPITAL)
+@pytest.mark.parametrize("retirar", [True, False])
+def test_lot_igual_que_escalar(nom, disposicio, capital, objectiu, retirar):
+    tirades, sortejos = _tirades_i_sortejos(150, 40)
+    tirades[0] = 13     #Una partida que ho perd tot i arriba a l'aposta màxima (o s'arruïna)
+    parametres = dict(base=2, maxim=60, capital=capital, objectiu=objectiu, disposicio=disposicio)
+    assert _jugar_lot(nom, tirades, sortejos, retirar, **parametres) == \
+        _jugar_escalar(nom, tirades, sortejos, retirar, **parametres)
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+def test_simular_lot_igual_que_escalar(nom):
+    tirades, sortejos = _tirades_i_sortejos(200, 50, llavor=1)
+    t, b, a, c, r = sim.simular_lot(nom, 50, 200, retirar=False, rng=ColumnesFixades(tirades, sortejos),
+                                    disposicio="2*vermell+ple0")
+    assert list(zip(t.tolist(), b.tolist(), a.tolist(), c.tolist(), r.tolist())) == \
+        _jugar_escalar(nom, tirades, sortejos, False, disposicio="2*vermell+ple0")
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+@pytest.mark.parametrize("mida_maxima", [sim.MIDA_MAXIMA_TAULA, 3])
+def test_taula_estrategia_reaprofitada(monkeypatch, nom, mida_maxima):
+    #Un simulador que juga moltes partides (i buida la taula quan és massa gran) dona el mateix que un de nou per partida
+    monkeypatch.setattr(sim, "MIDA_MAXIMA_TAULA", mida_maxima)
+    parametres = dict(capital=40, objectiu=15, disposicio="2*vermell+ple0")
+    rng_a, rng_b = sim.GeneradorAleatori(3), sim.GeneradorAleatori(3)
+    reaprofitat = sim.Simulador(sim.crear_estrategia(nom, 1, 30), 60, rng_a, **parametres)
+    for retirar in (False, True) * 100:
+        nou = sim.Simulador(sim.crear_estrategia(nom, 1, 30), 60, rng_b, **parametres)
+        assert reaprofitat.jugar(retirar) == nou.jugar(retirar)
+        assert (reaprofitat.caiguda_maxima, reaprofitat.arruinat) == (nou.caiguda_maxima, nou.arruinat)
+
+
+def test_ruina_i_objectiu():
+    #Martingala amb capital 7: perd 1, 2 i 4 i ja no pot cobrir l'aposta de 8
+    tirades = np.array([[0, 0, 0, 0, 1], [1, 0, 1, 1, 1], [0, 1, 0, 0, 0]])
+    assert _jugar_escalar("Martingala", tirades, np.ones_like(tirades), False, capital=7, objectiu=2) == \
+        [(3, -7, 7, 7, True), (3, 2, 4, 1, False), (5, -6, 10, 7, False)]
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+def test_caiguda_nomes_amb_capital_o_objectiu(nom):
+    #Amb crèdit il·limitat i sense objectiu cap dels dos motors calcula la caiguda màxima
+    tirades, sortejos = _tirades_i_sortejos(50, 30, llavor=2)
+    sense = _jugar_escalar(nom, tirades, sortejos, False)
+    amb = _jugar_escalar(nom, tirades, sortejos, False, objectiu=10**9)
+    assert [f[:3] for f in sense] == [f[:3] for f in amb]
+    assert all(f[3] == 0 for f in sense) and any(f[3] > 0 for f in amb)
+    assert _jugar_lot(nom, tirades, sortejos, False) == sense
+    #Si ni tan sols es pot cobrir la primera aposta, la partida no es juga
+    assert _jugar_escalar("Martingala", tirades[:1], np.ones_like(tirades[:1]), False, base=5, capital=4) == \
+        [(0, 0, 0, 0, True)]
+
+#Disposicions d'apostes
+
+def test_disposicio_text():
+    disposicio = sim.Disposicio(" 2*Vermell + ple0 + vermell ")
+    assert disposicio.apostes == {"vermell": 3, "ple0": 1}
+    assert disposicio.text == "3*vermell+ple0" and disposicio.unitats == 4
+    assert sim.Disposicio(disposicio.text).guany == disposicio.guany
+    for text in ("verd", "0*vermell", "x*vermell", "ple37", "cavall1-5"):
+        with pytest.raises(ValueError):
+            sim.Disposicio(text)
+    with pytest.raises(SystemExit):
+        sim.main(["simulate", "--strategy", "Fibonacci", "-R", "10", "-N", "10", "--bets", "verd"])
+
+
+@pytest.mark.parametrize("aposta, coberts, paga", [
+    ("ple17", {17}, 35), ("cavall0-3", {0, 3}, 17), ("cavall8-11", {8, 11}, 17), ("transversal4", {4, 5, 6}, 11),
+    ("quadre1", {1, 2, 4, 5}, 8), ("sisena31", set(range(31, 37)), 5), ("dotzena2", set(range(13, 25)), 2),
+    ("columna3", set(range(3, 37, 3)), 2), ("negre", set(range(1, 37)) - sim.Ruleta.VERMELL, 1),
+    ("manca", set(range(1, 19)), 1)])
+def test_matriu_pagaments(aposta, coberts, paga):
+    columna = sim.NOMS_APOSTES.index(aposta)
+    assert [fila[columna] for fila in sim.MATRIU_PAGAMENTS] == [paga if n in coberts else -1 for n in range(37)]
+    assert sim.Disposicio(aposta).resultats() == [(paga, len(coberts) / 37), (-1, (37 - len(coberts)) / 37)]
+
+
+def test_disposicio_cobrint_el_zero():
+    #Tres unitats al vermell i una al zero: el vermell guanya 3 - 1, el zero 35 - 3 i el negre perd les quatre
+    disposicio = sim.Disposicio("3*vermell+ple0")
+    assert disposicio.guany == [32 if n == 0 else 2 if n in sim.Ruleta.VERMELL else -4 for n in range(37)]
+    assert disposicio.resultats() == [(32, 1 / 37), (2, 18 / 37), (-4, 18 / 37)]
+    assert sim.esperanca_exacta_retirar("Martingala", 10, disposicio="3*vermell+ple0") is None
+    assert len(sim.TIPUS_APOSTES) == 37 + 3 + 57 + 12 + 22 + 11 + 3 + 3 + 6
+
+#Estratègies externes
+
+PLUGIN_PAROLI = """
+def registrar(registrar_estrategia):
+    #Paroli: dobla l'aposta després de cada guany, fins a tres seguits, i torna a la base en perdre
+    registrar_estrategia(
+        "Paroli", lambda p: {"aposta": p["base"], "ratxa": 0}, lambda m, e, p: e["aposta"],
+        lambda m, e, guanya, p, sorteig: {
+            "aposta": m.where(guanya & (e["ratxa"] < 2), m.minimum(e["aposta"] * 2, p["maxim"]), p["base"]),
+            "ratxa": m.where(guanya & (e["ratxa"] < 2), e["ratxa"] + 1, 0)})
+"""
+
+
+@pytest.fixture
+def paroli(tmp_path, monkeypatch):
+#Carrega el plugin de Paroli sense deixar-lo al registre per a les altres proves
+    monkeypatch.setattr(sim, "REGISTRE_ESTRATEGIES", dict(sim.REGISTRE_ESTRATEGIES))
+    monkeypatch.setattr(sim, "ESTRATEGIES", list(sim.ESTRATEGIES))
+    monkeypatch.setattr(sim, "PLUGINS", [])
+    cami = tmp_path / "paroli.py"
+    cami.write_text(PLUGIN_PAROLI, encoding="utf-8")
+    sim.carregar_plugins([str(cami)])
+    return str(cami)
+
+
+@pytest.mark.parametrize("capital, objectiu", CONFIGURACIONS_CAPITAL)
+@pytest.mark.parametrize("retirar", [True, False])
+def test_plugin_lot_igual_que_escalar(paroli, capital, objectiu, retirar):
+    assert sim.ESTRATEGIES[-1] == "Paroli"
+    tirades, sortejos = _tirades_i_sortejos(150, 40, llavor=2)
+    parametres = dict(base=2, maxim=12, capital=capital, objectiu=objectiu)
+    assert _jugar_lot("Paroli", tirades, sortejos, retirar, **parametres) == \
+        _jugar_escalar("Paroli", tirades, sortejos, retirar, **parametres)
+
+
+def test_plugin_exacte_igual_que_enumeracio(paroli):
+    exactes = {False: sim.avaluar_no_retirar("Paroli", 9), True: sim.esperanca_exacta_retirar("Paroli", 9)}
+    for retirar, exacta in exactes.items():
+        saldo, variancia, apostat = _enumerar("Paroli", 9, "vermell", retirar)
+        assert exacta["saldo"] == pytest.approx(saldo)
+        assert exacta["variancia"] == pytest.approx(variancia)
+        assert exacta["total_apostat"] == pytest.approx(apostat)
+
+
+def test_plugin_des_de_la_linia_dordres(paroli, monkeypatch, capsys):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    #Els processos treballadors també han de conèixer l'estratègia del plugin
+    assert sim.main(["--plugin", paroli, "simulate", "--strategy", "Paroli", "-R", "30", "-N", "2500", "--seed", "6",
+                     "--processes", "2"]) == 0
+    dades = sim.executar_simulacions("Paroli", 30, 2500, llavor=6, processos=1)
+    assert f"Esperança matemàtica (No retirar-se): {dades['esperanca_no']:.5f}" in capsys.readouterr().out
+    with pytest.raises(ValueError):
+        sim.crear_estrategia("Desconeguda")
+
+#Estadístiques en streaming
+
+def test_acumulador_lot_igual_que_per_partida():
+    t, b, a, c, r = sim.simular_lot("Martingala", 30, 501, retirar=False, rng=np.random.default_rng(2), capital=100)
+    lot, una_a_una = sim.Acumulador(), sim.Acumulador()
+    lot.afegir_lot(t, b, a, c, r)
+    for fila in zip(t.tolist(), b.tolist(), a.tolist(), c.tolist(), r.tolist()):
+        una_a_una.afegir(*fila)
+    for camp in ("n", "minim", "maxim", "suma_tirades", "suma_saldo", "suma_apostat", "perdudes", "cubetes",
+                 "arruinades", "temps_ruina", "suma_caiguda", "caiguda_maxima"):
+        assert getattr(lot, camp) == getattr(una_a_una, camp)
+    assert lot.mitjana == pytest.approx(b.mean())
+    assert lot.variancia == pytest.approx(b.var(ddof=1)) == pytest.approx(una_a_una.variancia)
+    assert lot.esperanca == pytest.approx(b.sum() / a.sum())
+    assert 0 < lot.arruinades == r.sum() and lot.caiguda_maxima == c.max()
+    assert lot.quantil_temps_ruina(0.5) == np.median(t[r]) and lot.temps_ruina_mitja == pytest.approx(t[r].mean())
+    #Cada quantil de l'esbós té un error relatiu com a molt de l'1%
+    ordenats = np.sort(b)
+    for q in (0.05, 0.25, 0.5, 0.75, 0.95):
+        exacte = ordenats[int(q * (len(b) - 1))]
+        assert abs(lot.quantil(q) - exacte) <= 0.01 * abs(exacte)
+
+
+def test_acumulador_combinar_igual_que_tot_alhora():
+    columnes = sim.simular_lot("Fibonacci", 40, 3000, retirar=False, rng=np.random.default_rng(5), capital=60)
+    tot, parts = sim.Acumulador(), sim.Acumulador()
+    tot.afegir_lot(*columnes)
+    for inici in range(0, 3000, 700):
+        part = sim.Acumulador()
+        part.afegir_lot(*(v[inici:inici + 700] for v in columnes))
+        parts.combinar(part)
+    for camp in ("n", "minim", "maxim", "suma_tirades", "suma_saldo", "suma_apostat", "perdudes", "cubetes",
+                 "arruinades", "temps_ruina", "suma_caiguda", "caiguda_maxima"):
+        assert getattr(parts, camp) == getattr(tot, camp)
+    assert parts.mitjana == pytest.approx(tot.mitjana)
+    assert parts.variancia == pytest.approx(tot.variancia)
+    assert parts.interval_esperanca() == pytest.approx(tot.interval_esperanca())
+
+
+def test_interval_esperanca_metode_delta():
+    t, b, a, _, _ = sim.simular_lot("Estratègia d'Alembert", 30, 2000, retirar=False, rng=np.random.default_rng(6))
+    lot, una_a_una = sim.Acumulador(), sim.Acumulador()
+    lot.afegir_lot(t, b, a)
+    for fila in zip(t.tolist(), b.tolist(), a.tolist()):
+        una_a_una.afegir(*fila)
+    #Variància del quocient de mitjanes: (var(b) - 2r cov(b, a) + r² var(a)) / (N · mitjana(a)²)
+    r = b.sum() / a.sum()
+    cov = np.cov(b, a)
+    var_r = (cov[0, 0] - 2 * r * cov[0, 1] + r * r * cov[1, 1]) / (len(b) * a.mean() ** 2)
+    for confianca in (0.9, 0.95, 0.99):
+        z = statistics.NormalDist().inv_cdf((1 + confianca) / 2)
+        assert lot.interval_esperanca(confianca) == pytest.approx(z * math.sqrt(var_r))
+        assert una_a_una.interval_esperanca(confianca) == pytest.approx(z * math.sqrt(var_r))
+    assert sim.Acumulador().interval_esperanca() == math.inf
+
+
+def test_mostra_de_files(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    mostra = sim.executar_simulacions("Fibonacci", 30, 5000, llavor=4, processos=1, max_files=300)
+    totes = sim.executar_simulacions("Fibonacci", 30, 5000, llavor=4, processos=1, max_files=None)
+    cap = sim.executar_simulacions("Fibonacci", 30, 5000, llavor=4, processos=1)
+    for mode in ("ret", "no"):
+        files = list(mostra[f"finals_{mode}"])
+        assert len(files) == 300 and files == sorted(set(files))
+        assert set(files) <= set(totes[f"finals_{mode}"])
+        assert list(cap[f"finals_{mode}"]) == []
+        #Les estadístiques són les de totes les simulacions, es guardin o no les files
+        assert vars(mostra[f"acum_{mode}"]) == vars(totes[f"acum_{mode}"]) == vars(cap[f"acum_{mode}"])
+
+#Progrés i cancel·lació
+
+def test_progres_per_blocs(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    avisos = []
+    dades = sim.executar_simulacions("Martingala", 20, 3500, llavor=1, processos=1,
+                                     progres=lambda fetes, N: avisos.append((fetes, N)))
+    assert avisos == [(1000, 3500), (2000, 3500), (3000, 3500), (3500, 3500)]
+    assert not dades["cancelat"] and dades["N"] == 3500
+
+
+def test_mida_bloc_segons_tirades(monkeypatch):
+    monkeypatch.setattr(sim, "TIRADES_BLOC", 10 ** 6)
+    assert sim._mida_bloc(20) == sim.MIDA_BLOC
+    assert sim._mida_bloc(200) == 5000 and sim._mida_bloc(10 ** 5) == 1000
+    #Amb partides llargues els avisos de progrés arriben cada 1000 simulacions
+    avisos = []
+    sim.executar_simulacions("Martingala", 1000, 3000, llavor=1, processos=1,
+                             progres=lambda fetes, N: avisos.append(fetes))
+    assert avisos == [1000, 2000, 3000]
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_cancelar_retorna_els_blocs_acabats(monkeypatch, processos):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    aturar = threading.Event()
+    parcial = sim.executar_simulacions("Martingala", 20, 4000, llavor=3, processos=processos, max_files=None,
+                                       progres=lambda fetes, N: aturar.set(), aturar=aturar)
+    primer_bloc = sim.executar_simulacions("Martingala", 20, 1000, llavor=3, processos=1, max_files=None)
+    assert parcial["cancelat"] and parcial["N"] == 1000
+    for mode in ("ret", "no"):
+        assert vars(parcial[f"acum_{mode}"]) == vars(primer_bloc[f"acum_{mode}"])
+        assert list(parcial[f"finals_{mode}"]) == list(primer_bloc[f"finals_{mode}"])
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_bloc_interromput(monkeypatch, numpy):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", numpy)
+    aturar = threading.Event()
+    assert sim._simular_bloc("Martingala", 1000, False, 1, 50, 1, 0, aturar=aturar)[0].n == 50
+    aturar.set()
+    assert sim._simular_bloc("Martingala", 1000, False, 1, 50, 1, 0, aturar=aturar) is None
+
+
+@pytest.mark.parametrize("processos", [1, 2])
+def test_cancelar_no_espera_els_blocs_en_curs(processos):
+    #Dos blocs de 1000 partides de 200000 tirades (uns quants segons cadascun): en cancel·lar, s'interrompen
+    aturar = threading.Event()
+    temporitzador = threading.Timer(0.5, aturar.set)
+    temporitzador.start()
+    inici = time.perf_counter()
+    dades = sim.executar_simulacions("Martingala", 200000, 2000, llavor=1, processos=processos, aturar=aturar)
+    assert time.perf_counter() - inici < 2.5
+    assert dades["cancelat"] and dades["N"] == 0
+
+#Punts de control
+
+@pytest.mark.parametrize("max_files", [None, 50])
+def test_punt_control_repren_igual(tmp_path, monkeypatch, max_files):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)     #Quatre blocs
+    aturar = threading.Event()
+    args = ("Martingala", 30, 4000)
+    opcions = dict(llavor=3, processos=1, max_files=max_files, capital=200)
+    parcial = sim.executar_simulacions(*args, progres=lambda fetes, N: aturar.set(), aturar=aturar,
+                                       punt_control=str(tmp_path), **opcions)
+    assert parcial["cancelat"] and parcial["N"] == 1000
+    del parcial
+    represa = sim.executar_simulacions(*args, punt_control=str(tmp_path), **opcions)
+    completa = sim.executar_simulacions(*args, **opcions)
+    assert represa["represes"] == 1000 and not represa["cancelat"]
+    for mode in ("ret", "no"):
+        assert represa[f"acum_{mode}"].estat() == completa[f"acum_{mode}"].estat()
+        assert _files(represa[f"finals_{mode}"]) == _files(completa[f"finals_{mode}"])
+    #Una execució acabada no es torna a calcular
+    monkeypatch.setattr(sim, "_simular_bloc", None)
+    acabada = sim.executar_simulacions(*args, punt_control=str(tmp_path), **opcions)
+    assert acabada["represes"] == 4000 and acabada["acum_no"].estat() == completa["acum_no"].estat()
+
+
+def test_punt_control_despres_duna_interrupcio(tmp_path, monkeypatch):
+    #Es desa després de cada bloc i l'execució s'interromp de cop al tercer (com si es matés el procés)
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    monkeypatch.setattr(sim, "INTERVAL_PUNT_CONTROL", 0.0)
+
+    def interrompre(fetes, N):
+        if fetes == 3000:
+            raise KeyboardInterrupt
+    opcions = dict(llavor=8, processos=1, max_files=None)
+    with pytest.raises(KeyboardInterrupt):
+        sim.executar_simulacions("Fibonacci", 25, 6000, progres=interrompre, punt_control=str(tmp_path), **opcions)
+    #Sense llavor es fa servir la del punt de control
+    represa = sim.executar_simulacions("Fibonacci", 25, 6000, punt_control=str(tmp_path),
+                                       **dict(opcions, llavor=None))
+    completa = sim.executar_simulacions("Fibonacci", 25, 6000, **opcions)
+    assert represa["represes"] == 3000 and represa["llavor"] == 8
+    for mode in ("ret", "no"):
+        assert represa[f"acum_{mode}"].estat() == completa[f"acum_{mode}"].estat()
+        assert _files(represa[f"finals_{mode}"]) == _files(completa[f"finals_{mode}"])
+
+
+def test_punt_control_altra_configuracio(tmp_path, capsys):
+    sim.executar_simulacions("Martingala", 20, 1000, llavor=1, processos=1, punt_control=str(tmp_path))
+    with pytest.raises(ValueError):
+        sim.executar_simulacions("Martingala", 21, 1000, llavor=1, processos=1, punt_control=str(tmp_path))
+    with pytest.raises(ValueError):
+        sim.executar_simulacions("Martingala", 20, 1000, llavor=2, processos=1, punt_control=str(tmp_path))
+    assert sim.main(["simulate", "--strategy", "Martingala", "-R", "20", "-N", "1000", "--seed", "1",
+                     "--processes", "1", "--checkpoint", str(tmp_path)]) == 0
+    assert f"Represa des del punt de control de {tmp_path} amb 1000 simulacions fetes" in capsys.readouterr().out
+
+
+def test_mostra_limitada_a_cada_bloc(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    afegir = sim.EstatExecucio.afegir
+    mides = []
+
+    def afegir_i_mesurar(self, *args):
+        afegir(self, *args)
+        mides.append((len(self.finals_ret), len(self.finals_no)))
+    monkeypatch.setattr(sim.EstatExecucio, "afegir", afegir_i_mesurar)
+    mostra = sim.executar_simulacions("Fibonacci", 30, 5000, llavor=4, processos=1, max_files=300)
+    assert len(mides) == 5 and max(max(m) for m in mides) == 300
+    monkeypatch.setattr(sim.EstatExecucio, "afegir", afegir)
+    totes = sim.executar_simulacions("Fibonacci", 30, 5000, llavor=4, processos=1, max_files=None)
+    for mode in ("ret", "no"):
+        files = list(mostra[f"finals_{mode}"])
+        assert len(files) == 300 and files == sorted(set(files))
+        assert set(files) <= set(totes[f"finals_{mode}"])
+
+
+def test_estat_execucio_es_desa_i_es_repren(tmp_path):
+    configuracio = {"estr": "Fibonacci", "R": 20, "llavor": 4}
+    execucio = sim.EstatExecucio(configuracio, 3)
+    for b in range(2):
+        ll_ret, ll_no = sim._llavors_bloc(4, b)
+        bloc = lambda retirar, ll: sim._simular_bloc("Fibonacci", 20, retirar, 1 + 100 * b, 100, ll, 3, 1,
+                                                     sim.APOSTA_MAXIMA, None, None, "vermell")
+        execucio.afegir(bloc(True, ll_ret), bloc(False, ll_no), 100)
+    execucio.desar(str(tmp_path))
+    estat = sim._llegir_punt_control(str(tmp_path), dict(configuracio, max_files=3))
+    represa = sim.EstatExecucio(configuracio, 3, estat)
+    assert (represa.blocs_fets, represa.fetes, represa.represes, represa.acabat) == (2, 200, 200, False)
+    for mode in ("ret", "no"):
+        assert getattr(represa, f"acum_{mode}").estat() == getattr(execucio, f"acum_{mode}").estat()
+        #De la mostra només es guarden les 3 files de clau més petita
+        assert getattr(represa, f"finals_{mode}") == sorted(getattr(execucio, f"finals_{mode}"))[:3]
+
+#Memòria cau de resultats
+
+def test_memoria_cau_reaprofita_resultats(tmp_path, monkeypatch):
+    memoria = sim.MemoriaResultats(str(tmp_path))
+    args, opcions = ("Fibonacci", 20, 1500), dict(llavor=1, processos=1, max_files=None, memoria=memoria)
+    primera = sim.executar_simulacions(*args, **opcions)
+    monkeypatch.setattr(sim, "_simular_bloc", None)     #Un encert no simula res
+    segona = sim.executar_simulacions(*args, **opcions)
+    assert not primera["memoria"] and segona["memoria"]
+    for mode in ("ret", "no"):
+        assert primera[f"acum_{mode}"].estat() == segona[f"acum_{mode}"].estat()
+        assert _files(primera[f"finals_{mode}"]) == _files(segona[f"finals_{mode}"])
+    #Sense files també es fa servir la mateixa execució
+    assert sim.executar_simulacions(*args, **dict(opcions, max_files=0))["memoria"]
+    #Si la carpeta s'ha fet malbé, l'execució es treu de la memòria i es torna a simular
+    monkeypatch.undo()
+    os.remove(os.path.join(str(tmp_path), memoria.execucions()[0]["clau"], "resum.pkl"))
+    assert not sim.executar_simulacions(*args, **opcions)["memoria"]
+    assert len(memoria.execucions()) == 1
+
+
+def test_memoria_cau_no_desa_les_cancelades(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    memoria = sim.MemoriaResultats(str(tmp_path))
+    aturar = threading.Event()
+    dades = sim.executar_simulacions("Martingala", 20, 3000, llavor=2, processos=1, max_files=None, memoria=memoria,
+                                     progres=lambda fetes, N: aturar.set(), aturar=aturar)
+    assert dades["cancelat"] and len(list(dades["finals_no"])) == 1000
+    assert memoria.execucions() == []
+
+
+def test_memoria_cau_expulsa_la_menys_usada(tmp_path):
+    memoria = sim.MemoriaResultats(str(tmp_path))
+    executar = lambda llavor: sim.executar_simulacions("Martingala", 20, 1500, llavor=llavor, processos=1,
+                                                       max_files=None, memoria=memoria)
+    executar(1)
+    memoria.mida_maxima = 2.5 * memoria.execucions()[0]["mida"]
+    executar(2)
+    assert executar(1)["memoria"]       #Ara la menys usada és la de la llavor 2
+    executar(3)
+    assert sorted(e["configuracio"]["llavor"] for e in memoria.execucions()) == [1, 3]
+    assert not executar(2)["memoria"]
+
+
+def test_memoria_cau_serveix_per_a_report(tmp_path):
+    pytest.importorskip("reportlab")
+    memoria = sim.MemoriaResultats(str(tmp_path / "cau"))
+    dades = sim.executar_simulacions("Martingala", 20, 1500, llavor=6, processos=1, max_files=None, memoria=memoria)
+    carpeta = str(tmp_path / "cau" / memoria.execucions()[0]["clau"])
+    desades = sim.carregar_resultats(carpeta)
+    for mode in ("ret", "no"):
+        assert desades[f"acum_{mode}"].estat() == dades[f"acum_{mode}"].estat()
+        assert _files(desades[f"finals_{mode}"]) == _files(dades[f"finals_{mode}"])
+    pdf = str(tmp_path / "informe.pdf")
+    assert sim.main(["report", carpeta, "--pdf", pdf]) == 0
+    assert open(pdf, "rb").read(4) == b"%PDF"
+
+
+def test_ordre_runs(tmp_path, capsys):
+    cau = str(tmp_path)
+    ordre = ["simulate", "--strategy", "Fibonacci", "-R", "20", "-N", "800", "--seed", "4", "--processes", "1",
+             "--results-cache", cau]
+    assert sim.main(ordre) == 0
+    assert "memòria cau" not in capsys.readouterr().out
+    assert sim.main(ordre) == 0
+    assert "Resultats de la memòria cau (no s'ha simulat res)" in capsys.readouterr().out
+    assert sim.main(["runs", "--results-cache", cau]) == 0
+    files = capsys.readouterr().out.splitlines()[1:]
+    assert len(files) == 1 and "Fibonacci" in files[0] and files[0].endswith("(només resum)")
+
+#Magatzem de resultats per columnes
+
+def _files(magatzem):
+    return {c: magatzem.columna(c).tolist() for c in sim.MagatzemResultats.COLUMNES}
+
+
+def test_magatzem_a_memoria_i_a_disc(tmp_path):
+    columnes = sim.simular_lot("Fibonacci", 30, 3000, retirar=False, rng=np.random.default_rng(1), capital=40)
+    files = list(zip(range(1, 3001), *(v.tolist() for v in columnes)))
+    memoria = sim.MagatzemResultats(10)
+    disc = sim.MagatzemResultats(10, directori=str(tmp_path / "disc"))
+    for inici in range(0, 3000, 700):
+        for magatzem in (memoria, disc):
+            magatzem.afegir(*zip(*files[inici:inici + 700]))
+    assert list(memoria) == list(disc) == files
+    assert memoria.columna("tirades").dtype == np.int32 and memoria.columna("balanc").dtype == np.int64
+    disc.desar()
+    obert = sim.MagatzemResultats.obrir(str(tmp_path / "disc"))
+    assert list(obert) == files and isinstance(obert.columna("balanc"), np.memmap)
+
+
+def test_magatzem_gran_a_fitxers_temporals(monkeypatch):
+    monkeypatch.setattr(sim, "MAX_FILES_MEMORIA", 100)
+    magatzem = sim.MagatzemResultats(1000)
+    directori = magatzem.directori
+    assert directori is not None and isinstance(magatzem.columnes["simulacio"], np.memmap)
+    del magatzem
+    assert not os.path.exists(directori)
+
+
+def test_resultats_a_directori(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    a_memoria = sim.executar_simulacions("Martingala", 25, 2500, llavor=9, processos=1, max_files=None)
+    sim.executar_simulacions("Martingala", 25, 2500, llavor=9, processos=1, max_files=None,
+                             directori=str(tmp_path))
+    for mode, clau in (("retirar", "finals_ret"), ("no_retirar", "finals_no")):
+        assert _files(sim.MagatzemResultats.obrir(str(tmp_path / mode))) == _files(a_memoria[clau])
+
+
+def test_format_de_sortida_no_suportat(tmp_path, capsys):
+    with pytest.raises(ValueError):
+        sim.comprovar_format_sortida("resultats.txt")
+    with pytest.raises(SystemExit):
+        sim.main(["simulate", "--strategy", "Martingala", "-R", "10", "-N", "10", "--out", "resultats.txt"])
+    assert "no suportat" in capsys.readouterr().err
+
+#Exportació
+
+@pytest.mark.parametrize("ext", [".csv", ".npy", ".parquet"])
+def test_exportacio(tmp_path, monkeypatch, ext):
+    if ext == ".parquet":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(sim, "FILES_TROS_EXPORTACIO", 700)     #Diversos trossos per mode
+    dades = sim.executar_simulacions("Estratègia d'Alembert", 25, 1200, llavor=5, processos=1, max_files=None,
+                                     capital=30)
+    fitxer = str(tmp_path / f"resultats{ext}")
+    sim.desar_resultats(dades, fitxer)
+    if ext == ".npy":
+        llegit = np.load(fitxer)
+        llegit = {c: llegit[c].tolist() for c in llegit.dtype.names}
+    elif ext == ".csv":
+        llegit = np.genfromtxt(fitxer, delimiter=",", names=True, dtype=np.int64)
+        llegit = {c: llegit[c].tolist() for c in llegit.dtype.names}
+    else:
+        import pyarrow.parquet as pq
+        llegit = pq.read_table(fitxer).to_pydict()
+    ret, no = _files(dades["finals_ret"]), _files(dades["finals_no"])
+    esperat = {"retirar": [1] * 1200 + [0] * 1200, **{c: ret[c] + no[c] for c in ret}}
+    assert llegit == esperat
+    with pytest.raises(ValueError):
+        sim.desar_resultats(dades, str(tmp_path / "resultats.txt"))
+
+#Taula de resultats
+
+class GinyFals:
+#Substitut dels ginys de ttk (desplegable, Treeview i barra de desplaçament) que recorda el que mostren
+    def __init__(self, *args, **kwargs):
+        self.files = {}
+        self.valor = None
+
+    def insert(self, pare, posicio, values):
+        self.files[len(self.files)] = tuple(values)
+        return len(self.files) - 1
+
+    def item(self, item, values):
+        self.files[item] = tuple(values)
+
+    def set(self, *valors):
+        self.valor = valors
+
+    def get(self):
+        return self.valor[0]
+
+    def heading(self, *args, **kwargs):
+        pass
+
+    column = bind = pack = heading
+
+
+def _resultats_taula():
+    return sim.executar_simulacions("Fibonacci", 30, 3000, llavor=2, processos=1, max_files=None)["finals_no"]
+
+
+@pytest.mark.parametrize("magatzem", [True, False])
+@pytest.mark.parametrize("columna, descendent", [(None, False), (1, False), (2, True), (3, False)])
+@pytest.mark.parametrize("filtre", list(sim.FILTRES_TAULA))
+def test_ordenar_i_filtrar(magatzem, columna, descendent, filtre):
+    resultats = _resultats_taula()
+    files = list(resultats)
+    condicio = sim.FILTRES_TAULA[filtre]
+    posicions = sim.ordenar_i_filtrar(resultats if magatzem else files, columna, descendent, condicio)
+    if columna is None and condicio is None:
+        assert posicions is None
+        return
+    esperades = [i for i, f in enumerate(files) if condicio is None or condicio[1](f[condicio[0]])]
+    if columna is not None:
+        esperades.sort(key=lambda i: files[i][columna], reverse=descendent)
+    assert list(posicions) == esperades
+
+
+@pytest.mark.parametrize("magatzem", [True, False])
+def test_taula_virtual_nomes_omple_les_files_visibles(monkeypatch, magatzem):
+    monkeypatch.setattr(sim, "ttk", types.SimpleNamespace(Combobox=GinyFals, Treeview=GinyFals,
+                                                          Scrollbar=GinyFals), raising=False)
+    resultats = _resultats_taula()
+    files = list(resultats)
+    taula = sim.TaulaVirtual(None, resultats if magatzem else files, ("a", "b", "c", "d"), files_visibles=20)
+    mostrades = lambda: [taula.tree.files[i] for i in taula.items]
+    assert mostrades() == files[:20]
+    taula._desplacar("moveto", "0.5")
+    assert mostrades() == files[1500:1520] and taula.vsb.valor == (0.5, 1520 / 3000)
+    taula._desplacar("scroll", "1", "pages")
+    assert mostrades() == files[1520:1540]
+    taula._moure(10 ** 6)
+    assert mostrades() == files[-20:]
+    taula._ordenar(2)
+    assert mostrades() == sorted(files, key=lambda f: f[2])[:20]
+    taula._ordenar(2)
+    assert mostrades() == sorted(files, key=lambda f: f[2], reverse=True)[:20]
+    taula.cmb_filtre.set("Només partides perdudes (balanç negatiu)")
+    taula._canviar_filtre()
+    assert mostrades() == sorted([f for f in files if f[2] < 0], key=lambda f: f[2], reverse=True)[:20]
+    #El Treeview només té les 20 files visibles, sigui quina sigui N
+    assert len(taula.tree.files) == 20
+
+#Precisió objectiu
+
+def test_precisio_atura_al_primer_bloc_que_la_compleix(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    dades = sim.executar_simulacions("Fibonacci", 20, 10 ** 6, llavor=9, processos=1, max_files=None, precisio=0.02)
+    N = dades["N"]
+    assert dades["assolit"] and N % 1000 == 0 and N < 10 ** 6
+    assert max(dades["ic_ret"], dades["ic_no"]) <= 0.02
+    #El resultat és el d'executar directament N simulacions, i amb un bloc menys la precisió no s'assoleix
+    directe = sim.executar_simulacions("Fibonacci", 20, N, llavor=9, processos=1, max_files=None)
+    for mode in ("ret", "no"):
+        _mateixes_estadistiques(dades[f"acum_{mode}"], directe[f"acum_{mode}"])
+        assert list(dades[f"finals_{mode}"]) == list(directe[f"finals_{mode}"])
+    assert (dades["ic_ret"], dades["ic_no"]) == pytest.approx((directe["ic_ret"], directe["ic_no"]))
+    menys = sim.executar_simulacions("Fibonacci", 20, N - 1000, llavor=9, processos=1)
+    assert max(menys["ic_ret"], menys["ic_no"]) > 0.02
+    #Amb més processos s'atura al mateix bloc
+    assert sim.executar_simulacions("Fibonacci", 20, 10 ** 6, llavor=9, processos=3, precisio=0.02)["N"] == N
+
+
+def test_precisio_no_assolida_fins_al_maxim(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    dades = sim.executar_simulacions("Martingala", 20, 2500, llavor=1, processos=1, precisio=1e-6)
+    assert not dades["assolit"] and dades["N"] == 2500
+    assert dades["acum_ret"].n == dades["acum_no"].n == 2500
+
+
+def test_simulate_amb_precisio(capsys, monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "20", "--precision", "0.02", "--seed", "9",
+                     "--processes", "1"]) == 0
+    sortida = capsys.readouterr().out
+    dades = sim.executar_simulacions("Fibonacci", 20, 10 ** 6, llavor=9, processos=1, precisio=0.02)
+    assert f"Precisió ±0.02 (95%) assolida amb N={dades['N']} " in sortida
+    assert f"(Retirar-se): {dades['esperanca_ret']:.5f} ± {dades['ic_ret']:.5f}" in sortida
+    assert f"(No retirar-se): {dades['esperanca_no']:.5f} ± {dades['ic_no']:.5f}" in sortida
+    with pytest.raises(SystemExit):
+        sim.main(["simulate", "--strategy", "Fibonacci", "-R", "20"])
+
+
+@pytest.mark.parametrize("valor", ["0", "-0.1", "nan", "inf", "abc"])
+def test_precisio_invalida(valor):
+    #La finestra i --precision fan servir la mateixa validació
+    with pytest.raises(sim.argparse.ArgumentTypeError):
+        sim._real_positiu(valor)
+    with pytest.raises(SystemExit):
+        sim.main(["simulate", "--strategy", "Fibonacci", "-R", "20", "--precision", valor])
+    assert sim._real_positiu("0.001") == 0.001
+
+
+@pytest.mark.parametrize("max_files", [None, 40])
+def test_finestra_guarda_una_mostra_de_files(max_files):
+    #El fil de treball de la finestra passa la mostra demanada a executar_simulacions (per defecte, totes les files)
+    app = types.SimpleNamespace(cua=sim.queue.Queue(), aturar=threading.Event())
+    args = ("Fibonacci", 20, 300, None, None, None, 4, "vermell", None, None, None, False)
+    sim.App._treball_calcul(app, *args, max_files=max_files)
+    tipus, dades = app.cua.queue[-1]      #Abans hi ha els missatges de progrés
+    assert tipus == "fi" and dades["acum_ret"].n == dades["acum_no"].n == 300
+    assert len(dades["finals_ret"]) == len(dades["finals_no"]) == (max_files or 300)
+    with pytest.raises(sim.argparse.ArgumentTypeError):
+        sim._enter_positiu("inf")
+
+#Llavors i processos
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_generador_reproduible(monkeypatch, numpy):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", numpy)
+    a, b = sim.GeneradorAleatori(11), sim.GeneradorAleatori(11)
+    tirades = [a.tirada() for _ in range(5000)]     #Més d'una memòria intermèdia
+    assert tirades == [b.tirada() for _ in range(5000)]
+    assert set(tirades) == set(range(37))
+    assert tirades != [sim.GeneradorAleatori(12).tirada() for _ in range(5000)]
+    fills_a, fills_b = sim.GeneradorAleatori(11).fills(3), sim.GeneradorAleatori(11).fills(3)
+    sortejos = [[f.randint(1, 10) for _ in range(50)] for f in fills_a]
+    assert sortejos == [[f.randint(1, 10) for _ in range(50)] for f in fills_b]
+    assert len({tuple(s) for s in sortejos}) == 3 and set(sortejos[0]) <= set(range(1, 11))
+
+
+def test_generador_saltat(monkeypatch):
+    tirades = lambda rng: [rng.tirada() for _ in range(100)]
+    rng = sim.GeneradorAleatori(5)
+    assert tirades(rng.saltat(2)) == tirades(rng.saltat().saltat()) == tirades(sim.GeneradorAleatori(5).saltat(2))
+    assert tirades(rng.saltat()) != tirades(sim.GeneradorAleatori(5))
+    #Un generador saltat no té SeedSequence pròpia: els seus fills serien els del generador original
+    with pytest.raises(RuntimeError):
+        rng.saltat().fills(2)
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", False)
+    with pytest.raises(RuntimeError):
+        sim.GeneradorAleatori(5).saltat()
+
+
+def test_estrategia_aleatoria_requereix_generador():
+    estr = sim.crear_estrategia("Valor aleatori")
+    with pytest.raises(ValueError):
+        estr.resultat(False)
+    estr.rng = sim.GeneradorAleatori(3)
+    apostes = []
+    for _ in range(20):
+        estr.resultat(False)
+        apostes.append(estr.aposta())
+    repetida = sim.crear_estrategia("Valor aleatori")
+    repetida.rng = sim.GeneradorAleatori(3)
+    assert [repetida.resultat(False) or repetida.aposta() for _ in range(20)] == apostes
+
+
+def test_execucio_sense_llavor_es_pot_repetir():
+    primera = sim.executar_simulacions("Valor aleatori", 30, 1500, processos=1)
+    assert isinstance(primera["llavor"], int)
+    repetida = sim.executar_simulacions("Valor aleatori", 30, 1500, llavor=primera["llavor"], processos=1)
+    assert vars(primera["acum_no"]) == vars(repetida["acum_no"])
+    assert sim.executar_simulacions("Valor aleatori", 30, 1500, processos=1)["llavor"] != primera["llavor"]
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_resultats_no_depenen_dels_processos(monkeypatch, numpy):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", numpy)
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)     #Tres blocs
+    un = sim.executar_simulacions("Fibonacci", 30, 2500, llavor=7, processos=1, max_files=None)
+    tres = sim.executar_simulacions("Fibonacci", 30, 2500, llavor=7, processos=3, max_files=None)
+    for mode in ("ret", "no"):
+        assert vars(un[f"acum_{mode}"]) == vars(tres[f"acum_{mode}"])
+        assert list(un[f"finals_{mode}"]) == list(tres[f"finals_{mode}"])
+    assert [f[0] for f in un["finals_no"]] == list(range(1, 2501))
+    altra = sim.executar_simulacions("Fibonacci", 30, 2500, llavor=8, processos=1)
+    assert vars(altra["acum_no"]) != vars(un["acum_no"])
+
+
+def test_processos_si_el_modul_no_es_pot_importar(monkeypatch):
+    monkeypatch.setattr(multiprocessing, "get_start_method", lambda: "spawn")
+    assert sim._nombre_processos(3) == 3 and sim._nombre_processos(None) == (os.cpu_count() or 1)
+    #Carregat des del camí del fitxer, els treballadors no el podrien tornar a importar: un sol procés
+    monkeypatch.setattr(sim, "__name__", "simulador_carregat_des_del_cami")
+    assert sim._nombre_processos(3) == 1
+
+
+def test_processos_amb_spawn_des_del_cami(monkeypatch):
+    codi = (
+        "import importlib.util, multiprocessing, sys\n"
+        "multiprocessing.set_start_method('spawn')\n"
+        "spec = importlib.util.spec_from_file_location('simulador', sys.argv[1])\n"
+        "sim = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(sim)\n"
+        "sim.MIDA_BLOC = 1000\n"
+        "dades = sim.executar_simulacions('Fibonacci', 20, 2500, llavor=4, processos=2)\n"
+        "print(dades['acum_no'].n, dades['esperanca_no'])\n"
+    )
+    fitxer = os.path.join(ARREL, "Codi_Simulador_TDR-Laia_Almira_Marimon (4).py")
+    sortida = subprocess.run([sys.executable, "-c", codi, fitxer], capture_output=True, text=True, timeout=120)
+    assert sortida.returncode == 0, sortida.stderr
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    esperat = sim.executar_simulacions("Fibonacci", 20, 2500, llavor=4, processos=1)
+    n, esperanca = sortida.stdout.split()
+    assert int(n) == 2500 and float(esperanca) == pytest.approx(esperat["esperanca_no"])
+
+#Càlcul exacte
+
+DETERMINISTES = ["Martingala", "Fibonacci", "Estratègia d'Alembert", "Sempre el mateix valor"]
+
+
+def _enumerar(nom, R, disposicio, retirar):
+#Saldo esperat, variància i total apostat esperat recorrent totes les seqüències de resultats possibles
+    disposicio = sim.Disposicio(disposicio)
+    saldo_esperat = saldo2 = apostat_esperat = 0.0
+    for seq in itertools.product(disposicio.resultats(), repeat=R):
+        estr = sim.crear_estrategia(nom)
+        p, saldo, apostat, retirat = 1.0, 0, 0, False
+        for guany, p_guany in seq:
+            #Després de retirar-se, les tirades restants només reparteixen la probabilitat
+            p *= p_guany
+            if retirat:
+                continue
+            aposta = estr.aposta()
+            saldo += guany * aposta
+            apostat += aposta * disposicio.unitats
+            estr.resultat(guany > 0)
+            retirat = retirar and guany > 0
+        saldo_esperat += p * saldo
+        saldo2 += p * saldo ** 2
+        apostat_esperat += p * apostat
+    return saldo_esperat, saldo2 - saldo_esperat ** 2, apostat_esperat
+
+
+@pytest.mark.parametrize("nom", DETERMINISTES)
+@pytest.mark.parametrize("disposicio, R", [("vermell", 9), ("dotzena1+ple0", 6)])
+def test_exacte_igual_que_enumeracio(nom, disposicio, R):
+    saldo, variancia, apostat = _enumerar(nom, R, disposicio, retirar=False)
+    exacta = sim.avaluar_no_retirar(nom, R, disposicio=disposicio)
+    assert exacta["saldo"] == pytest.approx(saldo)
+    assert exacta["variancia"] == pytest.approx(variancia)
+    assert exacta["total_apostat"] == pytest.approx(apostat)
+    assert exacta["esperanca_per_R"][-1] == pytest.approx(exacta["esperanca"])
+    saldos, probabilitats, perdua, cota = sim.distribucio_no_retirar(nom, R, disposicio=disposicio)
+    assert cota == 0 and list(saldos) == sorted(set(saldos))
+    assert probabilitats.sum() == pytest.approx(1)
+    assert (saldos * probabilitats).sum() == pytest.approx(saldo)
+    assert perdua == pytest.approx(probabilitats[saldos < 0].sum())
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+def test_exacte_sense_numpy(nom, monkeypatch):
+    exacta = sim.avaluar_no_retirar(nom, 30, disposicio="dotzena1+ple0")
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", False)
+    escalar = sim.avaluar_no_retirar(nom, 30, disposicio="dotzena1+ple0")
+    for clau in ("esperanca", "saldo", "variancia", "total_apostat", "esperanca_per_R"):
+        assert escalar[clau] == pytest.approx(exacta[clau])
+
+
+def test_exacte_sense_numpy_des_de_la_linia_dordres(monkeypatch, capsys):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", False)
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "20", "-N", "200", "--exact",
+                     "--exact-loss"]) == 0
+    sortida = capsys.readouterr().out
+    assert "Esperança exacta (No retirar-se)" in sortida
+    assert "requereix NumPy" in sortida
+
+
+@pytest.mark.parametrize("nom", DETERMINISTES)
+def test_distribucio_aproximada_dins_cota(nom):
+    exacta = sim.avaluar_no_retirar(nom, 60)["saldo"]
+    _, _, perdua, _ = sim.distribucio_no_retirar(nom, 60)
+    saldos, probabilitats, perdua_aproximada, cota = sim.distribucio_no_retirar(nom, 60, tolerancia=1e-4)
+    assert cota <= 1e-4
+    assert abs((saldos * probabilitats).sum() - exacta) <= cota + 1e-9
+    assert abs(perdua_aproximada - perdua) <= cota + 1e-12
+
+
+@pytest.mark.parametrize("nom", DETERMINISTES)
+@pytest.mark.parametrize("disposicio", ["vermell", "columna2"])
+def test_exacte_retirar_igual_que_enumeracio(nom, disposicio):
+    saldo, variancia, apostat = _enumerar(nom, 9, disposicio, retirar=True)
+    assert sum(p for p, _, _, _ in sim.distribucio_retirar(nom, 9, disposicio=disposicio)) == pytest.approx(1)
+    exacta = sim.esperanca_exacta_retirar(nom, 9, disposicio=disposicio)
+    assert exacta["saldo"] == pytest.approx(saldo)
+    assert exacta["variancia"] == pytest.approx(variancia)
+    assert exacta["total_apostat"] == pytest.approx(apostat)
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+def test_exacte_retirar_dins_interval_simulat(nom):
+    dades = sim.executar_simulacions(nom, 40, 40000, llavor=13, processos=1)
+    exacta = dades["exacta_ret"]
+    if nom not in DETERMINISTES:
+        assert exacta is None
+        return
+    assert abs(exacta["saldo"] - dades["mitjana_ret"]) < 4 * math.sqrt(exacta["variancia"] / 40000)
+
+
+@pytest.mark.parametrize("nom", sim.ESTRATEGIES)
+def test_exacte_dins_interval_simulat(nom):
+    dades = sim.afegir_exacta_no(sim.executar_simulacions(nom, 40, 40000, llavor=13, processos=1))
+    exacta = dades["exacta_no"]
+    assert abs(exacta["saldo"] - dades["mitjana_no"]) < 4 * math.sqrt(exacta["variancia"] / 40000)
+
+#Comparació amb tirades comunes
+
+def _tirades_comparacio(R, N, llavor, mida_bloc):
+#Tirades que fa servir comparar_estrategies: cada bloc les treu del primer fill de la seva llavor, tirada a tirada
+    blocs = [min(mida_bloc, N - inici) for inici in range(0, N, mida_bloc)]
+    tirades = []
+    for n, llavor_bloc in zip(blocs, np.random.SeedSequence(llavor).spawn(len(blocs))):
+        rng = np.random.default_rng(llavor_bloc.spawn(2)[0])
+        tirades.append(np.column_stack([rng.integers(0, 37, size=n) for _ in range(R)]))
+    return np.concatenate(tirades)
+
+
+def test_comparar_intervals_aparellats(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)     #Tres blocs
+    R, N, referencia = 20, 2500, ("Sempre el mateix valor", False)
+    comp = sim.comparar_estrategies(R, N, llavor=5, estrategies=DETERMINISTES, referencia=referencia, processos=1)
+    assert comp == sim.comparar_estrategies(R, N, llavor=5, estrategies=DETERMINISTES, referencia=referencia,
+                                            processos=3)
+    #Referència: cada configuració jugada amb el motor escalar sobre les mateixes tirades
+    tirades = _tirades_comparacio(R, N, 5, 1000)
+    jocs = {(nom, retirar): np.array(_jugar_escalar(nom, tirades, np.zeros_like(tirades), retirar))
+            for nom in DETERMINISTES for retirar in (True, False)}
+    z = statistics.NormalDist().inv_cdf(0.975)
+    s_r, a_r = jocs[referencia][:, 1], jocs[referencia][:, 2]
+    assert len(comp["files"]) == 2 * len(DETERMINISTES)
+    for f in comp["files"]:
+        s, a = jocs[(f["estr"], f["retirar"])][:, 1], jocs[(f["estr"], f["retirar"])][:, 2]
+        assert f["mitjana"] == pytest.approx(s.mean())
+        assert f["ic"] == pytest.approx(1.96 * s.std(ddof=1) / math.sqrt(N))
+        assert f["esperanca"] == pytest.approx(s.sum() / a.sum())
+        assert f["dif_ref"] == pytest.approx((s - s_r).mean())
+        assert f["ic_dif_ref"] == pytest.approx(1.96 * (s - s_r).std(ddof=1) / math.sqrt(N), abs=1e-9)
+        #Mètode delta sobre (balanç, apostat) de la configuració i de la referència
+        mitjanes = [s.mean(), a.mean(), s_r.mean(), a_r.mean()]
+        gradient = np.array([1 / mitjanes[1], -mitjanes[0] / mitjanes[1] ** 2,
+                             -1 / mitjanes[3], mitjanes[2] / mitjanes[3] ** 2])
+        variancia = gradient @ np.cov([s, a, s_r, a_r]) @ gradient / N
+        assert f["dif_esperanca_ref"] == pytest.approx(mitjanes[0] / mitjanes[1] - mitjanes[2] / mitjanes[3],
+                                                       abs=1e-12)
+        assert f["ic_dif_esperanca_ref"] == pytest.approx(z * math.sqrt(max(variancia, 0)), abs=1e-9)
+    for nom, (dif, ic) in comp["dif_modes"].items():
+        d = jocs[(nom, True)][:, 1] - jocs[(nom, False)][:, 1]
+        assert dif == pytest.approx(d.mean()) and ic == pytest.approx(1.96 * d.std(ddof=1) / math.sqrt(N))
+
+
+def test_comparar_juga_sempre_la_referencia():
+    referencia = ("Sempre el mateix valor", False)
+    totes = sim.comparar_estrategies(20, 1000, llavor=3, estrategies=DETERMINISTES, referencia=referencia, processos=1)
+    comp = sim.comparar_estrategies(20, 1000, llavor=3, estrategies=["Martingala"], referencia=referencia, processos=1)
+    assert [(f["estr"], f["retirar"]) for f in comp["files"]] == [("Martingala", True), ("Martingala", False),
+                                                                  (referencia[0], True), (referencia[0], False)]
+    #Les tirades són les mateixes, així que les diferències amb la referència no canvien
+    for f in comp["files"]:
+        igual, = [g for g in totes["files"] if (g["estr"], g["retirar"]) == (f["estr"], f["retirar"])]
+        assert f == igual
+
+def test_comparar_sense_numpy(monkeypatch, capsys):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", False)
+    with pytest.raises(SystemExit) as sortida:
+        sim.main(["compare", "-R", "10", "-N", "100"])
+    assert sortida.value.code == 2
+    assert "requereix NumPy" in capsys.readouterr().err
+
+
+#Escombrat de paràmetres
+
+def test_escombrar_igual_que_executar_simulacions(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    fila, = sim.escombrar(["Fibonacci"], [2], [50], [30], 3000, llavor=5, processos=1)
+    dades = sim.executar_simulacions("Fibonacci", 30, 3000, llavor=5, processos=1, base=2, maxim=50)
+    for mode in ("ret", "no"):
+        _mateixes_estadistiques(fila[f"acum_{mode}"], dades[f"acum_{mode}"])
+    assert fila["blocs_calculats"] == 3
+
+
+def test_escombrar_amplia_la_graella_amb_la_cau(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    cau = str(tmp_path / "cau")
+    primer = sim.escombrar(["Martingala"], [1], [64], [20], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert [f["blocs_calculats"] for f in primer] == [3]
+
+    #En ampliar la graella, només es calculen les cel·les noves; la que ja hi era es llegeix de la cau
+    segon = sim.escombrar(["Martingala"], [1, 2], [64], [20, 25], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert [(f["base"], f["R"], f["blocs_calculats"]) for f in segon] == \
+        [(1, 20, 0), (1, 25, 3), (2, 20, 3), (2, 25, 3)]
+    for mode in ("ret", "no"):
+        _mateixes_estadistiques(segon[0][f"acum_{mode}"], primer[0][f"acum_{mode}"])
+
+    #Amb tota la graella a la cau, no s'ha de simular res
+    def no_simular(*args):
+        raise AssertionError("bloc recalculat")
+    monkeypatch.setattr(sim, "_simular_bloc", no_simular)
+    tercer = sim.escombrar(["Martingala"], [1, 2], [64], [20, 25], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert [f["blocs_calculats"] for f in tercer] == [0, 0, 0, 0]
+    for abans, ara in zip(segon, tercer):
+        assert ara["esperanca_ret"] == pytest.approx(abans["esperanca_ret"])
+        assert ara["esperanca_no"] == pytest.approx(abans["esperanca_no"])
+
+
+
+def test_escombrar_augmentar_n_nomes_calcula_el_que_falta(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    cau = str(tmp_path / "cau")
+    carpeta = os.path.join(cau, sim._clau_cella("Martingala", 1, 64, 20, 3))
+    os.makedirs(carpeta)
+    open(os.path.join(carpeta, "bloc_2_500.json"), "w").close()
+
+    #L'últim bloc es simula sencer i només se'n compten les primeres 500 partides
+    primer, = sim.escombrar(["Martingala"], [1], [64], [20], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert primer["blocs_calculats"] == 3 and primer["acum_ret"].n == 2500
+    assert sorted(os.listdir(carpeta)) == ["bloc_0.json", "bloc_1.json", "bloc_2.json", "bloc_2_files.json"]
+    for i, (mode, retirar) in enumerate([("ret", True), ("no", False)]):
+        esperat = sim.Acumulador()
+        for b in range(2):
+            esperat.combinar(sim._simular_bloc("Martingala", 20, retirar, 1000 * b + 1, 1000,
+                                               sim._llavors_bloc(3, b)[i], 0, 1, 64)[0])
+        _, files = sim._simular_bloc("Martingala", 20, retirar, 2001, 1000, sim._llavors_bloc(3, 2)[i], None, 1, 64)
+        esperat.combinar(sim._acumulador_files([fila[1:] for fila in list(files)[:500]]))
+        _mateixes_estadistiques(primer[f"acum_{mode}"], esperat)
+
+    #En augmentar N, els blocs que ja hi eren (també el que abans era incomplet) no es tornen a simular
+    segon, = sim.escombrar(["Martingala"], [1], [64], [20], 3500, llavor=3, directori_cache=cau, processos=1)
+    assert segon["blocs_calculats"] == 1 and segon["acum_ret"].n == 3500
+    dades = sim.executar_simulacions("Martingala", 20, 3000, llavor=3, processos=1, base=1, maxim=64)
+    tercer, = sim.escombrar(["Martingala"], [1], [64], [20], 3000, llavor=3, directori_cache=cau, processos=1)
+    assert tercer["blocs_calculats"] == 0
+    for mode in ("ret", "no"):
+        _mateixes_estadistiques(tercer[f"acum_{mode}"], dades[f"acum_{mode}"])
+    quart, = sim.escombrar(["Martingala"], [1], [64], [20], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert quart["blocs_calculats"] == 0
+    for mode in ("ret", "no"):
+        _mateixes_estadistiques(quart[f"acum_{mode}"], primer[f"acum_{mode}"])
+
+    #Si canvia la mida dels blocs, els desats no serveixen
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1250)
+    cinque, = sim.escombrar(["Martingala"], [1], [64], [20], 2500, llavor=3, directori_cache=cau, processos=1)
+    assert cinque["blocs_calculats"] == 2
+
+#Proves de rendiment i cronòmetres
+
+def test_cronometres_per_fases(monkeypatch):
+    monkeypatch.setattr(sim, "MIDA_BLOC", 1000)
+    cronometres = sim.Cronometres()
+    with cronometres.mesura("a"):
+        pass
+    with cronometres.mesura("a"):
+        pass
+    assert cronometres.diccionari()["a"]["vegades"] == 2 and cronometres.diccionari()["a"]["segons"] >= 0
+    assert cronometres.resum().startswith("a: ") and cronometres.resum().endswith(" s (2×)")
+    sim.executar_simulacions("Fibonacci", 20, 2500, llavor=1, processos=1, cronometres=cronometres)
+    fases = cronometres.diccionari()
+    assert list(fases) == ["a", "simulació", "agregació", "càlcul exacte"]
+    assert fases["simulació"]["vegades"] == 3 and fases["càlcul exacte"]["vegades"] == 1
+    #Sense cronòmetres no es mesura res
+    with sim._mesura(None, "b"):
+        pass
+    assert "b" not in cronometres.diccionari()
+
+
+def test_bench_json_i_comparacio(tmp_path, capsys):
+    fitxer = str(tmp_path / "bench.json")
+    assert sim.main(["bench", "--size", "20x300", "--strategy", "Fibonacci", "Martingala", "--processes", "1",
+                     "--out", fitxer]) == 0
+    with open(fitxer, encoding="utf-8") as f:
+        resultats = json.load(f)
+    assert set(resultats) == {"data", "versio_motor", "python", "numpy", "plataforma", "processadors", "processos",
+                              "llavor", "proves"}
+    assert resultats["versio_motor"] == sim.VERSIO_MOTOR and resultats["numpy"] == np.__version__
+    assert resultats["processos"] == 1 and resultats["llavor"] == 0
+    proves = {(p["prova"], p.get("estrategia")): p for p in resultats["proves"]}
+    assert list(proves) == [("Simulador.jugar", "Fibonacci"), ("simular_lot", "Fibonacci"),
+                            ("Simulador.jugar", "Martingala"), ("simular_lot", "Martingala"),
+                            ("executar_simulacions", "Fibonacci"), ("finestra de resultats", "Fibonacci"),
+                            ("generar_informe_pdf", "Fibonacci")]
+    for clau in [("Simulador.jugar", "Fibonacci"), ("simular_lot", "Martingala")]:
+        assert (proves[clau]["R"], proves[clau]["N"]) == (20, 300)
+        assert proves[clau]["segons"] > 0 and proves[clau]["tirades_per_segon"] > 0
+    assert set(proves[("executar_simulacions", "Fibonacci")]["fases"]) == {"simulació", "agregació", "càlcul exacte"}
+    #Sense pantalla (o sense reportlab) la prova queda a la llista amb el motiu
+    for clau in [("finestra de resultats", "Fibonacci"), ("generar_informe_pdf", "Fibonacci")]:
+        assert proves[clau]["segons"] is not None or proves[clau]["omesa"]
+    capsys.readouterr()
+
+    assert sim.main(["bench", "--size", "20x300", "--strategy", "Fibonacci", "--processes", "1",
+                     "--compare", fitxer]) == 0
+    comparacio = capsys.readouterr().out.split("(< 1 és més ràpid):")[1].splitlines()[1:]
+    assert [linia.split()[0] for linia in comparacio][:2] == ["Simulador.jugar", "simular_lot"]
+    assert all(linia.endswith("×") for linia in comparacio)
+
+
+def test_comparar_benchmarks():
+    prova = lambda nom, segons, R=10: {"prova": nom, "estrategia": "Fibonacci", "R": R, "N": 100, "segons": segons}
+    anterior = {"proves": [prova("a", 2.0), prova("b", 1.0), prova("c", None), prova("d", 1.0)]}
+    actual = {"proves": [prova("a", 1.0), prova("b", 3.0), prova("c", 1.0), prova("d", 1.0, R=20), prova("e", 1.0)]}
+    assert [(p["prova"], q) for p, q in sim.comparar_benchmarks(anterior, actual)] == [("a", 0.5), ("b", 3.0)]
+
+#Línia d'ordres
+
+def _llegir_files(fitxer):
+#Files (retirar i les columnes del magatzem) d'un fitxer desat amb desar_resultats
+    if fitxer.endswith(".npy"):
+        return [tuple(f) for f in np.load(fitxer).tolist()]
+    if fitxer.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return [tuple(f.values()) for f in pq.read_table(fitxer).to_pylist()]
+    with open(fitxer, newline="", encoding="utf-8") as f:
+        files = list(csv.reader(f))
+    assert files[0] == ["retirar", *sim.MagatzemResultats.COLUMNES]
+    return [tuple(map(int, f)) for f in files[1:]]
+
+
+def _mateixes_estadistiques(a, b):
+#Compara dos acumuladors; la mitjana i la variància poden diferir en l'arrodoniment segons l'ordre d'agregació
+    for camp in ("n", "minim", "maxim", "suma_tirades", "suma_saldo", "suma_apostat", "perdudes", "cubetes"):
+        assert getattr(a, camp) == getattr(b, camp)
+    assert a.mitjana == pytest.approx(b.mitjana) and a.variancia == pytest.approx(b.variancia)
+
+
+def test_importar_sense_interficie():
+    codi = ("import importlib, sys; sys.path.insert(0, sys.argv[1]); "
+            "importlib.import_module('Codi_Simulador_TDR-Laia_Almira_Marimon (4)'); "
+            "print('tkinter' in sys.modules, 'reportlab' in sys.modules)")
+    sortida = subprocess.run([sys.executable, "-c", codi, ARREL], capture_output=True, text=True, check=True)
+    assert sortida.stdout.split() == ["False", "False"]
+
+
+@pytest.mark.parametrize("ext", [".csv", ".npy", ".parquet"])
+def test_simulate_sense_interficie(tmp_path, capsys, ext):
+    if ext == ".parquet":
+        pytest.importorskip("pyarrow")
+    fitxer = str(tmp_path / f"resultats{ext}")
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "30", "-N", "500", "--seed", "4",
+                     "--processes", "1", "--out", fitxer]) == 0
+    sortida = capsys.readouterr().out
+    dades = sim.executar_simulacions("Fibonacci", 30, 500, llavor=4, processos=1, max_files=None)
+    assert f"Esperança matemàtica (Retirar-se): {dades['esperanca_ret']:.5f}" in sortida
+    assert f"Esperança matemàtica (No retirar-se): {dades['esperanca_no']:.5f}" in sortida
+    assert "Caiguda màxima" not in sortida
+    assert _llegir_files(fitxer) == [(1, *f) for f in dades["finals_ret"]] + [(0, *f) for f in dades["finals_no"]]
+
+
+def test_simulate_amb_capital(capsys):
+    assert sim.main(["simulate", "--strategy", "Martingala", "-R", "40", "-N", "2000", "--seed", "3",
+                     "--processes", "1", "--bankroll", "50", "--take-profit", "20"]) == 0
+    sortida = capsys.readouterr().out
+    dades = sim.executar_simulacions("Martingala", 40, 2000, llavor=3, processos=1, capital=50, objectiu=20)
+    assert dades["exacta_ret"] is None and dades["exacta_no"] is None
+    assert "Capital inicial: 50  Objectiu de guany: 20" in sortida
+    for titol, acum in [("Retirar-se", dades["acum_ret"]), ("No retirar-se", dades["acum_no"])]:
+        assert 0 < acum.arruinades < acum.n
+        assert f"Ruïna ({titol}): probabilitat={acum.prob_ruina:.5f} " in sortida
+        assert f"Caiguda màxima ({titol}): mitjana={acum.caiguda_mitjana:.3f} màx={acum.caiguda_maxima}" in sortida
+
+def test_simulate_exact_loss(capsys):
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "30", "-N", "500", "--seed", "4",
+                     "--processes", "1", "--exact-loss"]) == 0
+    _, _, perdua, cota = sim.distribucio_no_retirar("Fibonacci", 30, sim.TOLERANCIA_DISTRIBUCIO)
+    assert (f"Probabilitat d'acabar perdent (No retirar-se, crèdit il·limitat): exacta={perdua:.5f} "
+            f"(error ≤ {cota:.1e})") in capsys.readouterr().out
+
+
+def test_desar_i_informe(tmp_path):
+    pytest.importorskip("reportlab")
+    directori, pdf = str(tmp_path / "resultats"), str(tmp_path / "informe.pdf")
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "30", "-N", "3000", "--seed", "2",
+                     "--processes", "1", "--save-dir", directori]) == 0
+    desades = sim.carregar_resultats(directori)
+    completa = sim.executar_simulacions("Fibonacci", 30, 3000, llavor=2, processos=1, max_files=None)
+    for mode in ("ret", "no"):
+        assert list(desades[f"finals_{mode}"]) == list(completa[f"finals_{mode}"])
+        _mateixes_estadistiques(desades[f"acum_{mode}"], completa[f"acum_{mode}"])
+    assert sim.main(["report", directori, "--pdf", pdf]) == 0
+    assert open(pdf, "rb").read(4) == b"%PDF"
+
+
+def test_desar_mostra_i_informe(tmp_path):
+    pytest.importorskip("reportlab")
+    directori, pdf = str(tmp_path / "resultats"), str(tmp_path / "informe.pdf")
+    assert sim.main(["simulate", "--strategy", "Fibonacci", "-R", "30", "-N", "3000", "--seed", "2",
+                     "--processes", "1", "--save-dir", directori, "--sample", "100"]) == 0
+    desades = sim.carregar_resultats(directori)
+    completa = sim.executar_simulacions("Fibonacci", 30, 3000, llavor=2, processos=1, max_files=None)
+    for mode in ("ret", "no"):
+        files = list(desades[f"finals_{mode}"])
+        assert len(files) == 100 and set(files) <= set(completa[f"finals_{mode}"])
+        #Les estadístiques són les de totes les simulacions, no només les de la mostra
+        assert desades[f"acum_{mode}"].estat() == completa[f"acum_{mode}"].estat()
+    assert sim.main(["report", directori, "--pdf", pdf]) == 0
+    assert open(pdf, "rb").read(4) == b"%PDF"
+
+
+def test_desar_sense_numpy(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", False)
+    directori = str(tmp_path)
+    dades = sim.executar_simulacions("Martingala", 20, 300, llavor=1, processos=1, max_files=None,
+                                     directori=directori)
+    desades = sim.carregar_resultats(directori)
+    for mode in ("ret", "no"):
+        assert desades[f"finals_{mode}"] == dades[f"finals_{mode}"]
+        assert desades[f"acum_{mode}"].estat() == dades[f"acum_{mode}"].estat()
+
+#Informe PDF
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_motor_desat_amb_la_llavor(tmp_path, monkeypatch, numpy):
+    monkeypatch.setattr(sim, "NUMPY_AVAILABLE", numpy)
+    directori = str(tmp_path / "resultats")
+    dades = sim.executar_simulacions("Fibonacci", 30, 200, llavor=3, processos=1, directori=directori)
+    desades = sim.carregar_resultats(directori)
+    versio_numpy = np.__version__ if numpy else None
+    for d in (dades, desades):
+        assert (d["versio_motor"], d["mida_bloc"], d["versio_numpy"]) == \
+            (sim.VERSIO_MOTOR, sim._mida_bloc(30), versio_numpy)
+    assert sim._descripcio_motor(desades) == (f"versió {sim.VERSIO_MOTOR}, blocs de {sim._mida_bloc(30)} "
+                                              f"simulacions, " + (f"NumPy {np.__version__}" if numpy else "sense NumPy"))
+    assert sim._descripcio_motor({"llavor": 3}) == "desconegut"
+
+
+def test_informe_detall_o_mostra(tmp_path, monkeypatch):
+    pytest.importorskip("reportlab")
+    dades = sim.executar_simulacions("Fibonacci", 30, 600, llavor=3, processos=1, max_files=None)
+    taules = []
+    taules_detall = sim._taules_detall_pdf
+    monkeypatch.setattr(sim, "_taules_detall_pdf", lambda files: taules.append(files) or taules_detall(files))
+    sim.generar_informe_pdf(dades, str(tmp_path / "complet.pdf"))
+    assert taules == [list(dades["finals_ret"]), list(dades["finals_no"])]
+    #Per sobre de max_files_detall només hi ha una mostra (reproduïble) de cada mode
+    mostres = []
+    for nom in ("mostra.pdf", "mostra_2.pdf"):
+        taules.clear()
+        sim.generar_informe_pdf(dades, str(tmp_path / nom), max_files_detall=500, mostra=50)
+        mostres.append(list(taules))
+    assert mostres[0] == mostres[1]
+    for files, totes in zip(mostres[0], (dades["finals_ret"], dades["finals_no"])):
+        assert len(files) == 50 and files == sorted(files) and set(files) <= set(totes)
+    for nom in ("complet.pdf", "mostra.pdf"):
+        assert open(tmp_path / nom, "rb").read(4) == b"%PDF"